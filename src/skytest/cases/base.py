@@ -1,16 +1,19 @@
 import re
+import typing
 
 from concurrent import futures
-import libvirt
-from retry import retry
 
 from skytest.common import conf
 from skytest.common import exceptions
+from skytest.common import journal
 from skytest.common import log
 from skytest.common import model
-from skytest.common import libvirt_guest
+from skytest.common import waiter
 from skytest.managers import base as base_manager
 
+if typing.TYPE_CHECKING:
+    from skytest.common import libvirt_guest
+
 CONF = conf.CONF
 LOG = log.getLogger()
 
@@ -18,13 +21,22 @@ LOG = log.getLogger()
 REG_LSBLK = r'NAME="([\w/]+)" SIZE="([\w.]+)" +TYPE="([\w]+)"'
 
 
+def _ecs_id(test: 'EcsActionTestBase', *args, **kwargs):
+    return test.ecs and test.ecs.id
+
+
+def _volume_id(test: 'EcsActionTestBase', volume: model.Volume, *args,
+               **kwargs):
+    return volume.id
+
+
 class EcsActionTestBase(object):
 
     def __init__(self, ecs: model.ECS,
                  manager: base_manager.BaseManager) -> None:
         self.ecs = ecs
         self.manager = manager
-        self._guest: libvirt_guest.LibvirtGuest = None
+        self._guest: 'libvirt_guest.LibvirtGuest' = None
         self.created_volumes: list[model.Volume] = []
 
     def tear_up(self): pass
@@ -38,13 +50,13 @@ class EcsActionTestBase(object):
         except exceptions.ActionNotSuppport as e:
             raise exceptions.SkipActionException(e)
 
-    @retry(exceptions=exceptions.EcsIsNotCreated,
-           tries=CONF.ecs_test.boot_timeout/5, delay=5)
+    @waiter.waits('ecs_created', retry_on=exceptions.EcsIsNotCreated,
+                  resource=_ecs_id)
     def wait_for_ecs_created(self):
         if not self.ecs:
             raise Exception(f'{self.__class__}.ecs is None')
 
-        self.ecs = self.manager.get_ecs(self.ecs)
+        self.ecs = self.manager.get_ecs(self.ecs.id)
         LOG.debug('status: {:10}, task state: {:10}, host: {}',
                   self.ecs.status, self.ecs.task_state, self.ecs.host,
                   ecs=self.ecs.id)
@@ -53,8 +65,8 @@ class EcsActionTestBase(object):
         if self.ecs.is_building() or self.ecs.has_task():
             raise exceptions.EcsIsNotCreated(self.ecs.id)
 
-    @retry(exceptions=exceptions.EcsIsNotDeleted,
-           tries=30, delay=1, backoff=2, max_delay=10)
+    @waiter.waits('ecs_deleted', retry_on=exceptions.EcsIsNotDeleted,
+                  resource=_ecs_id)
     def wait_for_ecs_deleted(self):
         if not self.ecs:
             raise Exception(f'{self.__class__}.ecs is None')
@@ -63,14 +75,19 @@ class EcsActionTestBase(object):
             LOG.debug('status: {:10}, stask_state: {:10}',
                       self.ecs.status, self.ecs.task_state, ecs=self.ecs.id)
         except exceptions.ECSNotFound:
+            # the ECS is kept in the journal until it's really deleted
+            journal.record_deleted('ecs', self.ecs.id)
             return
         if self.ecs.is_error():
             raise exceptions.EcsIsError(self.ecs.id)
         raise exceptions.EcsIsNotDeleted(self.ecs.id)
 
-    @retry(exceptions=AssertionError,
-           tries=60, delay=1, backoff=2, max_delay=5)
-    def wait_for_ecs_task_finished(self, show_progress=False):
+    def wait_for_ecs_task_finished(self, show_progress=False,
+                                   wait_name='ecs_task_finished'):
+        waiter.wait(lambda: self._ecs_must_have_no_task(show_progress),
+                    wait_name, resource_id=self.ecs.id)
+
+    def _ecs_must_have_no_task(self, show_progress=False):
         self.refresh_ecs()
         LOG.debug('status={}, task state={}{}', self.ecs.status,
                   self.ecs.task_state,
@@ -79,8 +96,9 @@ class EcsActionTestBase(object):
         assert not self.ecs.has_task(), f'ecs {self.ecs.id} still has task'
         assert not self.ecs.is_building(), f'ecs {self.ecs.id} is building'
 
-    @retry(exceptions=exceptions.VolumeIsNotAvailable,
-           tries=60, delay=1, backoff=2, max_delay=10)
+    @waiter.waits('volume_created',
+                  retry_on=exceptions.VolumeIsNotAvailable,
+                  resource=_volume_id)
     def wait_volume_created(self, volume: model.Volume):
         LOG.info('waiting volume {} created', volume.id, ecs=self.ecs.id)
         volume = self.manager.get_volume(volume.id)
@@ -93,23 +111,25 @@ class EcsActionTestBase(object):
         LOG.debug('volume {} created', volume.id, ecs=self.ecs.id)
         return volume
 
-    @retry(exceptions=exceptions.VolumeIsNotDeleted,
-           tries=60, delay=1, backoff=2, max_delay=10)
+    @waiter.waits('volume_deleted', retry_on=exceptions.VolumeIsNotDeleted,
+                  resource=_volume_id)
     def wait_volume_deleted(self, volume: model.Volume):
         try:
-            self.manager.get_volume(volume)
+            volume = self.manager.get_volume(volume.id)
             LOG.info('volume {} status: {}', volume.id, volume.status,
                      ecs=self.ecs.id)
         except exceptions.VolumeNotFound:
             LOG.info("deleted volume {} ", volume.id, ecs=self.ecs.id)
+            journal.record_deleted('volume', volume.id)
             return
         else:
             if volume.is_error():
                 raise exceptions.VolumeIsError(volume.id)
             raise exceptions.VolumeIsNotDeleted(volume.id)
 
-    @retry(exceptions=exceptions.VolumeIsNotAvailable,
-           tries=60, delay=1, backoff=2, max_delay=10)
+    @waiter.waits('volume_available',
+                  retry_on=exceptions.VolumeIsNotAvailable,
+                  resource=_volume_id)
     def wait_volume_is_available(self, volume: model.Volume):
         vol = self.manager.get_volume(volume.id)
         LOG.info('volume {} status: {}', vol.id, vol.status,
@@ -118,23 +138,24 @@ class EcsActionTestBase(object):
             raise exceptions.VolumeIsNotAvailable(volume.id)
         return vol
 
-    @retry(exceptions=AssertionError,
-           tries=60, delay=1, backoff=2, max_delay=10)
+    @waiter.waits('volume_inuse', resource=_volume_id)
     def wait_volume_is_inuse(self, volume: model.Volume):
         vol = self.manager.get_volume(volume.id)
         LOG.info('volume {} status: {}', vol.id, vol.status, ecs=self.ecs.id)
         self.assert_volume_is_inuse(vol)
         return vol
 
-    def get_libvirt_guest(self, host=None) -> libvirt_guest.LibvirtGuest:
+    def get_libvirt_guest(self, host=None) -> 'libvirt_guest.LibvirtGuest':
+        # libvirt is imported only when the guest is checked
+        from skytest.common import libvirt_guest
+
         ecs_host_ip = host or self.manager.get_host_ip(self.ecs.host)
         if not self._guest or self._guest.host != ecs_host_ip:
             self._guest = libvirt_guest.LibvirtGuest(self.ecs.id,
                                                      host=ecs_host_ip)
         return self._guest
 
-    @retry(exceptions=AssertionError,
-           tries=6, delay=1, backoff=2, max_delay=10)
+    @waiter.waits('guest_ipaddress')
     def _guest_must_have_all_ipaddress(self, ecs_ip_address):
         found = set(
             re.findall(r'inet ([0-9.]+)/', self.get_libvirt_guest().ip_a()))
@@ -183,16 +204,11 @@ class EcsActionTestBase(object):
             self.wait_volume_created(volume)
         return created_volumes
 
-    def create_ports(self, networks, workers=None) -> list[str]:
-        created_ports = []
-        with futures.ThreadPoolExecutor(max_workers=workers) as pool:
-            results = pool.map(self.manager.create_port, networks)
-            for result in results:
-                created_ports.append(result)
-        return created_ports
+    def create_ports(self, networks) -> list[model.Port]:
+        LOG.debug('creating {} port(s)', len(networks), ecs=self.ecs.id)
+        return self.manager.create_ports(networks)
 
-    @retry(exceptions=AssertionError,
-           tries=60, delay=1, backoff=2, max_delay=10)
+    @waiter.waits('guest_block')
     def _guest_must_have_all_block(self, ecs_blocks):
         found = set(re.findall(r'NAME="([a-zA-Z/]+)"',
                                self.get_libvirt_guest().lsblk()))
@@ -205,8 +221,7 @@ class EcsActionTestBase(object):
         found = set(re.findall(REG_LSBLK, self.get_libvirt_guest().lsblk()))
         return [{'name': v[0], 'size': v[1], 'type': v[2]} for v in found]
 
-    @retry(exceptions=AssertionError,
-           tries=12, delay=1, backoff=2, max_delay=5)
+    @waiter.waits('guest_block_size')
     def guest_block_size_must_be(self, name, size):
         if not CONF.ecs_test.enable_guest_qga_command:
             return
@@ -217,9 +232,8 @@ class EcsActionTestBase(object):
         assert blocks[0].get('size') == size, \
             f'block {name} size is {blocks[0]} , not {size}'
 
-    @retry(exceptions=exceptions.EcsNotMatchOKConsoleLog,
-           tries=CONF.ecs_test.console_log_timeout,
-           delay=1, backoff=2, max_delay=5)
+    @waiter.waits('console_log',
+                  retry_on=exceptions.EcsNotMatchOKConsoleLog)
     def ecs_must_have_ok_console_log(self):
         if not CONF.ecs_test.enable_verify_console_log:
             return
@@ -235,7 +249,7 @@ class EcsActionTestBase(object):
                 raise exceptions.EcsMatchErrorConsoleLog(self.ecs.id)
         raise exceptions.EcsNotMatchOKConsoleLog(self.ecs.id)
 
-    @retry(exceptions=AssertionError, tries=10, delay=1, max_delay=6)
+    @waiter.waits('guest_hostname')
     def ecs_guest_must_have_hostname(self, name):
         if not CONF.ecs_test.enable_guest_qga_command:
             return
@@ -250,15 +264,20 @@ class EcsActionTestBase(object):
     def refresh_ecs(self):
         self.ecs = self.manager.get_ecs(self.ecs.id)
 
-    @retry(exceptions=libvirt.libvirtError, tries=60*6, delay=5)
+    @waiter.waits('qga_connected', retry_on=exceptions.EcsQgaNotConnected)
     def wait_ecs_qga_connected(self):
         if not CONF.ecs_test.enable_guest_qga_command:
             return
+        import libvirt
+
         LOG.debug('waiting QGA is connected', ecs=self.ecs.id)
         guest = self.get_libvirt_guest()
-        guest.guest_exec('hostname')
+        try:
+            guest.guest_exec('hostname')
+        except libvirt.libvirtError as e:
+            raise exceptions.EcsQgaNotConnected(self.ecs.id, e)
 
-    @retry(exceptions=AssertionError, tries=12, delay=5)
+    @waiter.waits('guest_active')
     def wait_ecs_guest_active(self, host=None):
         if not CONF.ecs_test.enable_guest_connection:
             return
@@ -266,7 +285,7 @@ class EcsActionTestBase(object):
         guest = self.get_libvirt_guest(host=host)
         assert guest.is_active, f'ecs {self.ecs.id} guest is not active'
 
-    @retry(exceptions=AssertionError, tries=60, delay=5)
+    @waiter.waits('guest_not_exists')
     def wait_ecs_guest_not_exists(self, host=None):
         if not CONF.ecs_test.enable_guest_connection:
             return
@@ -281,7 +300,7 @@ class EcsActionTestBase(object):
             assert vif_id in vifs, \
                 f'ecs {self.ecs.id} does not have interface {vif_id}'
 
-    @retry(exceptions=AssertionError, tries=30, delay=2)
+    @waiter.waits('interface_detached', resource=_ecs_id)
     def assert_ecs_has_no_interfaces(self, interfaces: list[str]):
         vifs = self.manager.get_ecs_interfaces(self.ecs)
         for vif_id in interfaces:
@@ -0,0 +1,151 @@
+"""
+Boot storm: create N ECS with one request (min_count/max_count), then
+continue each ECS into its own action sequence
+"""
+from concurrent import futures
+import math
+import time
+
+from skytest.common import conf
+from skytest.common import exceptions
+from skytest.common import log
+from skytest.common import model
+from skytest.common import store
+from skytest.common import utils
+from skytest.common import waiter
+from skytest.managers import base as base_manager
+
+from . import ecs_actions
+from . import scenario
+
+CONF = conf.CONF
+LOG = log.getLogger()
+
+
+def wait_reservation(manager: base_manager.BaseManager, reservation_id,
+                     count, started_at) -> list[tuple]:
+    """Wait all ECS of the reservation to be created
+
+    All ECS are polled with one list request, return a list of
+    (model.ECS, model.ActionResult) for the create action.
+    """
+    created = {}
+
+    def _check_created():
+        for ecs in manager.find_ecs_by_reservation(reservation_id):
+            if ecs.id in created:
+                continue
+            action_result = model.ActionResult(
+                'create', ecs=ecs.id, started_at=started_at,
+                elapsed=time.time() - started_at, host=ecs.host)
+            if ecs.is_error():
+                action_result.ok = False
+                LOG.error('create failed, status is error', ecs=ecs.id)
+            elif ecs.is_building() or ecs.has_task():
+                continue
+            else:
+                LOG.success('created, host is {}', ecs.host, ecs=ecs.id)
+            created[ecs.id] = (ecs, action_result)
+        LOG.info('reservation {}: {}/{} ECS created', reservation_id,
+                 len(created), count)
+        assert len(created) >= count, \
+            f'reservation {reservation_id} is not created'
+
+    try:
+        waiter.wait(_check_created, 'ecs_created')
+    except AssertionError:
+        LOG.error('reservation {}: only {}/{} ECS created in {} seconds',
+                  reservation_id, len(created), count,
+                  CONF.ecs_test.boot_timeout)
+        for ecs in manager.find_ecs_by_reservation(reservation_id):
+            if ecs.id not in created:
+                created[ecs.id] = (ecs, model.ActionResult(
+                    'create', ecs=ecs.id, started_at=started_at,
+                    elapsed=time.time() - started_at, ok=False))
+    return list(created.values())
+
+
+def boot_reservation(manager: base_manager.BaseManager, count,
+                     flavor, networks) -> list[tuple]:
+    started_at = time.time()
+    try:
+        reservation_id = manager.create_ecs_multi(flavor, count,
+                                                  networks=networks)
+    except exceptions.EcsCloudAPIError as e:
+        LOG.error('boot {} ECS failed: {}', count, e)
+        return []
+    return wait_reservation(manager, reservation_id, count, started_at)
+
+
+def do_test_ecs(args) -> model.ScenarioResult:
+    """Run the actions after create with the ECS created by boot storm"""
+    ecs, create_result, actions = args
+    test_task = scenario.ECSScenarioTest(actions, ecs_id=ecs.id)
+    test_task.result.actions.append(create_result)
+    if create_result.ok:
+        try:
+            test_task.run(pre_check=False)
+        except Exception as e:
+            LOG.error('test failed, {}', e)
+    else:
+        test_task.result.ok = False
+        test_task.result.error = 'create failed'
+    test_task.result.ecs = ecs.id
+    test_task.result.started_at = create_result.started_at
+    test_task.result.elapsed = time.time() - create_result.started_at
+
+    if CONF.ecs_test.cleanup_error_vms or test_task.result.ok:
+        LOG.info('delete ecs', ecs=ecs.id)
+        # wait until it's deleted, then it's removed from the journal
+        job = ecs_actions.VM_TEST_SCENARIOS['create'](ecs, test_task.manager)
+        try:
+            job.tear_down()
+        except Exception as e:
+            LOG.warning('delete ecs failed: {}', e, ecs=ecs.id)
+    return test_task.result
+
+
+def test_boot_storm():
+    ecs_actions.init()
+    actions = scenario.parse_test_actions()
+    if actions[0] != 'create':
+        raise exceptions.InvalidConfig(
+            reason="the first action of boot storm must be 'create'")
+    if CONF.ecs_test.boot_storm_count < 1:
+        raise exceptions.InvalidConfig(reason='boot_storm_count must >= 1')
+
+    test_checker = scenario.ECSScenarioTest(actions)
+    test_checker.before_run()
+    manager = test_checker.manager
+
+    counts = [CONF.ecs_test.boot_storm_count] * math.floor(
+        CONF.ecs_test.total / CONF.ecs_test.boot_storm_count)
+    if CONF.ecs_test.total % CONF.ecs_test.boot_storm_count:
+        counts.append(CONF.ecs_test.total % CONF.ecs_test.boot_storm_count)
+    flavor = manager.get_flavor_id(ecs_actions.FLAVRS.current())
+    networks = None if ecs_actions.NETWORKS.is_empty() else \
+        [ecs_actions.NETWORKS.current()]
+    LOG.info('==== Boot storm: {} request(s), {} ECS per request ====',
+             len(counts), CONF.ecs_test.boot_storm_count)
+
+    created = []
+    with futures.ThreadPoolExecutor(
+            max_workers=CONF.ecs_test.worker) as executor:
+        tasks = [executor.submit(boot_reservation, manager, count, flavor,
+                                 networks)
+                 for count in counts]
+        for task in futures.as_completed(tasks):
+            created.extend(task.result())
+
+    ng = CONF.ecs_test.total - len(created)
+    for result in utils.run_processes(
+            do_test_ecs, maps=[(ecs, create_result, actions[1:])
+                               for ecs, create_result in created],
+            max_workers=CONF.ecs_test.worker):
+        store.save(result)
+        if not result.ok:
+            ng += 1
+
+    utils.report_results(CONF.ecs_test.total, ng)
+    if ng:
+        raise exceptions.TestFailed()
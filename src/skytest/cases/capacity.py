@@ -0,0 +1,150 @@
+import time
+
+from skytest.common import conf
+from skytest.common import exceptions
+from skytest.common import log
+from skytest.common import stats
+from skytest.common import store
+from skytest.common import utils
+
+from . import ecs_actions
+from . import quarantine
+from . import scenario
+
+CONF = conf.CONF
+LOG = log.getLogger()
+
+
+class LevelResult(object):
+
+    def __init__(self, worker, results, started_at, duration) -> None:
+        self.worker = worker
+        self.results = results
+        self.duration = duration
+        self.summary = stats.summarize_actions(results)
+        # the scenarios started before the deadline are drained with fewer
+        # workers, the actions completed in the drain are excluded
+        self.throughput = stats.throughput(results, duration,
+                                           until=started_at + duration)
+        self.violations = []
+
+    @property
+    def failure_rate(self):
+        if not self.results:
+            return 0
+        return len([r for r in self.results if not r.ok]) / len(self.results)
+
+    @property
+    def healthy(self):
+        return not self.violations
+
+
+def parse_action_slo() -> dict:
+    slo = {}
+    for item in CONF.capacity.slo_action_p95:
+        action, _, seconds = item.partition(':')
+        if not utils.is_uint(seconds):
+            raise exceptions.InvalidConfig(
+                reason=f'slo_action_p95 {item} is invalid')
+        slo[action] = int(seconds)
+    return slo
+
+
+def check_slo(level: LevelResult, action_slo: dict):
+    if level.failure_rate > float(CONF.capacity.slo_failure_rate):
+        level.violations.append(
+            f'failure rate {level.failure_rate:.2%} > '
+            f'{float(CONF.capacity.slo_failure_rate):.2%}')
+    for action, action_stats in level.summary.items():
+        slo_p95 = action_slo.get(action, CONF.capacity.slo_p95)
+        if action_stats.p95 > slo_p95:
+            level.violations.append(
+                f'{action} p95 {action_stats.p95:.2f}s > {slo_p95}s')
+
+
+def worker_levels():
+    if not 1 <= CONF.capacity.start_worker <= CONF.capacity.max_worker:
+        raise exceptions.InvalidConfig(
+            reason='start_worker must >= 1 and <= max_worker')
+    if CONF.capacity.step_factor < 2:
+        raise exceptions.InvalidConfig(reason='step_factor must >= 2')
+    worker = CONF.capacity.start_worker
+    while worker <= CONF.capacity.max_worker:
+        yield worker
+        worker *= CONF.capacity.step_factor
+
+
+def run_level(worker) -> LevelResult:
+    LOG.info('==== Capacity level: worker={}, hold {} seconds ====',
+             worker, CONF.capacity.hold_time)
+    store.start_run(name=f'worker={worker}', mode='capacity')
+    start = time.time()
+    results = []
+    for result in utils.run_processes_for(scenario.do_test_vm,
+                                          CONF.capacity.hold_time,
+                                          max_workers=worker):
+        store.save(result)
+        results.append(result)
+    return LevelResult(worker, results, start, CONF.capacity.hold_time)
+
+
+def report(levels: list[LevelResult]):
+    import prettytable
+
+    pt = prettytable.PrettyTable(['Worker', 'Scenarios', 'Failure Rate',
+                                  'Actions/min', 'Max P95(s)', 'SLO'])
+    for level in levels:
+        max_p95 = max([s.p95 for s in level.summary.values()] or [0])
+        pt.add_row([level.worker, len(level.results),
+                    f'{level.failure_rate:.2%}', f'{level.throughput:.2f}',
+                    f'{max_p95:.2f}',
+                    'ok' if level.healthy else '; '.join(level.violations)])
+    LOG.info('capacity levels:\n{}', pt)
+
+    healthy = [level for level in levels if level.healthy]
+    if not healthy:
+        LOG.error('no healthy level, the first level {} violates SLO',
+                  levels[0].worker)
+        return
+    LOG.success('last healthy level: worker={}', healthy[-1].worker)
+    knee = stats.find_knee([(level.worker, level.throughput)
+                            for level in healthy])
+    if knee:
+        LOG.success('knee of the curve: worker={}, {:.2f} actions/min',
+                    knee[0], knee[1])
+
+
+def _warn_ignored_options():
+    ignored = []
+    if CONF.ecs_test.barrier_action:
+        ignored.append('[ecs_test] barrier_action')
+    if CONF.ecs_test.spread:
+        ignored.append('[ecs_test] spread')
+    if quarantine.enabled():
+        ignored.append('[quarantine]')
+    if ignored:
+        LOG.warning('{} is ignored by capacity mode', ', '.join(ignored))
+
+
+def test_capacity():
+    _warn_ignored_options()
+    ecs_actions.init()
+    action_slo = parse_action_slo()
+    test_checker = scenario.ECSScenarioTest(scenario.parse_test_actions())
+    test_checker.before_run()
+
+    levels: list[LevelResult] = []
+    for worker in worker_levels():
+        level = run_level(worker)
+        check_slo(level, action_slo)
+        levels.append(level)
+        LOG.info('actions of level worker={}:\n{}', worker,
+                 stats.format_actions_table(level.summary))
+        if not level.healthy:
+            LOG.warning('SLO is violated at worker={}: {}', worker,
+                        '; '.join(level.violations))
+            break
+
+    report(levels)
+    if not levels[0].healthy:
+        raise exceptions.TestFailed()
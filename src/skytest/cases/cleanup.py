@@ -0,0 +1,259 @@
+"""
+Find and delete the resources created by skytest
+
+The resources are found by the name prefix of utils.generate_name, or
+replayed from the journal, and deleted in order: servers, volumes (detached
+first), ports, rbd images.
+"""
+from concurrent import futures
+import time
+
+from skytest.common import exceptions
+from skytest.common import journal
+from skytest.common import log
+from skytest.common import model
+from skytest.common import utils
+from skytest.managers import base as base_manager
+
+LOG = log.getLogger()
+
+NAME_PREFIX = 'skytest-'
+NOT_FOUND_ERRORS = (exceptions.ECSNotFound, exceptions.VolumeNotFound,
+                    exceptions.PortNotFound)
+
+
+def _ignore_not_found(func):
+
+    def wrapper(item):
+        try:
+            func(item)
+        except NOT_FOUND_ERRORS as e:
+            LOG.debug('{}', e)
+    return wrapper
+
+
+def _split_deleting(volumes: list[model.Volume]) -> tuple[list, set]:
+    """Return the volumes to delete and the ids of the deleting ones
+
+    The deleting volumes are not requested again, but they are waited.
+    """
+    deletable = [vol for vol in volumes if vol.status.lower() != 'deleting']
+    return deletable, {vol.id for vol in volumes
+                       if vol.status.lower() == 'deleting'}
+
+
+def _exists(get_func, resource_id):
+    try:
+        get_func(resource_id)
+    except NOT_FOUND_ERRORS:
+        return False
+    return True
+
+
+class Reaper(object):
+
+    def __init__(self, manager: base_manager.BaseManager, workers=10,
+                 rate=0, timeout=600, interval=5, all_tenants=False,
+                 dry_run=False) -> None:
+        self.manager = manager
+        self.workers = workers
+        self.limiter = utils.RateLimiter(rate)
+        self.timeout = timeout
+        self.interval = interval
+        self.all_tenants = all_tenants
+        self.dry_run = dry_run
+        self.failed = 0
+
+    def _run(self, action, kind, func, items) -> list:
+        """Run func with every item concurrently, return the succeed items
+
+        The items may be a generator, the first page is processed while
+        the next pages are listing.
+        """
+        if self.dry_run:
+            items = list(items)
+            for item in items:
+                LOG.info('[dry-run] {} {} {}', action, kind, item.id)
+            return []
+
+        def _run_one(item):
+            self.limiter.wait()
+            func(item)
+
+        succeed = []
+        with futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            tasks = {executor.submit(_run_one, item): item for item in items}
+            for task in futures.as_completed(tasks):
+                item = tasks[task]
+                try:
+                    task.result()
+                except Exception as e:
+                    self.failed += 1
+                    LOG.warning('{} {} {} failed: {}', action, kind,
+                                item.id, e)
+                else:
+                    succeed.append(item)
+        LOG.info('{} {} {}(s)', action, len(succeed), kind)
+        return succeed
+
+    def _wait(self, kind, ids: set, get_pending) -> set:
+        """Wait until no id is pending, return the ids still pending
+
+        get_pending(ids) returns the pending ids of them.
+        """
+        deadline = time.time() + self.timeout
+        while ids:
+            ids = ids & get_pending(ids)
+            if not ids:
+                break
+            if time.time() >= deadline:
+                self.failed += len(ids)
+                LOG.error('{} {}(s) are still pending after {} seconds: {}',
+                          len(ids), kind, self.timeout, ', '.join(ids))
+                break
+            LOG.info('waiting for {} {}(s)', len(ids), kind)
+            time.sleep(self.interval)
+        return ids
+
+    def cleanup_servers(self):
+        name = f'^{NAME_PREFIX}'
+
+        def delete(ecs: model.ECS):
+            self.manager.delete_ecs(ecs)
+
+        # every poll lists the servers once rather than one GET per server
+        deleting = self._run(
+            'delete', 'server', _ignore_not_found(delete),
+            self.manager.iter_ecs(name=name, all_tenants=self.all_tenants))
+        self._wait('server', {ecs.id for ecs in deleting},
+                   lambda ids: {ecs.id for ecs in self.manager.iter_ecs(
+                       name=name, all_tenants=self.all_tenants)})
+
+    def _list_volumes(self) -> dict[str, model.Volume]:
+        return {
+            vol.id: vol for vol in self.manager.iter_volumes(
+                name_prefix=NAME_PREFIX, all_tenants=self.all_tenants)
+        }
+
+    def _detach_volumes(self, volumes: list[model.Volume], get_attached):
+
+        def detach(vol: model.Volume):
+            for server_id in vol.attached_servers:
+                self.manager.detach_volume(model.ECS(server_id), vol.id)
+
+        attached = [vol for vol in volumes if vol.attached_servers]
+        if not attached:
+            return
+        detaching = self._run('detach', 'volume', detach, attached)
+        self._wait('volume', {vol.id for vol in detaching}, get_attached)
+
+    def cleanup_volumes(self):
+        volumes = self._list_volumes()
+        self._detach_volumes(
+            list(volumes.values()),
+            lambda ids: {vol.id for vol in self._list_volumes().values()
+                         if vol.attached_servers})
+
+        deletable, already_deleting = _split_deleting(volumes.values())
+        deleting = self._run('delete', 'volume',
+                             _ignore_not_found(self.manager.delete_volume),
+                             deletable)
+        if self.dry_run:
+            return
+        self._wait('volume', {vol.id for vol in deleting} | already_deleting,
+                   lambda ids: set(self._list_volumes()))
+
+    def cleanup_ports(self):
+
+        def delete(port: model.Port):
+            self.manager.delete_port(port.id)
+
+        # neutron deletes the port synchronously
+        self._run('delete', 'port', _ignore_not_found(delete),
+                  self.manager.iter_ports(name_prefix=NAME_PREFIX))
+
+    def cleanup_journal(self, journal_file):
+        """Delete the resources which are created but not deleted
+
+        Only the resources of the journal are requested, the journal is
+        rewritten with the resources which are failed to delete.
+        """
+        started_at = time.time()
+        live = journal.replay(journal_file)
+        LOG.info('found {} in journal {}',
+                 ', '.join(f'{len(ids)} {kind}(s)'
+                           for kind, ids in live.items()) or 'nothing',
+                 journal_file)
+        if self.dry_run:
+            return 0
+
+        reservations = {
+            reservation_id: self.manager.find_ecs_by_reservation(
+                reservation_id)
+            for reservation_id in live.get('reservation', [])
+        }
+        servers = {ecs_id: model.ECS(ecs_id) for ecs_id in live.get('ecs', [])}
+        for reservation_servers in reservations.values():
+            servers.update({ecs.id: ecs for ecs in reservation_servers})
+        deleting = self._run('delete', 'server',
+                             _ignore_not_found(self.manager.delete_ecs),
+                             servers.values())
+        left = set(servers) - {ecs.id for ecs in deleting}
+        left |= self._wait(
+            'server', {ecs.id for ecs in deleting},
+            lambda ids: {ecs_id for ecs_id in ids
+                         if _exists(self.manager.get_ecs, ecs_id)})
+
+        def get_volumes(ids) -> list[model.Volume]:
+            volumes = []
+            for volume_id in ids:
+                try:
+                    volumes.append(self.manager.get_volume(volume_id))
+                except exceptions.VolumeNotFound:
+                    pass
+            return volumes
+
+        volumes = get_volumes(live.get('volume', []))
+        self._detach_volumes(
+            volumes, lambda ids: {vol.id for vol in get_volumes(ids)
+                                  if vol.attached_servers})
+        deletable, already_deleting = _split_deleting(volumes)
+        deleting = self._run('delete', 'volume',
+                             _ignore_not_found(self.manager.delete_volume),
+                             deletable)
+        left |= {vol.id for vol in deletable} - {vol.id for vol in deleting}
+        left |= self._wait(
+            'volume', {vol.id for vol in deleting} | already_deleting,
+            lambda ids: {vol.id for vol in get_volumes(ids)})
+
+        def delete_port(port: model.Port):
+            self.manager.delete_port(port.id)
+
+        ports = [model.Port(port_id, '') for port_id in live.get('port', [])]
+        deleting = self._run('delete', 'port', _ignore_not_found(delete_port),
+                             ports)
+        left |= {port.id for port in ports} - {port.id for port in deleting}
+
+        live = {kind: [resource_id for resource_id in ids
+                       if resource_id in left]
+                for kind, ids in live.items() if kind != 'reservation'}
+        live['reservation'] = [
+            reservation_id
+            for reservation_id, reservation_servers in reservations.items()
+            if any(ecs.id in left for ecs in reservation_servers)
+        ]
+        journal.compact(journal_file, live)
+        LOG.info('cleanup finished in {:.2f} seconds, failed: {}',
+                 time.time() - started_at, self.failed)
+        return self.failed
+
+    def cleanup(self, rbd_pool=None):
+        started_at = time.time()
+        self.cleanup_servers()
+        self.cleanup_volumes()
+        self.cleanup_ports()
+        if rbd_pool and not self.dry_run:
+            self.manager.cleanup_rbd(rbd_pool, workers=self.workers)
+        LOG.info('cleanup finished in {:.2f} seconds, failed: {}',
+                 time.time() - started_at, self.failed)
+        return self.failed
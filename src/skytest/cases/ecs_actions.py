@@ -1,5 +1,4 @@
 import time
-from concurrent import futures
 
 from skytest.common import conf
 from skytest.common import exceptions
@@ -8,6 +7,9 @@ from skytest.common import model
 from skytest.common import utils
 
 from . import base
+from . import placement
+from . import quarantine
+from . import resource_pool
 
 CONF = conf.CONF
 LOG = log.getLogger()
@@ -28,8 +30,15 @@ def init():
 class EcsCreateTest(base.EcsActionTestBase):
 
     def start(self):
-        net_ids = [NETWORKS.current()] if not NETWORKS.is_empty() else None
-        self.ecs = self.manager.create_ecs(FLAVRS.current(), networks=net_ids)
+        target = placement.current()
+        if target.no_host:
+            raise exceptions.NotAvailableServices(
+                reason='all of the compute hosts to spread are quarantined')
+        net_id = target.network or \
+            (NETWORKS.current() if not NETWORKS.is_empty() else None)
+        self.ecs = self.manager.create_ecs(
+            target.flavor or FLAVRS.current(),
+            networks=net_id and [net_id], availability_zone=target.az)
         self.wait_for_ecs_task_finished()
         self.assert_ecs_is_active()
         if CONF.ecs_test.enable_verify_console_log:
@@ -40,7 +49,11 @@ class EcsCreateTest(base.EcsActionTestBase):
         self.guest_must_have_all_block()
 
     def tear_down(self):
-        self.manager.delete_ecs(self.ecs)
+        try:
+            self.manager.delete_ecs(self.ecs)
+        except exceptions.ECSNotFound:
+            LOG.warning('ecs is already deleted', ecs=self.ecs.id)
+            return
         self.wait_for_ecs_deleted()
 
 
@@ -64,7 +77,7 @@ class EcsStartTest(base.EcsActionTestBase):
         self.manager.start_ecs(self.ecs)
         LOG.info('starting', ecs=self.ecs.id)
         self.wait_for_ecs_task_finished()
-        self.ecs = self.manager.get_ecs(self.ecs)
+        self.ecs = self.manager.get_ecs(self.ecs.id)
         self.assert_ecs_is_active()
         LOG.info('start success', ecs=self.ecs.id)
 
@@ -160,6 +173,26 @@ class EcsAttachInterfaceLoopTest(base.EcsActionTestBase):
         self.assert_ecs_has_no_interfaces([port.id])
         return port.id
 
+    def _create_ports(self, net_ids) -> list[model.Port]:
+        pools = [resource_pool.get_port_pool(self.manager, net_id)
+                 for net_id in net_ids]
+        if not all(pools):
+            return self.create_ports(net_ids)
+        return [pool.acquire() for pool in pools]
+
+    def _delete_ports(self, ports: list[model.Port]):
+        deleting = []
+        for port in ports:
+            pool = resource_pool.get_port_pool(self.manager, port.network_id)
+            if pool:
+                LOG.debug('release port {}', port.id, ecs=self.ecs.id)
+                pool.release(port)
+            else:
+                deleting.append(port.id)
+        if deleting:
+            LOG.debug('delete ports {}', deleting, ecs=self.ecs.id)
+            self.manager.delete_ports(deleting)
+
     def start(self):
         if NETWORKS.is_empty():
             raise exceptions.SkipActionException('networks is empty')
@@ -171,28 +204,21 @@ class EcsAttachInterfaceLoopTest(base.EcsActionTestBase):
             next(NETWORKS)
             for _ in range(CONF.ecs_test.attach_interface_nums_each_time)
         ]
-        self.created_ports = self.create_ports(
-            net_ids, workers=CONF.ecs_test.attach_interface_loop_workers)
-
-        with futures.ThreadPoolExecutor(
-            max_workers=CONF.ecs_test.attach_interface_loop_workers
-        ) as pool:
-            results = pool.map(self._attach_interface, self.created_ports)
-            for result in results:
-                LOG.info('attached interface {}', result, ecs=self.ecs.id)
+        self.created_ports = self._create_ports(net_ids)
+
+        for result in utils.run_threads(
+                self._attach_interface, self.created_ports,
+                max_workers=CONF.ecs_test.attach_interface_loop_workers):
+            LOG.info('attached interface {}', result, ecs=self.ecs.id)
         self.guest_must_have_all_ipaddress()
 
-        with futures.ThreadPoolExecutor(
-            max_workers=CONF.ecs_test.attach_interface_loop_workers
-        ) as pool:
-            results = pool.map(self._deattach_interface, self.attached_ports)
-            for result in results:
-                LOG.info('detached interface {}', result, ecs=self.ecs.id)
+        for result in utils.run_threads(
+                self._deattach_interface, self.attached_ports,
+                max_workers=CONF.ecs_test.attach_interface_loop_workers):
+            LOG.info('detached interface {}', result, ecs=self.ecs.id)
         self.wait_for_ecs_task_finished()
 
-        for port in self.created_ports:
-            LOG.debug('delete port {}', port.id, ecs=self.ecs.id)
-            self.manager.delete_port(port.id)
+        self._delete_ports(self.created_ports)
 
 
 class EcsAttachVolumeTest(base.EcsActionTestBase):
@@ -246,16 +272,25 @@ class EcsAttachVolumeLoopTest(base.EcsActionTestBase):
         self.wait_volume_is_available(volume)
         return volume.id
 
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.volume_pool = None
+
     def start(self):
-        self.created_volumes = self.create_volumes(
-            10, num=CONF.ecs_test.attach_volume_nums_each_time)
-
-        with futures.ThreadPoolExecutor(
-            max_workers=CONF.ecs_test.attach_volume_loop_workers
-        ) as pool:
-            results = pool.map(self._attach_volume, self.created_volumes)
-            for result in results:
-                LOG.info("attached volume {}", result, ecs=self.ecs.id)
+        self.volume_pool = resource_pool.get_volume_pool(self.manager, 10)
+        if self.volume_pool:
+            self.created_volumes = [
+                self.volume_pool.acquire()
+                for _ in range(CONF.ecs_test.attach_volume_nums_each_time)
+            ]
+        else:
+            self.created_volumes = self.create_volumes(
+                10, num=CONF.ecs_test.attach_volume_nums_each_time)
+
+        for result in utils.run_threads(
+                self._attach_volume, self.created_volumes,
+                max_workers=CONF.ecs_test.attach_volume_loop_workers):
+            LOG.info("attached volume {}", result, ecs=self.ecs.id)
         self.guest_must_have_all_block()
 
         LOG.debug('sleep {} seconds before detach volume',
@@ -263,22 +298,24 @@ class EcsAttachVolumeLoopTest(base.EcsActionTestBase):
                   ecs=self.ecs.id)
         time.sleep(CONF.ecs_test.device_toggle_min_interval)
 
-        with futures.ThreadPoolExecutor(
-            max_workers=CONF.ecs_test.attach_volume_loop_workers
-        ) as pool:
-            results = pool.map(self._detach_volume, self.created_volumes)
-            for result in results:
-                LOG.info("detached volume {}", result, ecs=self.ecs.id)
+        for result in utils.run_threads(
+                self._detach_volume, self.created_volumes,
+                max_workers=CONF.ecs_test.attach_volume_loop_workers):
+            LOG.info("detached volume {}", result, ecs=self.ecs.id)
         self.guest_must_have_all_block()
 
     def tear_down(self):
-        with futures.ThreadPoolExecutor(
-            max_workers=CONF.ecs_test.attach_volume_loop_workers
-        ) as pool:
-            results = pool.map(self.manager.delete_volume,
-                               self.created_volumes)
-            for result in results:
-                LOG.debug("deleted volume {}", result, ecs=self.ecs.id)
+        if self.volume_pool:
+            for volume in self.created_volumes:
+                self.volume_pool.release(volume)
+            super().tear_down()
+            return
+        for result in utils.run_threads(
+                self.manager.delete_volume, self.created_volumes,
+                max_workers=CONF.ecs_test.attach_volume_loop_workers):
+            LOG.debug("deleted volume {}", result, ecs=self.ecs.id)
+        for volume in self.created_volumes:
+            self.wait_volume_deleted(volume)
         super().tear_down()
 
 
@@ -287,10 +324,13 @@ class EcsLiveMigrateTest(base.EcsActionTestBase):
     def start(self):
         src_host = self.ecs.host
         LOG.info('source host is {}', src_host, ecs=self.ecs.id)
-        self.manager.live_migrate_ecs(self.ecs)
-        LOG.info('live migrating ...', ecs=self.ecs.id)
+        target_host = quarantine.migration_target(src_host)
+        self.manager.live_migrate_ecs(self.ecs, host=target_host)
+        LOG.info('live migrating to {} ...', target_host or 'any host',
+                 ecs=self.ecs.id)
 
-        self.wait_for_ecs_task_finished(show_progress=True)
+        self.wait_for_ecs_task_finished(show_progress=True,
+                                        wait_name='ecs_migrated')
         self.assert_ecs_is_not_error()
         self.assert_ecs_host_is_not(src_host)
         self.wait_ecs_qga_connected()
@@ -301,10 +341,13 @@ class EcsMigrateTest(base.EcsActionTestBase):
     def start(self):
         src_host = self.ecs.host
         LOG.info('source host is {}', src_host, ecs=self.ecs.id)
-        self.manager.migrate_ecs(self.ecs)
-        LOG.info('migrating ...', ecs=self.ecs.id)
+        target_host = quarantine.migration_target(src_host)
+        self.manager.migrate_ecs(self.ecs, host=target_host)
+        LOG.info('migrating to {} ...', target_host or 'any host',
+                 ecs=self.ecs.id)
 
-        self.wait_for_ecs_task_finished(show_progress=True)
+        self.wait_for_ecs_task_finished(show_progress=True,
+                                        wait_name='ecs_migrated')
         self.assert_ecs_is_not_error()
         self.assert_ecs_host_is_not(src_host)
         self.wait_ecs_qga_connected()
@@ -336,8 +379,12 @@ class EcsExtendVolumeTest(base.EcsActionTestBase):
             device_name = volumes[-1].device
             volume = self.manager.get_volume(volumes[-1].volumeId)
         else:
-            LOG.info('creating volume ...', ecs=self.ecs.id)
-            self.create_volumes(10)
+            volume_pool = resource_pool.get_volume_pool(self.manager, 10)
+            if volume_pool:
+                self.created_volumes = [volume_pool.acquire()]
+            else:
+                LOG.info('creating volume ...', ecs=self.ecs.id)
+                self.created_volumes = self.create_volumes(10)
             LOG.info('attaching volume ...', ecs=self.ecs.id)
             self.manager.attach_volume(self.ecs, self.created_volumes[0].id)
             self.wait_for_ecs_task_finished()
@@ -354,6 +401,21 @@ class EcsExtendVolumeTest(base.EcsActionTestBase):
         self.wait_for_ecs_task_finished()
         self.guest_block_size_must_be(device_name, f'{new_size}G')
 
+    def tear_down(self):
+        # the size of the volume is changed, it's deleted rather than put
+        # back to the pool
+        for volume in self.created_volumes:
+            self.manager.detach_volume(self.ecs, volume.id)
+            LOG.info('detaching volume {}', volume.id, ecs=self.ecs.id)
+            self.wait_for_ecs_task_finished()
+            self.wait_volume_is_available(volume)
+
+        for volume in self.created_volumes:
+            self.manager.delete_volume(volume)
+            LOG.info('deleting volume {}', volume.id, ecs=self.ecs.id)
+        for volume in self.created_volumes:
+            self.wait_volume_deleted(volume)
+
 
 class EcsRebuildTest(base.EcsActionTestBase):
 
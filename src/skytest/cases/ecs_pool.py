@@ -0,0 +1,200 @@
+"""
+ECS pool: create the ECS up front and lease them to the scenarios
+
+The scenarios run the actions (without create) with a leased ECS. The ECS
+is checked before and after each lease, it's recovered to ACTIVE if it's
+stopped, paused or shelved, and it's removed from the pool if it's still
+unhealthy. All ECS are deleted at the end of the test.
+"""
+from concurrent import futures
+import multiprocessing
+import queue
+import time
+
+from skytest.common import conf
+from skytest.common import exceptions
+from skytest.common import log
+from skytest.common import model
+from skytest.common import store
+from skytest.common import utils
+from skytest.managers import base as base_manager
+
+from . import base
+from . import ecs_actions
+from . import placement
+from . import quarantine
+from . import resource_pool
+from . import scenario
+from . import workload
+
+CONF = conf.CONF
+LOG = log.getLogger()
+
+# the actions to recover the ECS to ACTIVE
+RECOVER_ACTIONS = {workload.STOPPED: 'start', workload.PAUSED: 'unpause',
+                   workload.SHELVED: 'unshelve'}
+
+# the ids of idle ECS and the number of healthy ECS, see init_pool
+POOL: multiprocessing.Queue = None
+HEALTHY = None
+
+
+def init_pool(pool, healthy):
+    """Initializer of the worker processes"""
+    global POOL, HEALTHY
+
+    POOL, HEALTHY = pool, healthy
+
+
+def check_health(manager: base_manager.BaseManager, ecs_id) -> model.ECS:
+    """Return the ECS if it's ACTIVE or recovered to ACTIVE, or None"""
+    try:
+        job = base.EcsActionTestBase(manager.get_ecs(ecs_id), manager)
+        job.wait_for_ecs_task_finished()
+        action = RECOVER_ACTIONS.get(workload.get_state(job.ecs))
+        if action:
+            LOG.info('recover ecs with {}', action, ecs=ecs_id)
+            job = ecs_actions.VM_TEST_SCENARIOS[action](job.ecs, manager)
+            job.run()
+    except Exception as e:
+        LOG.warning('check health failed: {}', e, ecs=ecs_id)
+        return None
+    if quarantine.is_quarantined(job.ecs.host):
+        LOG.warning('host {} is quarantined', job.ecs.host, ecs=ecs_id)
+        return None
+    if job.ecs.is_active() and not job.ecs.has_task():
+        return job.ecs
+    return None
+
+
+def _remove(ecs_id):
+    with HEALTHY.get_lock():
+        HEALTHY.value -= 1
+    LOG.warning('ecs is unhealthy, removed from pool, {} left',
+                HEALTHY.value, ecs=ecs_id)
+
+
+def lease(manager: base_manager.BaseManager) -> model.ECS:
+    """Get a healthy ECS from the pool"""
+    deadline = time.time() + CONF.ecs_test.ecs_pool_lease_timeout
+    while HEALTHY.value > 0 and time.time() < deadline:
+        try:
+            ecs_id = POOL.get(timeout=1)
+        except queue.Empty:
+            continue
+        ecs = check_health(manager, ecs_id)
+        if ecs:
+            return ecs
+        _remove(ecs_id)
+    raise exceptions.NoHealthyEcs(CONF.ecs_test.ecs_pool_lease_timeout)
+
+
+def do_test_leased(index) -> model.ScenarioResult:
+    manager = base_manager.get_manager()
+    rng = scenario.scenario_rng(index)
+    actions = scenario.parse_test_actions(rng=rng, require_create=False)
+    try:
+        ecs = lease(manager)
+    except exceptions.NoHealthyEcs as e:
+        LOG.error('{}', e)
+        return model.ScenarioResult(ok=False, error=str(e),
+                                    started_at=time.time())
+
+    test_task = scenario.ECSScenarioTest(actions, mgr=manager,
+                                         ecs_id=ecs.id, index=index, rng=rng)
+    try:
+        test_task.run(pre_check=False)
+    except Exception as e:
+        LOG.error('test failed, {}', e)
+    finally:
+        if check_health(manager, ecs.id):
+            POOL.put(ecs.id)
+        else:
+            _remove(ecs.id)
+    return test_task.result
+
+
+def _create(manager: base_manager.BaseManager, index) -> model.ECS:
+    job = ecs_actions.VM_TEST_SCENARIOS['create'](None, manager)
+    try:
+        with placement.use(placement.plan(index)):
+            job.run()
+    except Exception as e:
+        LOG.error('create ecs failed: {}', e)
+        if job.ecs:
+            _delete(manager, job.ecs)
+        return None
+    return job.ecs
+
+
+def _delete(manager: base_manager.BaseManager, ecs: model.ECS):
+    job = ecs_actions.VM_TEST_SCENARIOS['create'](ecs, manager)
+    try:
+        job.tear_down()
+    except Exception as e:
+        LOG.warning('delete ecs failed: {}', e, ecs=ecs.id)
+
+
+def test_pool():
+    ecs_actions.init()
+    actions = scenario.parse_test_actions(require_create=False)
+    if 'create' in actions:
+        raise exceptions.InvalidConfig(
+            reason="action 'create' is not supported by pool mode")
+    if CONF.ecs_test.barrier_action:
+        LOG.warning('barrier_action is ignored by pool mode')
+    test_checker = scenario.ECSScenarioTest(actions)
+    test_checker.before_run()
+    manager = test_checker.manager
+    placement.init(manager)
+
+    size = CONF.ecs_test.ecs_pool_size or CONF.ecs_test.worker
+    LOG.info('==== Create {} ECS for the pool ====', size)
+    with futures.ThreadPoolExecutor(
+            max_workers=CONF.ecs_test.worker) as executor:
+        created = [ecs for ecs in executor.map(
+            lambda index: _create(manager, index), range(size)) if ecs]
+    LOG.info('{}/{} ECS are created for the pool', len(created), size)
+
+    pool = multiprocessing.Queue()
+    for ecs in created:
+        pool.put(ecs.id)
+    healthy = multiprocessing.Value('i', len(created))
+    init_pool(pool, healthy)
+
+    ng = 0
+    host_report = placement.HostReport()
+    monitor = quarantine.Monitor()
+    done = 0
+    if CONF.ecs_test.worker == 1:
+        results = (do_test_leased(index)
+                   for index in range(CONF.ecs_test.total))
+    else:
+        results = utils.run_processes(
+            do_test_leased, maps=range(CONF.ecs_test.total),
+            max_workers=CONF.ecs_test.worker,
+            initializer=init_pool, initargs=(pool, healthy))
+    try:
+        for result in results:
+            store.save(result)
+            host_report.add(result)
+            done += 1
+            if not result.ok:
+                ng += 1
+            if monitor.check(host_report):
+                break
+    finally:
+        # stop the pending scenarios and wait the running ones, which may
+        # still use the ECS of the pool
+        results.close()
+        resource_pool.drain_all()
+        LOG.info('==== Delete {} ECS of the pool ====', len(created))
+        with futures.ThreadPoolExecutor(
+                max_workers=CONF.ecs_test.worker) as executor:
+            executor.map(lambda ecs: _delete(manager, ecs), created)
+
+    host_report.report()
+    monitor.report(not_run=CONF.ecs_test.total - done)
+    utils.report_results(done, ng)
+    if ng or monitor.stopped:
+        raise exceptions.TestFailed()
@@ -0,0 +1,190 @@
+"""
+Spread the scenarios across the compute hosts, networks and flavors
+
+The compute hosts are discovered by the parent process before the workers
+are forked, and the placement of a scenario is chosen by its index, so the
+scenarios of all workers are spread evenly, rather than every worker
+booting with the same host, network and flavor.
+"""
+import contextlib
+import contextvars
+from dataclasses import dataclass
+
+from skytest.common import conf
+from skytest.common import exceptions
+from skytest.common import log
+from skytest.common import model
+from skytest.common import stats
+from skytest.managers import base as base_manager
+
+from . import quarantine
+
+CONF = conf.CONF
+LOG = log.getLogger()
+
+HOST = 'host'
+NETWORK = 'network'
+FLAVOR = 'flavor'
+SPREADS = [HOST, NETWORK, FLAVOR]
+
+
+@dataclass
+class Placement:
+    # the availability zone with host, e.g. nova:host1
+    az: str = None
+    network: str = None
+    flavor: str = None
+    # every host to spread is quarantined, the ECS can't be booted
+    no_host: bool = False
+
+
+class Planner(object):
+
+    def __init__(self, hosts: list[str], networks: list[str],
+                 flavors: list[str]) -> None:
+        self.hosts = hosts
+        self.networks = networks
+        self.flavors = flavors
+
+    def plan(self, index) -> Placement:
+        """Round robin each dimension by the index of the scenario
+
+        The quarantined hosts are skipped, no_host is set if all of them are
+        quarantined rather than leaving the host to the scheduler.
+        """
+
+        def _choose(items):
+            return items[index % len(items)] if items else None
+
+        hosts = [az for az in self.hosts
+                 if not quarantine.is_quarantined(az.split(':', 1)[1])]
+        if self.hosts and not hosts:
+            LOG.error('all of the {} compute host(s) to spread are '
+                      'quarantined', len(self.hosts))
+        return Placement(az=_choose(hosts),
+                         network=_choose(self.networks),
+                         flavor=_choose(self.flavors),
+                         no_host=bool(self.hosts and not hosts))
+
+
+PLANNER: Planner = None
+_PLACEMENT = contextvars.ContextVar('placement', default=None)
+
+
+def parse_boot_az() -> tuple[str, str]:
+    """Return (az, host) of boot_az"""
+    if not CONF.openstack.boot_az:
+        return None, None
+    if ':' in CONF.openstack.boot_az:
+        return tuple(CONF.openstack.boot_az.split(':', 1))
+    return CONF.openstack.boot_az, None
+
+
+def init(manager: base_manager.BaseManager):
+    """Make the plan of [ecs_test] spread, before the workers are forked"""
+    global PLANNER
+
+    spread = CONF.ecs_test.spread or []
+    for item in spread:
+        if item not in SPREADS:
+            raise exceptions.InvalidConfig(
+                reason=f'spread {item} is invalid, choose from {SPREADS}')
+    hosts = []
+    if HOST in spread:
+        az, host = parse_boot_az()
+        services = manager.get_available_services(host=host, zone=az,
+                                                  binary='nova-compute')
+        hosts = sorted(f'{service.zone}:{service.host}'
+                       for service in services)
+        if not hosts:
+            raise exceptions.NotAvailableServices(
+                reason='no available compute service to spread')
+    if quarantine.enabled():
+        # the migrations may target all hosts rather than those of boot_az
+        quarantine.init(sorted(
+            service.host for service in
+            manager.get_available_services(binary='nova-compute')),
+            spread=[az.split(':', 1)[1] for az in hosts])
+    PLANNER = Planner(hosts,
+                      CONF.openstack.networks if NETWORK in spread else [],
+                      CONF.openstack.flavors if FLAVOR in spread else [])
+    if spread:
+        LOG.info('spread scenarios across {} host(s), {} network(s), '
+                 '{} flavor(s)', len(PLANNER.hosts), len(PLANNER.networks),
+                 len(PLANNER.flavors))
+
+
+def plan(index) -> Placement:
+    if not PLANNER or index is None:
+        return None
+    return PLANNER.plan(index)
+
+
+@contextlib.contextmanager
+def use(placement: Placement):
+    """Boot the ECS of the actions in this context with the placement"""
+    token = _PLACEMENT.set(placement)
+    try:
+        yield placement
+    finally:
+        _PLACEMENT.reset(token)
+
+
+def current() -> Placement:
+    return _PLACEMENT.get() or Placement()
+
+
+def scenario_host(result: model.ScenarioResult) -> str:
+    """The last known host of the ECS of the scenario"""
+    for action in reversed(result.actions):
+        if action.host:
+            return action.host
+    return ''
+
+
+class HostReport(object):
+    """Break down the results of the scenarios by compute host"""
+
+    def __init__(self) -> None:
+        # host -> [scenarios, failed scenarios]
+        self.scenarios = {}
+        # (action, host) -> [seconds, ...]
+        self.elapsed = {}
+        # (action, host) -> failed count
+        self.failed = {}
+
+    def add(self, result: model.ScenarioResult):
+        host = scenario_host(result) or '-'
+        counts = self.scenarios.setdefault(host, [0, 0])
+        counts[0] += 1
+        if not result.ok:
+            counts[1] += 1
+        for action in result.actions:
+            if action.skipped:
+                continue
+            key = (action.action, action.host or '-')
+            self.elapsed.setdefault(key, []).append(action.elapsed)
+            if not action.ok:
+                self.failed[key] = self.failed.get(key, 0) + 1
+
+    def report(self):
+        import prettytable
+
+        if not self.scenarios:
+            return
+        pt = prettytable.PrettyTable(['Host', 'Scenarios', 'NG'])
+        pt.align['Host'] = 'l'
+        for host, (total, ng) in sorted(self.scenarios.items()):
+            pt.add_row([host, total, ng])
+        LOG.info('scenarios by compute host:\n{}', pt)
+
+        pt = prettytable.PrettyTable(['Action @ Host', 'Count', 'Failed',
+                                      'P50(s)', 'P95(s)', 'Max(s)'])
+        pt.align['Action @ Host'] = 'l'
+        for key, values in sorted(self.elapsed.items()):
+            pt.add_row([' @ '.join(key), len(values),
+                        self.failed.get(key, 0),
+                        f'{stats.percentile(values, 50):.2f}',
+                        f'{stats.percentile(values, 95):.2f}',
+                        f'{max(values):.2f}'])
+        LOG.info('action latency by compute host:\n{}', pt)
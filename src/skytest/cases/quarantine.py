@@ -0,0 +1,158 @@
+"""
+Quarantine the slow or failing compute hosts during a run
+
+The parent process checks the failure rate and the action latency of each
+compute host with the results of the scenarios. A host which crosses the
+[quarantine] thresholds is excluded from the targeted boots (spread host)
+and from the target hosts of migrations. The flags of the hosts are
+shared memory, which is created before the workers are forked.
+
+The run goes on with the healthy hosts, or stops early if on_quarantine is
+stop, no host is healthy or all of the hosts to spread are quarantined.
+"""
+import multiprocessing
+import random
+
+from skytest.common import conf
+from skytest.common import exceptions
+from skytest.common import log
+from skytest.common import stats
+from skytest.common import utils
+
+CONF = conf.CONF
+LOG = log.getLogger()
+
+CONTINUE = 'continue'
+STOP = 'stop'
+
+# the compute hosts and their quarantine flags, see init
+HOSTS: list[str] = []
+FLAGS = None
+# the compute hosts that the scenarios are spread across
+SPREAD: list[str] = []
+
+
+def enabled() -> bool:
+    return bool(float(CONF.quarantine.failure_rate) or
+                CONF.quarantine.action_p95)
+
+
+def parse_action_p95() -> dict:
+    thresholds = {}
+    for item in CONF.quarantine.action_p95:
+        action, _, seconds = item.partition(':')
+        if not utils.is_uint(seconds):
+            raise exceptions.InvalidConfig(
+                reason=f'quarantine action_p95 {item} is invalid')
+        thresholds[action] = int(seconds)
+    return thresholds
+
+
+def init(hosts: list[str], spread: list[str] = None):
+    """Create the flags of the hosts, before the workers are forked"""
+    global HOSTS, FLAGS, SPREAD
+
+    if CONF.quarantine.on_quarantine not in (CONTINUE, STOP):
+        raise exceptions.InvalidConfig(
+            reason=f'on_quarantine {CONF.quarantine.on_quarantine} is '
+                   f'invalid, choose from {CONTINUE}, {STOP}')
+    parse_action_p95()
+    HOSTS = list(hosts)
+    SPREAD = list(spread or [])
+    FLAGS = multiprocessing.Array('b', len(HOSTS))
+    LOG.info('quarantine is enabled for {} compute host(s)', len(HOSTS))
+
+
+def is_quarantined(host) -> bool:
+    if not FLAGS or host not in HOSTS:
+        return False
+    return bool(FLAGS[HOSTS.index(host)])
+
+
+def quarantined() -> list[str]:
+    return [host for host in HOSTS if is_quarantined(host)]
+
+
+def healthy_hosts() -> list[str]:
+    return [host for host in HOSTS if not is_quarantined(host)]
+
+
+def spread_exhausted() -> bool:
+    """All of the hosts to spread are quarantined, nothing can boot"""
+    return bool(SPREAD) and all(is_quarantined(host) for host in SPREAD)
+
+
+def migration_target(src_host) -> str:
+    """Return a healthy host to migrate to
+
+    None is returned if no host is quarantined, then the target is chosen
+    by the scheduler as before.
+    """
+    if not quarantined():
+        return None
+    candidates = [host for host in healthy_hosts() if host != src_host]
+    if not candidates:
+        raise exceptions.NotAvailableServices(
+            reason='no healthy compute host to migrate to')
+    return random.choice(candidates)
+
+
+class Monitor(object):
+    """Check the thresholds of the hosts with placement.HostReport"""
+
+    def __init__(self) -> None:
+        self.action_p95 = parse_action_p95()
+        # host -> the reasons of quarantine
+        self.reasons: dict[str, list[str]] = {}
+        self.stopped = False
+
+    def _violations(self, report, host, total, ng) -> list[str]:
+        violations = []
+        failure_rate = float(CONF.quarantine.failure_rate)
+        if failure_rate and ng / total > failure_rate:
+            violations.append(f'failure rate {ng / total:.2%} > '
+                              f'{failure_rate:.2%}')
+        for action, threshold in self.action_p95.items():
+            values = report.elapsed.get((action, host)) or []
+            if len(values) < CONF.quarantine.min_samples:
+                continue
+            p95 = stats.percentile(values, 95)
+            if p95 > threshold:
+                violations.append(f'{action} p95 {p95:.2f}s > {threshold}s')
+        return violations
+
+    def check(self, report) -> bool:
+        """Quarantine the hosts crossing the thresholds
+
+        Return True if the run should stop.
+        """
+        if not FLAGS:
+            return False
+        for host, (total, ng) in report.scenarios.items():
+            if host not in HOSTS or is_quarantined(host) or \
+               total < CONF.quarantine.min_samples:
+                continue
+            violations = self._violations(report, host, total, ng)
+            if not violations:
+                continue
+            FLAGS[HOSTS.index(host)] = 1
+            self.reasons[host] = violations
+            LOG.warning('quarantine compute host {}: {}', host,
+                        ', '.join(violations))
+        if self.reasons and (CONF.quarantine.on_quarantine == STOP or
+                             not healthy_hosts() or spread_exhausted()):
+            self.stopped = True
+        return self.stopped
+
+    def report(self, not_run=0):
+        import prettytable
+
+        if not self.reasons:
+            return
+        pt = prettytable.PrettyTable(['Host', 'Reasons'])
+        pt.align = 'l'
+        for host, violations in sorted(self.reasons.items()):
+            pt.add_row([host, ', '.join(violations)])
+        LOG.warning('quarantined compute hosts:\n{}', pt)
+        if self.stopped:
+            LOG.error('stopped early, {} scenario(s) are not run', not_run)
@@ -0,0 +1,229 @@
+"""
+Pre-provisioned ports and volumes which are reused by hotplug actions
+
+The pools are created in each worker process when they are first used,
+filled by background threads, and drained when the process exits.
+"""
+import multiprocessing
+from multiprocessing import util as mp_util
+import os
+import queue
+import threading
+
+from skytest.common import conf
+from skytest.common import exceptions
+from skytest.common import journal
+from skytest.common import log
+from skytest.common import model
+from skytest.common import waiter
+from skytest.managers import base as base_manager
+
+CONF = conf.CONF
+LOG = log.getLogger()
+
+PORT_POOLS = {}
+VOLUME_POOLS = {}
+
+_LOCK = threading.Lock()
+_POOLS_PID = None
+
+
+class ResourcePool(object):
+
+    def __init__(self, name, size, create, delete, is_reusable,
+                 workers=1, wait_deleted=None) -> None:
+        self.name = name
+        self.size = size
+        self._create = create
+        self._delete = delete
+        # wait until the deleted resource is gone, if deleting is async
+        self._wait_deleted = wait_deleted
+        self._is_reusable = is_reusable
+        self._items = queue.Queue()
+        self._lock = threading.Lock()
+        self._filling = 0
+        self._need_fill = threading.Event()
+        self._stopped = threading.Event()
+        self.hits, self.misses, self.recycled = 0, 0, 0
+        self._fillers = [
+            threading.Thread(target=self._fill_loop, daemon=True)
+            for _ in range(max(workers, 1))
+        ]
+        for filler in self._fillers:
+            filler.start()
+        self._need_fill.set()
+
+    def _reserve(self):
+        with self._lock:
+            if self._items.qsize() + self._filling >= self.size:
+                return False
+            self._filling += 1
+            return True
+
+    def _fill_loop(self):
+        while not self._stopped.is_set():
+            if not self._reserve():
+                self._need_fill.clear()
+                self._need_fill.wait(timeout=5)
+                continue
+            try:
+                self._items.put(self._create())
+            except Exception as e:
+                LOG.warning('pool {} create resource failed: {}',
+                            self.name, e)
+                self._stopped.wait(5)
+            finally:
+                with self._lock:
+                    self._filling -= 1
+
+    def acquire(self):
+        """Get a resource from the pool, create it if the pool is empty"""
+        try:
+            item = self._items.get_nowait()
+            self.hits += 1
+        except queue.Empty:
+            self.misses += 1
+            LOG.debug('pool {} is empty, create new resource', self.name)
+            item = self._create()
+        self._need_fill.set()
+        return item
+
+    def release(self, item):
+        """Put the resource back if it's reusable, or delete it"""
+        try:
+            reusable = not self._stopped.is_set() and \
+                self._items.qsize() < self.size and self._is_reusable(item)
+        except Exception as e:
+            LOG.warning('pool {} check {} failed: {}', self.name, item.id, e)
+            reusable = False
+        if reusable:
+            self.recycled += 1
+            self._items.put(item)
+        else:
+            self._delete(item)
+            if self._wait_deleted:
+                self._wait_deleted(item)
+
+    def drain(self):
+        self._stopped.set()
+        self._need_fill.set()
+        for filler in self._fillers:
+            filler.join()
+        deleted = []
+        while not self._items.empty():
+            item = self._items.get_nowait()
+            try:
+                self._delete(item)
+                deleted.append(item)
+            except Exception as e:
+                LOG.warning('pool {} delete {} failed: {}',
+                            self.name, item.id, e)
+        # delete all of them first, then wait
+        for item in deleted if self._wait_deleted else []:
+            try:
+                self._wait_deleted(item)
+            except Exception as e:
+                LOG.warning('pool {} wait {} deleted failed: {}',
+                            self.name, item.id, e)
+        LOG.info('pool {} drained, hits: {}, misses: {}, recycled: {}, '
+                 'deleted: {}', self.name, self.hits, self.misses,
+                 self.recycled, len(deleted))
+
+
+def _register_drain():
+    global _POOLS_PID
+
+    # pools are not shared with the forked process
+    if _POOLS_PID == os.getpid():
+        return
+    PORT_POOLS.clear()
+    VOLUME_POOLS.clear()
+    _POOLS_PID = os.getpid()
+    if multiprocessing.parent_process():
+        mp_util.Finalize(None, drain_all, exitpriority=10)
+
+
+@waiter.waits('volume_available', retry_on=exceptions.VolumeIsNotAvailable,
+              resource=lambda manager, volume: volume.id)
+def _wait_volume_available(manager: base_manager.BaseManager,
+                           volume: model.Volume):
+    volume = manager.get_volume(volume.id)
+    if volume.is_error():
+        raise exceptions.VolumeIsError(volume.id)
+    if not volume.is_available():
+        raise exceptions.VolumeIsNotAvailable(volume.id)
+    return volume
+
+
+@waiter.waits('volume_deleted', retry_on=exceptions.VolumeIsNotDeleted,
+              resource=lambda manager, volume: volume.id)
+def _wait_volume_deleted(manager: base_manager.BaseManager,
+                         volume: model.Volume):
+    try:
+        volume = manager.get_volume(volume.id)
+    except exceptions.VolumeNotFound:
+        # the volume is kept in the journal until it's really deleted
+        journal.record_deleted('volume', volume.id)
+        return
+    if volume.is_error():
+        raise exceptions.VolumeIsError(volume.id)
+    raise exceptions.VolumeIsNotDeleted(volume.id)
+
+
+def get_port_pool(manager: base_manager.BaseManager,
+                  network_id) -> ResourcePool:
+    if CONF.ecs_test.port_pool_size <= 0:
+        return None
+    with _LOCK:
+        _register_drain()
+        if network_id not in PORT_POOLS:
+
+            def _is_reusable(port: model.Port):
+                port = manager.get_port(port.id)
+                return not port.host and not port.is_error()
+
+            PORT_POOLS[network_id] = ResourcePool(
+                f'port-{network_id}', CONF.ecs_test.port_pool_size,
+                lambda: manager.create_port(network_id),
+                lambda port: manager.delete_port(port.id),
+                _is_reusable, workers=CONF.ecs_test.pool_fill_workers)
+        return PORT_POOLS[network_id]
+
+
+def get_volume_pool(manager: base_manager.BaseManager, size,
+                    volume_type=None) -> ResourcePool:
+    if CONF.ecs_test.volume_pool_size <= 0:
+        return None
+    volume_type = volume_type or CONF.openstack.volume_type
+    with _LOCK:
+        _register_drain()
+        key = (size, volume_type)
+        if key not in VOLUME_POOLS:
+
+            def _create():
+                return _wait_volume_available(
+                    manager, manager.create_volume(size_gb=size,
+                                                   volume_type=volume_type))
+
+            def _is_reusable(volume: model.Volume):
+                volume = manager.get_volume(volume.id)
+                return volume.is_available() and volume.size == size
+
+            VOLUME_POOLS[key] = ResourcePool(
+                f'volume-{size}G-{volume_type or "default"}',
+                CONF.ecs_test.volume_pool_size,
+                _create, manager.delete_volume, _is_reusable,
+                workers=CONF.ecs_test.pool_fill_workers,
+                wait_deleted=lambda volume: _wait_volume_deleted(
+                    manager, volume))
+        return VOLUME_POOLS[key]
+
+
+def drain_all():
+    if _POOLS_PID != os.getpid():
+        return
+    with _LOCK:
+        for pool in list(PORT_POOLS.values()) + list(VOLUME_POOLS.values()):
+            pool.drain()
+        PORT_POOLS.clear()
+        VOLUME_POOLS.clear()
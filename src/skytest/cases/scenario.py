@@ -1,29 +1,81 @@
+from concurrent import futures
+import contextlib
+import multiprocessing
 import random
+import threading
 import time
 
+from skytest.common import analyzer
+from skytest.common import checkpoint
 from skytest.common import conf
 from skytest.common import exceptions
 from skytest.common import utils
 from skytest.common import log
+from skytest.common import profiler
+from skytest.common import store
+from skytest.common import timeline
+from skytest.common import waiter
 
 from skytest.common import model
 from skytest.managers import base as base_manager
 
 from . import base
 from . import ecs_actions
+from . import placement
+from . import quarantine
+from . import resource_pool
+from . import workload
 
 CONF = conf.CONF
 LOG = log.getLogger()
 
 VM_TEST_SCENARIOS = ecs_actions.VM_TEST_SCENARIOS
 
+# the barrier shared by all workers, see init_barrier
+BARRIER: threading.Barrier = None
+
+
+def init_barrier(barrier):
+    """Initializer of the worker processes"""
+    global BARRIER
+
+    BARRIER = barrier
+
 
 class ECSScenarioTest(object):
 
-    def __init__(self, actions, mgr=None) -> None:
+    def __init__(self, actions, mgr=None, ecs_id=None, index=None,
+                 progress: checkpoint.Progress = None,
+                 rng: random.Random = None, sleeps: list[float] = None):
         self.actions = actions
         self._manager = mgr
+        # test with the ECS created by others, it's not cleaned up
+        self.ecs_id = ecs_id or CONF.ecs_test.ecs_id
+        # the index of scenario in this run, used by checkpoint
+        self.index = index
+        # resume from the progress of the checkpoint
+        self.progress = progress
+        self.rng = rng or scenario_rng(index)
+        # the host, network and flavor to boot the ECS
+        self.placement = placement.plan(index)
+        # replay the sleeps before the actions of a recorded timeline
+        self.replay_sleeps = sleeps
+        # the generated actions are appended to self.actions
+        self.workload = None if sleeps is not None else \
+            workload.Workload.from_conf(rng=self.rng)
+        # the number of the generated actions, which are the last of
+        # self.actions
+        self.generated = progress.generated if progress else 0
+        # the seconds slept before each action, recorded to the timeline
+        self.sleeps: list[float] = []
         self.ecs: model.ECS = None
+        self.result = model.ScenarioResult()
+        self._barrier_passed = False
+        # the actions, the results and the ECS saved to the checkpoint,
+        # and when they are saved
+        self._checkpointed = (len(progress.actions), len(progress.results),
+                              progress.ecs, time.monotonic()) \
+            if progress else (0, 0, '', time.monotonic())
 
         self._actions_interval_range = None
         if CONF.ecs_test.actions_interval:
@@ -58,12 +110,7 @@ class ECSScenarioTest(object):
             raise exceptions.InvalidImage(reason=e)
 
     def _check_services(self):
-        az, host = None, None
-        if CONF.openstack.boot_az:
-            if ':' in CONF.openstack.boot_az:
-                az, host = CONF.openstack.boot_az.split(':')
-            else:
-                az = CONF.openstack.boot_az
+        az, host = placement.parse_boot_az()
         services = self.manager.get_available_services(host=host, zone=az,
                                                        binary='nova-compute')
         if not services:
@@ -74,7 +121,8 @@ class ECSScenarioTest(object):
                 raise exceptions.NotAvailableServices(
                     reason=f'no available compute service for az "{az}"')
         elif len(services) == 1:
-            if 'migrate' in self.actions:
+            if 'migrate' in [name for action in self.actions
+                             for name in split_group(action)]:
                 raise exceptions.NotAvailableServices(
                     reason='migrate test require available services >= 2')
         else:
@@ -98,131 +146,504 @@ class ECSScenarioTest(object):
             f'{ac["word"]}({ac["count"]})'
             for ac in utils.count_repeat_words(self.actions)
         ]
-        LOG.info('test actions: {}', ' -> '.join(action_count))
+        LOG.info('test actions: {}{}', ' -> '.join(action_count),
+                 self.workload and ' -> workload' or '')
 
-        if CONF.ecs_test.ecs_id and 'create' not in self.actions[:1]:
-            LOG.warning('test with ecs {}', CONF.ecs_test.ecs_id)
-            self.ecs = self.manager.get_ecs(CONF.ecs_test.ecs_id)
+        jobs: list[base.EcsActionTestBase] = []
+        start = 0
+        if self.progress and self.progress.ecs:
+            start = self.progress.next_action
+            self.sleeps = [0] * start
+            LOG.warning('resume from action {}', start + 1,
+                        ecs=self.progress.ecs)
+            self.ecs = self.manager.get_ecs(self.progress.ecs)
+            job = base.EcsActionTestBase(self.ecs, self.manager)
+            job.wait_for_ecs_task_finished()
+            self.ecs = job.ecs
+            self.result.actions.extend(self.progress.results)
+            # only the ECS can be cleaned up, the resources of the other
+            # actions before resuming are lost
+            if 'create' in self.actions[:start]:
+                jobs.append(VM_TEST_SCENARIOS['create'](self.ecs,
+                                                        self.manager))
+        elif self.ecs_id and 'create' not in self.actions[:1]:
+            LOG.warning('test with ecs {}', self.ecs_id)
+            self.ecs = self.manager.get_ecs(self.ecs_id)
         else:
             self.ecs = None
 
-        jobs: list[base.EcsActionTestBase] = []
-        for i, action in enumerate(self.actions):
+        for i, action, generated in self._iter_actions(start):
+            interval = i > start and self._get_actions_interval(i) or 0
+            self.sleeps.append(interval)
+            if interval:
+                LOG.info('sleep {} seconds', interval, ecs=self.ecs.id)
+                time.sleep(interval)
             LOG.info('== Test {}', action,
                      ecs='{:36}'.format(self.ecs and self.ecs.id or '-'))
-            test_cls = ecs_actions.VM_TEST_SCENARIOS.get(action)
-            job: base.EcsActionTestBase = test_cls(self.ecs, self.manager)
-            try:
-                job.run()
-                self.ecs = job.ecs
-            except exceptions.SkipActionException as e:
-                LOG.warning('skip test action "{}": {}', action, e,
-                            ecs=(self.ecs and self.ecs.id))
-            except (AssertionError, exceptions.EcsCloudAPIError) as e:
-                raise exceptions.EcsTestFailed(
-                    ecs=self.ecs and self.ecs.id or '-',
-                    action=action, reason=f'{str(e)}')
-            except Exception as e:
-                LOG.exception(e)
-                raise exceptions.EcsTestFailed(
-                    ecs=self.ecs and self.ecs.id or '-',
-                    action=action, reason=f'{str(e)}')
+            group = split_group(action)
+            if CONF.ecs_test.barrier_action in group:
+                self._wait_barrier()
+            if len(group) == 1:
+                job = self._run_action(action, self.ecs)
+                if job:
+                    self.ecs = job.ecs
+                new_jobs = job and [job] or []
             else:
-                LOG.success('== Test {} is ok', action,
-                            ecs=(self.ecs and self.ecs.id))
-                jobs.append(job)
-
-            if i < len(self.actions) - 1:
-                interval = self._get_actions_interval()
-                if interval:
-                    LOG.info('sleep {} seconds', interval, ecs=self.ecs.id)
-                    time.sleep(interval)
+                new_jobs = self._run_group(group)
+            if generated:
+                # the workload may run for a long time, release the
+                # resources of the generated actions at once
+                for job in reversed(new_jobs):
+                    job.tear_down()
+            else:
+                jobs.extend(new_jobs)
+            self._save_progress(i + 1)
 
         LOG.info('==== Tear Down ECS action test ====')
         for job in reversed(jobs):
             job.tear_down()
 
-    def _get_actions_interval(self):
+    def _iter_actions(self, start):
+        """Yield (index, action, generated) of the actions and the
+        workload"""
+        configured = len(self.actions) - self.generated
+        for i, action in enumerate(self.actions[start:], start=start):
+            yield i, action, i >= configured
+        if not self.workload:
+            return
+        for action in self.workload.iter_actions(
+                state=workload.get_state(self.ecs), done=self.generated):
+            self.actions.append(action)
+            self.generated += 1
+            yield len(self.actions) - 1, action, True
+
+    def _run_action(self, action, ecs: model.ECS) -> base.EcsActionTestBase:
+        """Run the action with the ECS, return the job if it's not skipped
+
+        It's called by multiple threads for an action group, so the job
+        is returned rather than updating self.ecs.
+        """
+        test_cls = ecs_actions.VM_TEST_SCENARIOS.get(action)
+        job: base.EcsActionTestBase = test_cls(ecs, self.manager)
+        action_result = model.ActionResult(action, started_at=time.time())
+        self.result.actions.append(action_result)
+        wait_stats = waiter.WaitStats()
+        result_ecs = ecs
+        try:
+            with log.contextualize(action=action), \
+                    placement.use(self.placement), \
+                    waiter.action(action) as wait_stats:
+                job.run()
+            result_ecs = job.ecs
+        except exceptions.SkipActionException as e:
+            action_result.skipped = True
+            LOG.warning('skip test action "{}": {}', action, e,
+                        ecs=(ecs and ecs.id))
+            return None
+        except (AssertionError, exceptions.EcsCloudAPIError) as e:
+            action_result.ok = False
+            result_ecs = job.ecs or ecs
+            raise exceptions.EcsTestFailed(
+                ecs=ecs and ecs.id or '-', action=action, reason=f'{str(e)}')
+        except Exception as e:
+            action_result.ok = False
+            result_ecs = job.ecs or ecs
+            LOG.exception(e)
+            raise exceptions.EcsTestFailed(
+                ecs=ecs and ecs.id or '-', action=action, reason=f'{str(e)}')
+        else:
+            LOG.success('== Test {} is ok', action,
+                        ecs=(result_ecs and result_ecs.id))
+        finally:
+            action_result.elapsed = time.time() - action_result.started_at
+            action_result.ecs = result_ecs and result_ecs.id or ''
+            action_result.host = result_ecs and result_ecs.host or ''
+            action_result.polls = wait_stats.polls
+            action_result.waited = wait_stats.waited
+            LOG.debug('action {}: {} poll(s), waited {:.2f} seconds',
+                      action, wait_stats.polls, wait_stats.waited,
+                      ecs=action_result.ecs or '-')
+        return job
+
+    def _run_group(self, group: list[str]) -> list[base.EcsActionTestBase]:
+        """Run the actions of the group with the ECS at the same time
+
+        All actions are joined before the next action, the first failure
+        is raised after that.
+        """
+        jobs, errors = [], []
+        with futures.ThreadPoolExecutor(max_workers=len(group)) as executor:
+            tasks = [executor.submit(self._run_action, action, self.ecs)
+                     for action in group]
+            for task in tasks:
+                try:
+                    job = task.result()
+                except exceptions.EcsTestFailed as e:
+                    errors.append(e)
+                else:
+                    if job:
+                        jobs.append(job)
+        if jobs:
+            # the actions changed the ECS concurrently
+            self.ecs = self.manager.get_ecs(self.ecs.id)
+        if errors:
+            raise errors[0]
+        return jobs
+
+    def _save_progress(self, next_action):
+        """Save the delta of the progress every checkpoint_interval seconds
+        or when the ECS is changed"""
+        if self.index is None or not checkpoint.enabled():
+            return
+        saved_actions, saved_results, saved_ecs, saved_at = \
+            self._checkpointed
+        ecs_id = self.ecs and self.ecs.id or ''
+        if ecs_id == saved_ecs and time.monotonic() - saved_at < \
+           CONF.ecs_test.checkpoint_interval:
+            return
+        checkpoint.save_progress(checkpoint.Progress(
+            self.index, ecs=ecs_id, actions=self.actions[saved_actions:],
+            next_action=next_action,
+            results=self.result.actions[saved_results:],
+            generated=self.generated))
+        self._checkpointed = (len(self.actions), len(self.result.actions),
+                              ecs_id, time.monotonic())
+
+    def _get_actions_interval(self, index):
+        if self.replay_sleeps is not None:
+            return index < len(self.replay_sleeps) and \
+                self.replay_sleeps[index] or None
         if not self._actions_interval_range:
             return None
-        return random.randint(self._actions_interval_range[0],
-                              self._actions_interval_range[1])
+        return self.rng.randint(self._actions_interval_range[0],
+                                self._actions_interval_range[1])
+
+    def _wait_barrier(self):
+        """Wait all workers to release the barrier action together
+
+        Every scenario waits the barrier exactly once, even if it failed
+        before the barrier action, otherwise the others will be blocked.
+        """
+        if not BARRIER or self._barrier_passed:
+            return
+        self._barrier_passed = True
+        LOG.info('waiting {} workers to release {}', BARRIER.parties,
+                 CONF.ecs_test.barrier_action,
+                 ecs=self.ecs and self.ecs.id or '-')
+        try:
+            BARRIER.wait(timeout=CONF.ecs_test.barrier_timeout)
+        except threading.BrokenBarrierError:
+            LOG.warning('barrier is broken, release {} without waiting',
+                        CONF.ecs_test.barrier_action,
+                        ecs=self.ecs and self.ecs.id or '-')
+            return
+        LOG.info('released {} at {}', CONF.ecs_test.barrier_action,
+                 time.time(), ecs=self.ecs and self.ecs.id or '-')
 
     def _cleanup(self):
-        if not CONF.ecs_test.ecs_id and self.ecs and \
+        if not self.ecs_id and self.ecs and \
            CONF.ecs_test.cleanup_error_vms:
             LOG.info('cleanup ...', ecs=self.ecs.id)
-            self.manager.delete_ecs(self.ecs)
+            try:
+                self.manager.delete_ecs(self.ecs)
+            except exceptions.ECSNotFound:
+                LOG.warning('ecs is already deleted', ecs=self.ecs.id)
 
     def run(self, pre_check=True):
+        self.result.started_at = time.time()
         try:
             self._test_actions(pre_check=pre_check)
-        except exceptions.EcsTestFailed:
-            self._cleanup()
+        except Exception as e:
+            self.result.ok = False
+            self.result.error = str(e)
+            if isinstance(e, exceptions.EcsTestFailed):
+                self._cleanup()
             raise
         else:
             LOG.success('==== test success ====', ecs=self.ecs.id)
         finally:
+            self._wait_barrier()
+            self.result.elapsed = time.time() - self.result.started_at
+            self.result.ecs = self.ecs and self.ecs.id or ''
+            timeline.record(self.index, self.result.started_at,
+                            self.actions, self.sleeps)
             if self.ecs:
-                self.manager.report_ecs_actions(self.ecs)
+                events = self.manager.get_ecs_events(self.ecs)
+                self.manager.report_ecs_actions(self.ecs, events=events)
+                if CONF.results.save_events or CONF.results.analyze_events:
+                    self.result.events = events
+
 
+def scenario_rng(index=None) -> random.Random:
+    """The random of the scenario, it's reproducible with the seed"""
+    if index is None or not CONF.ecs_test.seed:
+        return random.Random()
+    return random.Random(f'{CONF.ecs_test.seed}:{index}')
 
-def do_test_vm():
-    test_task = ECSScenarioTest(parse_test_actions())
+
+def do_test_vm(index=None) -> model.ScenarioResult:
+    rng = scenario_rng(index)
+    test_task = ECSScenarioTest(parse_test_actions(rng=rng), index=index,
+                                rng=rng)
+    with profiler.profile():
+        try:
+            test_task.run(pre_check=False)
+        except Exception as e:
+            LOG.error('test failed, {}', e)
+    return test_task.result
+
+
+def run_scenarios() -> list[model.ScenarioResult]:
+    if CONF.ecs_test.worker == 1:
+        results = (do_test_vm() for _ in range(CONF.ecs_test.total))
+    else:
+        results = utils.run_processes(do_test_vm, nums=CONF.ecs_test.total,
+                                      max_workers=CONF.ecs_test.worker)
+    completed = []
     try:
-        test_task.run(pre_check=False)
-        return 'ok'
-    except Exception as e:
-        LOG.error('test failed, {}', e)
-        return 'ng'
+        for result in results:
+            store.save(result)
+            completed.append(result)
+    finally:
+        resource_pool.drain_all()
+    return completed
+
 
+def create_barrier(total, resumed=False):
+    """Return the barrier of the total scenarios to run
 
-def test_with_process():
+    A resumed run only runs the pending scenarios, the barrier is ignored
+    if they are not a multiple of worker rather than failing the resume.
+    """
+    if CONF.ecs_test.barrier_action not in VM_TEST_SCENARIOS:
+        raise exceptions.InvalidConfig(
+            reason=f'barrier action {CONF.ecs_test.barrier_action} '
+                   'is invalid')
+    if resumed and total % CONF.ecs_test.worker:
+        LOG.warning('barrier_action is ignored, {} pending scenario(s) are '
+                    'not a multiple of worker', total)
+        return None
+    if total % CONF.ecs_test.worker:
+        raise exceptions.InvalidConfig(
+            reason='total must be a multiple of worker with barrier_action')
+    LOG.info('{} workers will release {} at the same time',
+             CONF.ecs_test.worker, CONF.ecs_test.barrier_action)
+    return multiprocessing.Barrier(CONF.ecs_test.worker)
+
+
+def do_test_scenario(args) -> tuple[int, model.ScenarioResult]:
+    """Run the scenario of index, resume it if the progress is not None"""
+    index, progress = args
+    if not progress:
+        return index, do_test_vm(index)
+    test_task = ECSScenarioTest(progress.actions, index=index,
+                                progress=progress)
+    with profiler.profile():
+        try:
+            test_task.run(pre_check=False)
+        except Exception as e:
+            LOG.error('test failed, {}', e)
+    return index, test_task.result
+
+
+def _load_scenarios(resume_state: checkpoint.RunState = None):
+    """Return the completed results and the scenarios to run
+
+    The scenarios are (index, checkpoint.Progress or None).
+    """
+    if not resume_state:
+        return [], [(index, None) for index in range(CONF.ecs_test.total)]
+    return list(resume_state.done.values()), [
+        (index, resume_state.progress.get(index))
+        for index in resume_state.pending()
+    ]
+
+
+def test_with_process(resume_state: checkpoint.RunState = None):
     ecs_actions.init()
     try:
         test_checker = ECSScenarioTest(parse_test_actions())
         test_checker.before_run()
+        placement.init(test_checker.manager)
     except Exception as e:
         LOG.error('pre check failed: {}', e)
         return
 
+    completed, scenarios = _load_scenarios(resume_state)
+    barrier = None
+    initializer, initargs = None, ()
+    if CONF.ecs_test.barrier_action:
+        barrier = create_barrier(len(scenarios),
+                                 resumed=resume_state is not None)
+    if barrier:
+        initializer, initargs = init_barrier, (barrier,)
+
+    total = len(completed) + len(scenarios)
     ng = 0
-    for result in utils.run_processes(do_test_vm,
-                                      nums=CONF.ecs_test.total,
-                                      max_workers=CONF.ecs_test.worker):
-        if result == 'ng':
+    event_analyzer = analyzer.EventAnalyzer()
+    host_report = placement.HostReport()
+    monitor = quarantine.Monitor()
+    for result in completed:
+        store.save(result)
+        host_report.add(result)
+        if not result.ok:
             ng += 1
-
-    utils.report_results(CONF.ecs_test.total, ng)
-    if ng:
+    done = len(completed)
+    # closing stops the pending scenarios and waits the running ones if
+    # the run stops early
+    with contextlib.closing(utils.run_processes(
+            do_test_scenario, maps=scenarios,
+            max_workers=CONF.ecs_test.worker,
+            initializer=initializer, initargs=initargs)) as results:
+        for index, result in results:
+            checkpoint.save_done(index, result)
+            store.save(result)
+            event_analyzer.add(result.events)
+            host_report.add(result)
+            done += 1
+            if not result.ok:
+                ng += 1
+            if monitor.check(host_report):
+                # the running scenarios must not wait the pending ones at
+                # the barrier, they are never started
+                if barrier:
+                    barrier.abort()
+                break
+
+    if CONF.results.analyze_events:
+        event_analyzer.report()
+    host_report.report()
+    monitor.report(not_run=total - done)
+    utils.report_results(done, ng)
+    if ng or monitor.stopped:
         raise exceptions.TestFailed()
 
 
-def test_without_process():
+def test_without_process(resume_state: checkpoint.RunState = None):
     ecs_actions.init()
+    if CONF.ecs_test.barrier_action:
+        LOG.warning('barrier_action is ignored because worker is 1')
+    completed, scenarios = _load_scenarios(resume_state)
+    placement.init(base_manager.get_manager())
+    total = len(completed) + len(scenarios)
     ng = 0
-    for _ in range(CONF.ecs_test.total):
-        test_task = ECSScenarioTest(parse_test_actions())
+    event_analyzer = analyzer.EventAnalyzer()
+    host_report = placement.HostReport()
+    monitor = quarantine.Monitor()
+    for result in completed:
+        store.save(result)
+        host_report.add(result)
+        if not result.ok:
+            ng += 1
+    done = len(completed)
+    with profiler.profile():
+        for index, progress in scenarios:
+            if progress:
+                test_task = ECSScenarioTest(progress.actions, index=index,
+                                            progress=progress)
+            else:
+                rng = scenario_rng(index)
+                test_task = ECSScenarioTest(parse_test_actions(rng=rng),
+                                            index=index, rng=rng)
+            try:
+                test_task.before_run()
+                test_task.run(pre_check=False)
+            except (exceptions.InvalidConfig, exceptions.InvalidFlavor,
+                    exceptions.InvalidImage, exceptions.EcsTestFailed,
+                    exceptions.EcsIsError) as e:
+                LOG.error('test failed: {}', e)
+                ng += 1
+            except Exception as e:
+                LOG.exception('test failed: {}', e)
+                ng += 1
+            checkpoint.save_done(index, test_task.result)
+            store.save(test_task.result)
+            event_analyzer.add(test_task.result.events)
+            host_report.add(test_task.result)
+            done += 1
+            if monitor.check(host_report):
+                break
+    resource_pool.drain_all()
+
+    if CONF.results.analyze_events:
+        event_analyzer.report()
+    host_report.report()
+    monitor.report(not_run=total - done)
+    utils.report_results(done, ng)
+    if ng or monitor.stopped:
+        raise exceptions.TestFailed()
+
+
+def do_test_replay(record: timeline.ScenarioRecord) -> model.ScenarioResult:
+    """Run the recorded scenario at the same offset of the run"""
+    timeline.wait_offset(record.offset)
+    test_task = ECSScenarioTest(record.actions, index=record.index,
+                                sleeps=record.sleeps)
+    with profiler.profile():
         try:
-            test_task.before_run()
             test_task.run(pre_check=False)
-        except (exceptions.InvalidConfig, exceptions.InvalidFlavor,
-                exceptions.InvalidImage, exceptions.EcsTestFailed,
-                exceptions.EcsIsError) as e:
-            LOG.error('test failed: {}', e)
-            ng += 1
         except Exception as e:
-            LOG.exception('test failed: {}', e)
-            ng += 1
-    utils.report_results(CONF.ecs_test.total, ng)
-    if ng:
+            LOG.error('test failed, {}', e)
+    return test_task.result
+
+
+def test_replay(recorded: timeline.Timeline, worker=None):
+    """Replay the scenarios with the same actions, sleeps and offsets"""
+    ecs_actions.init()
+    worker = worker or recorded.worker
+    test_checker = ECSScenarioTest(recorded.scenarios[0].actions,
+                                   sleeps=[])
+    test_checker.before_run()
+    placement.init(test_checker.manager)
+    LOG.info('replay {} scenario(s) of seed {} with {} worker(s)',
+             len(recorded.scenarios), recorded.seed, worker)
+
+    ng = 0
+    event_analyzer = analyzer.EventAnalyzer()
+    host_report = placement.HostReport()
+    monitor = quarantine.Monitor()
+    done = 0
+    if worker == 1:
+        results = (do_test_replay(record) for record in recorded.scenarios)
+    else:
+        results = utils.run_processes(do_test_replay,
+                                      maps=recorded.scenarios,
+                                      max_workers=worker)
+    try:
+        for result in results:
+            store.save(result)
+            event_analyzer.add(result.events)
+            host_report.add(result)
+            done += 1
+            if not result.ok:
+                ng += 1
+            if monitor.check(host_report):
+                break
+    finally:
+        # stop the pending scenarios and wait the running ones, which may
+        # still use the resources of the pools
+        results.close()
+        resource_pool.drain_all()
+
+    if CONF.results.analyze_events:
+        event_analyzer.report()
+    host_report.report()
+    monitor.report(not_run=len(recorded.scenarios) - done)
+    utils.report_results(done, ng)
+    if ng or monitor.stopped:
         raise exceptions.TestFailed()
 
 
-def parse_test_actions() -> list:
+def split_group(action) -> list[str]:
+    """Return the actions of an action group, e.g. reboot+attach_volume"""
+    return action.split('+')
+
+
+def parse_test_actions(rng: random.Random = None,
+                       require_create=True) -> list:
     if CONF.ecs_test.random_actions:
-        test_actions = random.sample(CONF.ecs_test.actions,
-                                     len(CONF.ecs_test.actions))
+        test_actions = (rng or random).sample(CONF.ecs_test.actions,
+                                              len(CONF.ecs_test.actions))
         if 'create' in test_actions and test_actions.index('create') != 0:
             test_actions.remove('create')
             test_actions.insert(0, 'create')
@@ -238,15 +659,18 @@ def parse_test_actions() -> list:
             if nums and not utils.is_uint(nums):
                 raise exceptions.InvalidConfig(
                     reason=f"action {action_num} is invalid")
-        if action not in VM_TEST_SCENARIOS:
-            raise exceptions.InvalidScenario(action)
-        if action == 'create' and int(nums) > 1:
+        group = split_group(action)
+        for name in group:
+            if name not in VM_TEST_SCENARIOS:
+                raise exceptions.InvalidScenario(name)
+        if 'create' in group and (len(group) > 1 or int(nums or 1) > 1):
             raise exceptions.InvalidScenario(action_num)
         actions.extend([action] * int(nums or 1))
 
     if not actions:
         raise exceptions.InvalidConfig(reason="test action is empty")
-    if not CONF.ecs_test.ecs_id and 'create' not in actions[:1]:
+    if require_create and not CONF.ecs_test.ecs_id and \
+       'create' not in actions[:1]:
         raise exceptions.InvalidConfig(
             reason="test action 'create' is required if 'ecs_id' is empty")
 
@@ -0,0 +1,124 @@
+import itertools
+import time
+
+import toml
+
+from skytest.common import conf
+from skytest.common import exceptions
+from skytest.common import log
+from skytest.common import stats
+from skytest.common import store
+
+from . import ecs_actions
+from . import scenario
+
+CONF = conf.CONF
+LOG = log.getLogger()
+
+SWEEP_GROUPS = ['ecs_test', 'openstack']
+
+
+class Combination(object):
+
+    def __init__(self, options: list[tuple]) -> None:
+        # options: [(group, name, value), ...]
+        self.options = options
+        self.results = []
+        self.duration = 0
+
+    def __str__(self):
+        return ', '.join(f'{name}={value}'
+                         for _, name, value in self.options)
+
+    def apply(self):
+        for group, name, value in self.options:
+            conf.set_option(group, name, value)
+
+
+def load_matrix(matrix_file) -> list[tuple]:
+    """Load sweep matrix, e.g.
+
+    [ecs_test]
+    worker = [10, 20]
+    [openstack]
+    boot_from_volume = [true, false]
+    """
+    try:
+        data = toml.load(matrix_file)
+    except (OSError, toml.TomlDecodeError) as e:
+        raise exceptions.InvalidConfig(reason=f'load matrix failed, {e}')
+    axes = []
+    for group, options in data.items():
+        if group not in SWEEP_GROUPS:
+            raise exceptions.InvalidConfig(
+                reason=f'sweep group must be one of {SWEEP_GROUPS}')
+        for name, values in options.items():
+            # make sure the option exists
+            conf.get_option(group, name)
+            if not isinstance(values, list) or not values:
+                raise exceptions.InvalidConfig(
+                    reason=f'values of {group}.{name} must be a list')
+            axes.append([(group, name, value) for value in values])
+    if not axes:
+        raise exceptions.InvalidConfig(reason='sweep matrix is empty')
+    return axes
+
+
+def run_combination(combination: Combination):
+    LOG.info('==== Sweep: {} ====', combination)
+    combination.apply()
+    ecs_actions.init()
+    test_checker = scenario.ECSScenarioTest(scenario.parse_test_actions())
+    test_checker.before_run()
+
+    store.start_run(name=str(combination), mode='sweep')
+    start = time.time()
+    combination.results = scenario.run_scenarios()
+    combination.duration = time.time() - start
+
+
+def report(combinations: list[Combination]):
+    import prettytable
+
+    pt = prettytable.PrettyTable(['Combination', 'Scenarios', 'NG',
+                                  'Actions/min', 'Action', 'P50(s)',
+                                  'P95(s)', 'P99(s)'])
+    pt.align['Combination'] = 'l'
+    pt.align['Action'] = 'l'
+    for combination in combinations:
+        summary = stats.summarize_actions(combination.results)
+        ng = len([r for r in combination.results if not r.ok])
+        throughput = stats.throughput(combination.results,
+                                      combination.duration)
+        head = [str(combination), len(combination.results), ng,
+                f'{throughput:.2f}']
+        if not summary:
+            pt.add_row(head + ['-', '-', '-', '-'])
+        for name, action_stats in sorted(summary.items()):
+            pt.add_row(head + [name, f'{action_stats.p50:.2f}',
+                               f'{action_stats.p95:.2f}',
+                               f'{action_stats.p99:.2f}'])
+            head = ['', '', '', '']
+    LOG.info('sweep results:\n{}', pt)
+
+
+def test_sweep(matrix_file):
+    axes = load_matrix(matrix_file)
+    # restore the loaded configs after sweep
+    origin = Combination([(group, name, conf.get_option(group, name))
+                          for group, name, _ in (axis[0] for axis in axes)])
+    combinations = [Combination(list(options))
+                    for options in itertools.product(*axes)]
+    LOG.info('sweep {} combination(s)', len(combinations))
+
+    try:
+        for combination in combinations:
+            try:
+                run_combination(combination)
+            except (exceptions.InvalidConfig, exceptions.InvalidFlavor,
+                    exceptions.InvalidImage,
+                    exceptions.NotAvailableServices) as e:
+                LOG.error('sweep {} failed: {}', combination, e)
+    finally:
+        origin.apply()
+    report(combinations)
@@ -0,0 +1,140 @@
+"""
+Weighted Markov chain workload
+
+After the configured actions, every ECS continues with the actions
+generated by the workload until the duration or count limit is reached.
+The next action is chosen by weight from the actions which are allowed in
+the current state of the ECS, e.g. unpause is only allowed after pause.
+"""
+import random
+import time
+
+from skytest.common import conf
+from skytest.common import exceptions
+from skytest.common import log
+from skytest.common import model
+
+from . import ecs_actions
+
+CONF = conf.CONF
+LOG = log.getLogger()
+
+ACTIVE = 'active'
+STOPPED = 'stopped'
+PAUSED = 'paused'
+SHELVED = 'shelved'
+ALL_STATES = {ACTIVE, STOPPED, PAUSED, SHELVED}
+
+# action: (the states which the action is allowed in, the state after it),
+# the state is not changed if it's None
+TRANSITIONS = {
+    'stop': ({ACTIVE}, STOPPED),
+    'start': ({STOPPED}, ACTIVE),
+    'pause': ({ACTIVE}, PAUSED),
+    'unpause': ({PAUSED}, ACTIVE),
+    'shelve': ({ACTIVE, STOPPED}, SHELVED),
+    'unshelve': ({SHELVED}, ACTIVE),
+    'rename': (ALL_STATES, None),
+    'rebuild': ({ACTIVE, STOPPED}, None),
+    'migrate': ({ACTIVE, STOPPED}, None),
+}
+# the actions which are not in TRANSITIONS are only allowed in ACTIVE
+DEFAULT_TRANSITION = ({ACTIVE}, None)
+
+# (the weights option, the parsed weights), see Workload.from_conf
+_WEIGHTS: tuple[list[str], dict[str, float]] = None
+
+
+def get_state(ecs: model.ECS) -> str:
+    if not ecs or ecs.is_active():
+        return ACTIVE
+    if ecs.is_stopped():
+        return STOPPED
+    if ecs.is_paused():
+        return PAUSED
+    if ecs.is_shelved():
+        return SHELVED
+    return ecs.status.lower()
+
+
+def _transition(action) -> tuple[set, str]:
+    """The transition of an action group is allowed if all actions are
+    allowed, and the state is not changed"""
+    names = action.split('+')
+    if len(names) == 1:
+        return TRANSITIONS.get(action, DEFAULT_TRANSITION)
+    allowed = set(ALL_STATES)
+    for name in names:
+        allowed &= TRANSITIONS.get(name, DEFAULT_TRANSITION)[0]
+    return allowed, None
+
+
+class Workload(object):
+
+    def __init__(self, weights: dict[str, float], duration=0, count=0,
+                 rng: random.Random = None) -> None:
+        self.weights = weights
+        self.duration = duration
+        self.count = count
+        self.rng = rng or random.Random()
+
+    def iter_actions(self, state=ACTIVE, done=0):
+        """Generate the actions until the duration or count limit
+
+        done is the number of the actions generated before resuming.
+        """
+        deadline = self.duration and time.time() + self.duration
+        generated = done
+        while not self.count or generated < self.count:
+            if deadline and time.time() >= deadline:
+                break
+            candidates = [(action, weight)
+                          for action, weight in self.weights.items()
+                          if state in _transition(action)[0]]
+            if not candidates:
+                LOG.warning('no action is allowed in state {}, stop '
+                            'workload', state)
+                break
+            action = self.rng.choices(
+                [action for action, _ in candidates],
+                weights=[weight for _, weight in candidates])[0]
+            yield action
+            state = _transition(action)[1] or state
+            generated += 1
+
+    @classmethod
+    def from_conf(cls, rng: random.Random = None):
+        """Return the workload of [workload] options, or None
+
+        The weights are parsed once per process, unless the option is
+        changed, e.g. by sweep.
+        """
+        global _WEIGHTS
+
+        if not CONF.workload.weights:
+            return None
+        if not CONF.workload.duration and not CONF.workload.count:
+            raise exceptions.InvalidConfig(
+                reason='workload duration or count is required')
+        if not _WEIGHTS or _WEIGHTS[0] != CONF.workload.weights:
+            _WEIGHTS = (list(CONF.workload.weights),
+                        parse_weights(CONF.workload.weights))
+        return cls(_WEIGHTS[1], duration=CONF.workload.duration,
+                   count=CONF.workload.count, rng=rng)
+
+
+def parse_weights(items: list[str]) -> dict[str, float]:
+    weights = {}
+    for item in items:
+        action, _, weight = item.rpartition(':')
+        try:
+            weights[action] = float(weight)
+        except ValueError:
+            raise exceptions.InvalidConfig(
+                reason=f'workload weight {item} is invalid')
+        for name in action.split('+'):
+            if name not in ecs_actions.VM_TEST_SCENARIOS or name == 'create':
+                raise exceptions.InvalidScenario(name)
+    if not any(weights.values()):
+        raise exceptions.InvalidConfig(reason='workload weights are all 0')
+    return weights
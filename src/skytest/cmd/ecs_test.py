@@ -1,16 +1,35 @@
 import click
 import sys
 import os
+import random
 
 from skytest.common import log
+from skytest.common import checkpoint
 from skytest.common import conf
 from skytest.common import constants
 from skytest.common import exceptions
-from skytest.cases import scenario
+from skytest.common import journal
+from skytest.common import notifications
+from skytest.common import profiler
+from skytest.common import store
+from skytest.common import timeline
+
+# NOTE: the cases, managers and reports are imported by the commands
+# which use them, so that --help and config errors return quickly, see
+# tools/bench_import.py
 
 CONF = conf.CONF
 
 
+def basic_log_config(verbose_count=0, log_file=None):
+    log.basic_config(verbose_count=verbose_count,
+                     log_file=log_file or CONF.log_file,
+                     enqueue=CONF.log_enqueue, json_lines=CONF.log_json,
+                     rotation=CONF.log_rotation,
+                     compression=CONF.log_compression,
+                     buffering=CONF.log_buffer_size)
+
+
 @click.group(context_settings={'help_option_names': ['-h', '--help']})
 def main():
     pass
@@ -23,7 +42,23 @@ def main():
               help=f'Defaults to env["{constants.ENV_CONF_FILE}"]')
 @click.option('--log-file')
 @click.option('-v', '--verbose', multiple=True, is_flag=True)
-def action_test(verbose, log_file, conf_file, actions):
+@click.option('-m', '--mode', default='default',
+              type=click.Choice(['default', 'capacity', 'boot-storm',
+                                 'pool']),
+              help='capacity: ramp up worker until SLO is violated, '
+                   'see [capacity] options; '
+                   'boot-storm: create boot_storm_count ECS per request; '
+                   'pool: create ecs_pool_size ECS and reuse them')
+@click.option('--profile', is_flag=True,
+              help='Profile all workers and merge the profiles')
+@click.option('--profile-dir', default='skytest-profile',
+              help='Defaults to ./skytest-profile')
+@click.option('--resume', is_flag=True,
+              help='Resume the interrupted test from checkpoint_file')
+@click.option('--record', 'record_file',
+              help='Record the timeline of the scenarios to replay it')
+def action_test(verbose, log_file, conf_file, actions, mode, profile,
+                profile_dir, resume, record_file):
     """ECS scenario test
     """
     global LOG
@@ -35,25 +70,347 @@ def action_test(verbose, log_file, conf_file, actions):
         sys.exit(1)
     if actions:
         test_actions = actions.split(',')
-        object.__getattribute__(CONF.ecs_test, 'actions').set(test_actions)
+        conf.set_option('ecs_test', 'actions', test_actions)
 
-    log.basic_config(verbose_count=max(len(verbose), CONF.verbose),
-                     log_file=log_file or CONF.log_file)
+    basic_log_config(verbose_count=max(len(verbose), CONF.verbose),
+                     log_file=log_file)
     LOG = log.getLogger()
 
     LOG.info('worker: {}, total: {}, actions: {}',
              CONF.ecs_test.worker, CONF.ecs_test.total,
              CONF.ecs_test.actions)
+    from skytest.cases import boot_storm
+    from skytest.cases import capacity
+    from skytest.cases import ecs_pool
+    from skytest.cases import scenario
+    from skytest.common import waiter
+
+    resume_state = None
+    if resume:
+        if mode != 'default':
+            LOG.error('--resume only supports the default mode')
+            sys.exit(1)
+        if not CONF.ecs_test.checkpoint_file:
+            LOG.error('--resume requires [ecs_test] checkpoint_file')
+            sys.exit(1)
+        if not os.path.exists(CONF.ecs_test.checkpoint_file):
+            LOG.error('checkpoint {} not exists',
+                      CONF.ecs_test.checkpoint_file)
+            sys.exit(1)
+        resume_state = checkpoint.resume(
+            CONF.ecs_test.checkpoint_file,
+            sync_interval=float(CONF.journal_sync_interval))
+        if resume_state.seed:
+            # the pending scenarios run the same random actions
+            if CONF.ecs_test.seed and \
+               CONF.ecs_test.seed != resume_state.seed:
+                LOG.warning('seed {} is ignored, resume with the seed {} '
+                            'of the checkpoint', CONF.ecs_test.seed,
+                            resume_state.seed)
+            conf.set_option('ecs_test', 'seed', resume_state.seed)
 
+    if not CONF.ecs_test.seed:
+        conf.set_option('ecs_test', 'seed', random.randrange(1, 2 ** 31))
+    LOG.info('seed: {}', CONF.ecs_test.seed)
+    if mode == 'default' and not resume:
+        checkpoint.start(CONF.ecs_test.checkpoint_file, CONF.ecs_test.total,
+                         seed=CONF.ecs_test.seed,
+                         sync_interval=float(CONF.journal_sync_interval))
+    timeline.start(record_file, seed=CONF.ecs_test.seed,
+                   worker=CONF.ecs_test.worker, total=CONF.ecs_test.total)
+
+    store.init()
+    if CONF.ecs_test.latency_prior_run:
+        if not CONF.ecs_test.adaptive_wait:
+            LOG.warning('latency_prior_run is ignored, adaptive_wait is '
+                        'disabled')
+        elif store.STORE:
+            waiter.load_priors(
+                store.STORE.get_actions(CONF.ecs_test.latency_prior_run))
+        else:
+            LOG.warning('latency_prior_run is ignored, [results] db is not '
+                        'set')
+    journal.init(CONF.journal_file,
+                 sync_interval=float(CONF.journal_sync_interval))
+    if profile:
+        profiler.enable(profile_dir)
     try:
-        if CONF.ecs_test.worker == 1:
-            scenario.test_without_process()
+        # before the workers are forked
+        notifications.start_relay()
+        if mode == 'capacity':
+            capacity.test_capacity()
+        elif mode == 'boot-storm':
+            store.start_run(mode=mode)
+            boot_storm.test_boot_storm()
+        elif mode == 'pool':
+            store.start_run(mode=mode)
+            ecs_pool.test_pool()
         else:
-            scenario.test_with_process()
+            store.start_run(mode=mode)
+            if CONF.ecs_test.worker == 1:
+                scenario.test_without_process(resume_state=resume_state)
+            else:
+                scenario.test_with_process(resume_state=resume_state)
     except (exceptions.InvalidConfig, exceptions.InvalidScenario,
-            exceptions.TestFailed, exceptions.EcsTestFailed) as e:
+            exceptions.TestFailed, exceptions.EcsTestFailed,
+            exceptions.InvalidFlavor, exceptions.InvalidImage,
+            exceptions.NotAvailableServices) as e:
+        LOG.error('{}', e)
+        sys.exit(1)
+    finally:
+        notifications.stop()
+        store.close()
+        journal.close()
+        checkpoint.close()
+        timeline.close()
+        profiler.merge()
+        log.shutdown()
+
+
+@main.command('replay')
+@click.option('-c', '--conf', 'conf_file',
+              default=os.getenv(constants.ENV_CONF_FILE),
+              help=f'Defaults to env["{constants.ENV_CONF_FILE}"]')
+@click.option('--log-file')
+@click.option('-v', '--verbose', multiple=True, is_flag=True)
+@click.option('--worker', type=int,
+              help='Defaults to the worker of the recorded run')
+@click.option('--record', 'record_file',
+              help='Record the timeline of the replay')
+@click.argument('timeline_file')
+def replay_test(verbose, log_file, conf_file, worker, record_file,
+                timeline_file):
+    """Replay the timeline recorded by action-test --record
+
+    The scenarios are started at the same offsets, with the same actions
+    and the same sleeps between actions.
+    """
+    global LOG
+
+    try:
+        conf.load_configs(conf_file=conf_file)
+    except exceptions.ConfileNotExists as e:
+        print(f'ERROR: load config failed, {e}')
+        sys.exit(1)
+
+    basic_log_config(verbose_count=max(len(verbose), CONF.verbose),
+                     log_file=log_file)
+    LOG = log.getLogger()
+    if not os.path.exists(timeline_file):
+        LOG.error('timeline {} not exists', timeline_file)
+        sys.exit(1)
+    recorded = timeline.load(timeline_file)
+    if not recorded.scenarios:
+        LOG.error('timeline {} has no scenario', timeline_file)
+        sys.exit(1)
+    from skytest.cases import scenario
+
+    conf.set_option('ecs_test', 'seed', recorded.seed)
+    timeline.start(record_file, seed=recorded.seed,
+                   worker=worker or recorded.worker,
+                   total=len(recorded.scenarios))
+    store.init()
+    journal.init(CONF.journal_file,
+                 sync_interval=float(CONF.journal_sync_interval))
+    try:
+        notifications.start_relay()
+        store.start_run(mode='replay')
+        scenario.test_replay(recorded, worker=worker)
+    except (exceptions.InvalidConfig, exceptions.TestFailed,
+            exceptions.InvalidFlavor, exceptions.InvalidImage,
+            exceptions.NotAvailableServices) as e:
+        LOG.error('{}', e)
+        sys.exit(1)
+    finally:
+        notifications.stop()
+        store.close()
+        journal.close()
+        timeline.close()
+        log.shutdown()
+
+
+@main.command('sweep')
+@click.option('-c', '--conf', 'conf_file',
+              default=os.getenv(constants.ENV_CONF_FILE),
+              help=f'Defaults to env["{constants.ENV_CONF_FILE}"]')
+@click.option('--log-file')
+@click.option('-v', '--verbose', multiple=True, is_flag=True)
+@click.argument('matrix_file')
+def sweep_test(verbose, log_file, conf_file, matrix_file):
+    """Run ECS scenario test with every combination of the matrix
+
+    MATRIX_FILE is a toml file with [ecs_test] and [openstack] options,
+    the value of each option is a list, e.g. worker = [10, 20]
+    """
+    global LOG
+
+    try:
+        conf.load_configs(conf_file=conf_file)
+    except exceptions.ConfileNotExists as e:
+        print(f'ERROR: load config failed, {e}')
+        sys.exit(1)
+
+    basic_log_config(verbose_count=max(len(verbose), CONF.verbose),
+                     log_file=log_file)
+    LOG = log.getLogger()
+    from skytest.cases import sweep
+
+    store.init()
+    journal.init(CONF.journal_file,
+                 sync_interval=float(CONF.journal_sync_interval))
+    try:
+        notifications.start_relay()
+        sweep.test_sweep(matrix_file)
+    except exceptions.InvalidConfig as e:
+        LOG.error('{}', e)
+        sys.exit(1)
+    finally:
+        notifications.stop()
+        store.close()
+        journal.close()
+        log.shutdown()
+
+
+@main.command('compare')
+@click.option('-c', '--conf', 'conf_file',
+              default=os.getenv(constants.ENV_CONF_FILE),
+              help=f'Defaults to env["{constants.ENV_CONF_FILE}"]')
+@click.option('--db', help='Defaults to [results] db')
+@click.option('--alpha', type=float, default=0.05,
+              help='Significance level, defaults to 0.05')
+@click.argument('base_run', type=int)
+@click.argument('target_run', type=int)
+def compare_runs(conf_file, db, alpha, base_run, target_run):
+    """Compare latency and failure rate of TARGET_RUN with BASE_RUN
+
+    Exit with 2 if TARGET_RUN has significant regressions.
+    """
+    try:
+        conf.load_configs(conf_file=conf_file)
+    except exceptions.ConfileNotExists as e:
+        print(f'ERROR: load config failed, {e}')
+        sys.exit(1)
+    log.basic_config(verbose_count=CONF.verbose)
+    LOG = log.getLogger()
+
+    db = db or CONF.results.db
+    if not db or not os.path.exists(db):
+        LOG.error('results db {} not exists', db)
+        sys.exit(1)
+    from skytest.common import compare
+
+    result_store = store.ResultStore(db)
+    try:
+        diffs = compare.compare_runs(result_store, base_run, target_run,
+                                     alpha=alpha)
+    except exceptions.NotFound as e:
         LOG.error('{}', e)
         sys.exit(1)
+    finally:
+        result_store.close()
+
+    compare.report(diffs, base_run, target_run)
+    regressed = [diff.action for diff in diffs if diff.regressed]
+    if regressed:
+        LOG.error('run {} has regressions: {}', target_run,
+                  ', '.join(regressed))
+        sys.exit(2)
+    LOG.success('run {} has no regression', target_run)
+
+
+@main.command('analyze')
+@click.option('-c', '--conf', 'conf_file',
+              default=os.getenv(constants.ENV_CONF_FILE),
+              help=f'Defaults to env["{constants.ENV_CONF_FILE}"]')
+@click.option('--db', help='Defaults to [results] db')
+@click.argument('run_id', type=int)
+def analyze_events(conf_file, db, run_id):
+    """Analyze the nova events of all ECS of RUN_ID
+
+    The events are saved only if [results] save_events is true.
+    """
+    try:
+        conf.load_configs(conf_file=conf_file)
+    except exceptions.ConfileNotExists as e:
+        print(f'ERROR: load config failed, {e}')
+        sys.exit(1)
+    log.basic_config(verbose_count=CONF.verbose)
+    LOG = log.getLogger()
+
+    db = db or CONF.results.db
+    if not db or not os.path.exists(db):
+        LOG.error('results db {} not exists', db)
+        sys.exit(1)
+    result_store = store.ResultStore(db)
+    try:
+        ecs_events = {}
+        for ecs, event in result_store.get_events(run_id):
+            ecs_events.setdefault(ecs, []).append(event)
+    finally:
+        result_store.close()
+
+    from skytest.common import analyzer
+
+    event_analyzer = analyzer.EventAnalyzer()
+    for events in ecs_events.values():
+        event_analyzer.add(events)
+    event_analyzer.report()
+
+
+@main.command('cleanup')
+@click.option('-c', '--conf', 'conf_file',
+              default=os.getenv(constants.ENV_CONF_FILE),
+              help=f'Defaults to env["{constants.ENV_CONF_FILE}"]')
+@click.option('-v', '--verbose', multiple=True, is_flag=True)
+@click.option('--workers', type=int, default=10,
+              help='Delete concurrently, defaults to 10')
+@click.option('--rate', type=float, default=0,
+              help='Max delete requests per second, defaults to unlimited')
+@click.option('--timeout', type=int, default=600,
+              help='Timeout of waiting for each kind of resource')
+@click.option('--all-tenants', is_flag=True)
+@click.option('--rbd-pool', help='Delete the orphan rbd images of the pool')
+@click.option('--dry-run', is_flag=True, help='Only show the resources')
+@click.option('--journal', 'journal_file', is_flag=False, flag_value='',
+              default=None,
+              help='Only delete the resources of the journal, '
+                   'defaults to journal_file')
+def cleanup_resources(conf_file, verbose, workers, rate, timeout,
+                      all_tenants, rbd_pool, dry_run, journal_file):
+    """Delete servers, volumes and ports created by skytest
+
+    The resources are found by the name prefix "skytest-", or replayed
+    from the journal with --journal.
+    """
+    try:
+        conf.load_configs(conf_file=conf_file)
+    except exceptions.ConfileNotExists as e:
+        print(f'ERROR: load config failed, {e}')
+        sys.exit(1)
+    log.basic_config(verbose_count=max(len(verbose), CONF.verbose))
+    LOG = log.getLogger()
+    from skytest.cases import cleanup
+    from skytest.managers import base as base_manager
+
+    reaper = cleanup.Reaper(base_manager.get_manager(), workers=workers,
+                            rate=rate, timeout=timeout,
+                            all_tenants=all_tenants, dry_run=dry_run)
+    try:
+        if journal_file is not None:
+            journal_file = journal_file or CONF.journal_file
+            if not journal_file:
+                LOG.error('journal_file is not set')
+                sys.exit(1)
+            if not os.path.exists(journal_file):
+                LOG.error('journal {} not exists', journal_file)
+                sys.exit(1)
+            failed = reaper.cleanup_journal(journal_file)
+        else:
+            failed = reaper.cleanup(rbd_pool=rbd_pool)
+    finally:
+        log.shutdown()
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == '__main__':
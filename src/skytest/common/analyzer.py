@@ -0,0 +1,111 @@
+"""
+Aggregate nova instance action events of all ECS
+"""
+from datetime import datetime
+
+from skytest.common import log
+from skytest.common import model
+from skytest.common import stats
+
+LOG = log.getLogger()
+
+
+def parse_time(value: str) -> datetime:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        LOG.warning('invalid event time: {}', value)
+        return None
+
+
+def _seconds(start: str, end: str) -> float:
+    start_time, end_time = parse_time(start), parse_time(end)
+    if not start_time or not end_time:
+        return None
+    return (end_time - start_time).total_seconds()
+
+
+class EventAnalyzer(object):
+
+    def __init__(self) -> None:
+        # event -> [seconds, ...]
+        self.event_elapsed = {}
+        # (event, host) -> [seconds, ...]
+        self.host_elapsed = {}
+        # event -> error count
+        self.event_errors = {}
+        # (event, host) -> error count
+        self.host_errors = {}
+        # action -> [seconds, ...], from api request to first event start
+        self.queue_gaps = {}
+        self.ecs_num = 0
+
+    def add(self, events: list[model.ServerEvent]):
+        if not events:
+            return
+        self.ecs_num += 1
+        # request id -> (start time, event)
+        first_events = {}
+        for event in events:
+            # the times may be in different formats, e.g. with or without
+            # microseconds, so they are compared after parsed
+            start_time = parse_time(event.start_time)
+            if start_time and (
+                    event.request_id not in first_events or
+                    start_time < first_events[event.request_id][0]):
+                first_events[event.request_id] = (start_time, event)
+            if event.result and event.result.lower() == 'error':
+                self.event_errors.setdefault(event.event, 0)
+                self.event_errors[event.event] += 1
+                key = (event.event, event.host or '-')
+                self.host_errors[key] = self.host_errors.get(key, 0) + 1
+                continue
+            elapsed = _seconds(event.start_time, event.finish_time)
+            if elapsed is None:
+                continue
+            self.event_elapsed.setdefault(event.event, []).append(elapsed)
+            self.host_elapsed.setdefault((event.event, event.host or '-'),
+                                         []).append(elapsed)
+
+        for _, event in first_events.values():
+            gap = _seconds(event.request_time, event.start_time)
+            if gap is None:
+                continue
+            self.queue_gaps.setdefault(event.action, []).append(gap)
+
+    def _distribution_table(self, title, data: dict, errors=None):
+        import prettytable
+
+        pt = prettytable.PrettyTable([title, 'Count', 'Errors', 'Min(s)',
+                                      'P50(s)', 'P95(s)', 'Max(s)'])
+        pt.align[title] = 'l'
+        errors = errors or {}
+        for key in sorted(set(data) | set(errors)):
+            name = ' @ '.join(key) if isinstance(key, tuple) else key
+            values = data.get(key)
+            if not values:
+                # the event only failed
+                pt.add_row([name, 0, errors[key], '-', '-', '-', '-'])
+                continue
+            pt.add_row([name, len(values), errors.get(key, '-'),
+                        f'{min(values):.2f}',
+                        f'{stats.percentile(values, 50):.2f}',
+                        f'{stats.percentile(values, 95):.2f}',
+                        f'{max(values):.2f}'])
+        return pt
+
+    def report(self):
+        if not self.ecs_num:
+            LOG.warning('no events to analyze')
+            return
+        LOG.info('event latency of {} ECS:\n{}', self.ecs_num,
+                 self._distribution_table('Event', self.event_elapsed,
+                                          errors=self.event_errors))
+        LOG.info('event latency by compute host:\n{}',
+                 self._distribution_table('Event @ Host', self.host_elapsed,
+                                          errors=self.host_errors))
+        LOG.info('gap between api request and first event '
+                 '(scheduler/conductor queueing):\n{}',
+                 self._distribution_table('Action', self.queue_gaps))
@@ -0,0 +1,141 @@
+"""
+Checkpoint of the scenario progress, used to resume an interrupted run
+
+The records are appended to the checkpoint file as JSON lines:
+    {"type": "run", "total": 100, "seed": 123}
+    {"type": "progress", "index": 3, "ecs": "...", "actions": [...],
+     "next_action": 2, "results": [...], "generated": 0}
+    {"type": "done", "index": 3, "result": {...}}
+
+The progress is saved by the workers every checkpoint_interval seconds and
+when the ECS of the scenario changes. The actions and the results of a
+progress record are only those appended since the previous record of the
+scenario, they are concatenated when the checkpoint is loaded. The last
+generated actions are generated by the workload, only the rest of the
+workload is generated when resumed. The results
+are saved by the main process when the scenarios are completed.
+"""
+import dataclasses
+from dataclasses import dataclass, field
+import json
+
+from skytest.common import journal
+from skytest.common import log
+from skytest.common import model
+
+LOG = log.getLogger()
+
+CHECKPOINT: journal.Journal = None
+
+
+@dataclass
+class Progress:
+    index: int
+    ecs: str = ''
+    actions: list[str] = field(default_factory=list)
+    next_action: int = 0
+    results: list[model.ActionResult] = field(default_factory=list)
+    # the number of the actions generated by the workload
+    generated: int = 0
+
+
+@dataclass
+class RunState:
+    total: int = 0
+    seed: int = 0
+    done: dict[int, model.ScenarioResult] = field(default_factory=dict)
+    progress: dict[int, Progress] = field(default_factory=dict)
+
+    def pending(self) -> list[int]:
+        return [index for index in range(self.total)
+                if index not in self.done]
+
+
+def _parse_result(data: dict) -> model.ScenarioResult:
+    actions = [model.ActionResult(**action)
+               for action in data.pop('actions', [])]
+    data.pop('events', None)
+    return model.ScenarioResult(actions=actions, **data)
+
+
+def load(path) -> RunState:
+    state = RunState()
+    with open(path) as f:
+        for num, line in enumerate(f, start=1):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                LOG.warning('skip invalid line {} of checkpoint {}', num,
+                            path)
+                continue
+            if entry['type'] == 'run':
+                state.total = entry['total']
+                state.seed = entry.get('seed', 0)
+            elif entry['type'] == 'progress':
+                entry.pop('type')
+                entry['results'] = [model.ActionResult(**result)
+                                    for result in entry['results']]
+                progress = state.progress.get(entry['index'])
+                if not progress:
+                    state.progress[entry['index']] = Progress(**entry)
+                    continue
+                progress.ecs = entry['ecs']
+                progress.next_action = entry['next_action']
+                progress.generated = entry.get('generated', 0)
+                progress.actions.extend(entry['actions'])
+                progress.results.extend(entry['results'])
+            elif entry['type'] == 'done':
+                state.done[entry['index']] = _parse_result(entry['result'])
+    for index in state.done:
+        state.progress.pop(index, None)
+    return state
+
+
+def start(path, total, seed=0, sync_interval=1.0):
+    """Start a new checkpoint, the old one is overwritten"""
+    global CHECKPOINT
+
+    if not path:
+        return
+    open(path, 'w').close()
+    CHECKPOINT = journal.Journal(path, sync_interval=sync_interval)
+    CHECKPOINT.append({'type': 'run', 'total': total, 'seed': seed})
+    LOG.info('scenario progress is saved to checkpoint {}', path)
+
+
+def resume(path, sync_interval=1.0) -> RunState:
+    """Load the checkpoint and continue to save progress to it"""
+    global CHECKPOINT
+
+    state = load(path)
+    CHECKPOINT = journal.Journal(path, sync_interval=sync_interval)
+    LOG.info('resume from checkpoint {}: {} completed, {} in progress, '
+             '{} pending', path, len(state.done), len(state.progress),
+             len(state.pending()) - len(state.progress))
+    return state
+
+
+def enabled() -> bool:
+    return CHECKPOINT is not None
+
+
+def save_progress(progress: Progress):
+    """Save the progress, the actions and the results are the delta"""
+    if CHECKPOINT:
+        CHECKPOINT.append({'type': 'progress',
+                           **dataclasses.asdict(progress)})
+
+
+def save_done(index, result: model.ScenarioResult):
+    if CHECKPOINT and index is not None:
+        data = dataclasses.asdict(result)
+        data.pop('events')
+        CHECKPOINT.append({'type': 'done', 'index': index, 'result': data})
+
+
+def close():
+    global CHECKPOINT
+
+    if CHECKPOINT:
+        CHECKPOINT.close()
+        CHECKPOINT = None
@@ -0,0 +1,98 @@
+from dataclasses import dataclass
+
+from skytest.common import exceptions
+from skytest.common import log
+from skytest.common import model
+from skytest.common import stats
+from skytest.common import store
+
+LOG = log.getLogger()
+
+
+@dataclass
+class ActionDiff:
+    action: str
+    base: stats.ActionStats
+    target: stats.ActionStats
+    latency_p_value: float = 1.0
+    failure_p_value: float = 1.0
+    alpha: float = 0.05
+
+    @property
+    def p50_change(self) -> float:
+        if not self.base.p50:
+            return 0
+        return (self.target.p50 - self.base.p50) / self.base.p50
+
+    @property
+    def latency_regressed(self) -> bool:
+        return self.latency_p_value < self.alpha and \
+            self.target.p50 > self.base.p50
+
+    @property
+    def failure_regressed(self) -> bool:
+        return self.failure_p_value < self.alpha and \
+            self.target.failure_rate > self.base.failure_rate
+
+    @property
+    def regressed(self) -> bool:
+        return self.latency_regressed or self.failure_regressed
+
+
+def _group_elapsed(actions: list[model.ActionResult]) -> dict:
+    elapsed = {}
+    for action in actions:
+        if action.ok and not action.skipped:
+            elapsed.setdefault(action.action, []).append(action.elapsed)
+    return elapsed
+
+
+def compare_runs(result_store: store.ResultStore, base_run, target_run,
+                 alpha=0.05) -> list[ActionDiff]:
+    runs_actions = []
+    for run_id in [base_run, target_run]:
+        if not result_store.get_run(run_id):
+            raise exceptions.NotFound(f'run {run_id}')
+        actions = result_store.get_actions(run_id)
+        runs_actions.append(actions)
+
+    base_summary, target_summary = [
+        stats.summarize_actions([model.ScenarioResult(actions=actions)])
+        for actions in runs_actions
+    ]
+    base_elapsed, target_elapsed = [_group_elapsed(actions)
+                                    for actions in runs_actions]
+    diffs = []
+    for name in sorted(set(base_summary) | set(target_summary)):
+        base = base_summary.get(name, stats.ActionStats(name))
+        target = target_summary.get(name, stats.ActionStats(name))
+        diffs.append(ActionDiff(
+            name, base, target, alpha=alpha,
+            latency_p_value=stats.mann_whitney_u(
+                base_elapsed.get(name, []), target_elapsed.get(name, [])),
+            failure_p_value=stats.two_proportion_z(
+                base.failed, base.total, target.failed, target.total)))
+    return diffs
+
+
+def report(diffs: list[ActionDiff], base_run, target_run):
+    import prettytable
+
+    pt = prettytable.PrettyTable([
+        'Action', f'Total({base_run}/{target_run})', 'P50(s)', 'P95(s)',
+        'P50 Change', 'Latency P', 'Failure Rate', 'Failure P', 'Result'])
+    pt.align['Action'] = 'l'
+    for diff in diffs:
+        result = []
+        if diff.latency_regressed:
+            result.append('latency regressed')
+        if diff.failure_regressed:
+            result.append('failure regressed')
+        pt.add_row([
+            diff.action, f'{diff.base.total}/{diff.target.total}',
+            f'{diff.base.p50:.2f}/{diff.target.p50:.2f}',
+            f'{diff.base.p95:.2f}/{diff.target.p95:.2f}',
+            f'{diff.p50_change:+.1%}', f'{diff.latency_p_value:.4f}',
+            f'{diff.base.failure_rate:.1%}/{diff.target.failure_rate:.1%}',
+            f'{diff.failure_p_value:.4f}', ', '.join(result) or 'ok'])
+    LOG.info('compare run {} with {}:\n{}', target_run, base_run, pt)
@@ -26,8 +26,12 @@ class OpenstackConf(cfg2.OptionGroup):
     volume_type = cfg2.Option('volume_type')
     boot_az = cfg2.Option('boot_az')
     nova_api_version = cfg2.Option('nova_api_version', default='2.40')
+    cinder_api_version = cfg2.Option('cinder_api_version', default='3.0')
     connect_retries = cfg2.IntOption('connect_retries', default=1)
     neutron_endpoint = cfg2.Option('neutron_endpoint')
+    port_bulk_size = cfg2.IntOption('port_bulk_size', default=50)
+    list_page_size = cfg2.IntOption('list_page_size', default=500)
+    fast_get = cfg2.BoolOption('fast_get', default=True)
 
 
 class ECSTestConf(cfg2.OptionGroup):
@@ -40,6 +44,8 @@ class ECSTestConf(cfg2.OptionGroup):
 
     boot_wait_interval = cfg2.IntOption('boot_wait_interval', default=1)
     boot_wait_timeout = cfg2.IntOption('boot_wait_timeout', default=600)
+    delete_wait_interval = cfg2.IntOption('delete_wait_interval', default=1)
+    delete_wait_timeout = cfg2.IntOption('delete_wait_timeout', default=600)
 
     detach_interface_wait_interval = cfg2.IntOption(
         'detach_interface_wait_interval', default=1)
@@ -47,9 +53,21 @@ class ECSTestConf(cfg2.OptionGroup):
         'detach_interface_wait_timeout', default=60)
 
     migrate_wait_interval = cfg2.IntOption('migrate_wait_interval', default=5)
-    migrate_wait_timeout = cfg2.IntOption('migrate_wait_timeout', default=60)
+    migrate_wait_timeout = cfg2.IntOption('migrate_wait_timeout', default=600)
     cleanup_error_vms = cfg2.BoolOption('cleanup_error_vms', default=True)
 
+    wait_timeout = cfg2.IntOption('wait_timeout', default=600)
+    wait_interval = cfg2.IntOption('wait_interval', default=1)
+    wait_backoff = cfg2.Option('wait_backoff', default=2.0)
+    wait_max_interval = cfg2.IntOption('wait_max_interval', default=10)
+    wait_jitter = cfg2.Option('wait_jitter', default=0.1)
+    action_wait_intervals = cfg2.ListOption('action_wait_intervals',
+                                            default=[])
+    adaptive_wait = cfg2.BoolOption('adaptive_wait', default=False)
+    adaptive_wait_min_samples = cfg2.IntOption('adaptive_wait_min_samples',
+                                               default=5)
+    latency_prior_run = cfg2.IntOption('latency_prior_run', default=0)
+
     random_actions = cfg2.BoolOption('random_actions', default=False)
     actions = cfg2.ListOption('actions', default=['create'])
 
@@ -75,11 +93,25 @@ class ECSTestConf(cfg2.OptionGroup):
                                              default=[])
     boot_timeout = cfg2.IntOption('timeout', default=60 * 30)
     actions_interval = cfg2.Option('actions_interval')
+    seed = cfg2.IntOption('seed', default=0)
 
     attach_interface_loop_workers = cfg2.IntOption(
         'attach_interface_loop_workers', default=1)
     attach_volume_loop_workers = cfg2.IntOption('attach_volume_loop_workers',
                                                 default=1)
+    boot_storm_count = cfg2.IntOption('boot_storm_count', default=10)
+    barrier_action = cfg2.Option('barrier_action', default='')
+    barrier_timeout = cfg2.IntOption('barrier_timeout', default=3600)
+    checkpoint_file = cfg2.Option('checkpoint_file', default='')
+    checkpoint_interval = cfg2.IntOption('checkpoint_interval', default=60)
+
+    port_pool_size = cfg2.IntOption('port_pool_size', default=0)
+    volume_pool_size = cfg2.IntOption('volume_pool_size', default=0)
+    pool_fill_workers = cfg2.IntOption('pool_fill_workers', default=2)
+    ecs_pool_size = cfg2.IntOption('ecs_pool_size', default=0)
+    ecs_pool_lease_timeout = cfg2.IntOption('ecs_pool_lease_timeout',
+                                            default=3600)
+    spread = cfg2.ListOption('spread', default=[])
 
 
 class RebootConf(cfg2.OptionGroup):
@@ -92,13 +124,65 @@ class HardRebootConf(cfg2.OptionGroup):
     interval = cfg2.IntOption('interval', default=10)
 
 
+class CapacityConf(cfg2.OptionGroup):
+    start_worker = cfg2.IntOption('start_worker', default=10)
+    step_factor = cfg2.IntOption('step_factor', default=2)
+    max_worker = cfg2.IntOption('max_worker', default=320)
+    hold_time = cfg2.IntOption('hold_time', default=300)
+    slo_p95 = cfg2.IntOption('slo_p95', default=600)
+    slo_action_p95 = cfg2.ListOption('slo_action_p95', default=[])
+    slo_failure_rate = cfg2.Option('slo_failure_rate', default=0.05)
+
+
+class ResultsConf(cfg2.OptionGroup):
+    db = cfg2.Option('db', default='')
+    save_events = cfg2.BoolOption('save_events', default=False)
+    analyze_events = cfg2.BoolOption('analyze_events', default=False)
+    batch_size = cfg2.IntOption('batch_size', default=100)
+    flush_interval = cfg2.IntOption('flush_interval', default=5)
+
+
+class WorkloadConf(cfg2.OptionGroup):
+    weights = cfg2.ListOption('weights', default=[])
+    duration = cfg2.IntOption('duration', default=0)
+    count = cfg2.IntOption('count', default=0)
+
+
+class NotificationsConf(cfg2.OptionGroup):
+    url = cfg2.Option('url', default='')
+    exchanges = cfg2.ListOption('exchanges', default=['nova', 'openstack'])
+    topics = cfg2.ListOption('topics', default=['versioned_notifications.info',
+                                                'notifications.info'])
+    fallback_interval = cfg2.IntOption('fallback_interval', default=30)
+
+
+class QuarantineConf(cfg2.OptionGroup):
+    failure_rate = cfg2.Option('failure_rate', default=0)
+    action_p95 = cfg2.ListOption('action_p95', default=[])
+    min_samples = cfg2.IntOption('min_samples', default=5)
+    on_quarantine = cfg2.Option('on_quarantine', default='continue')
+
+
 class AppConf(cfg2.TomlConfig):
     verbose = cfg2.IntOption('verbose', default=0)
     log_file = cfg2.Option('log_file', default=None)
+    log_enqueue = cfg2.BoolOption('log_enqueue', default=False)
+    log_json = cfg2.BoolOption('log_json', default=False)
+    log_rotation = cfg2.Option('log_rotation', default=None)
+    log_compression = cfg2.Option('log_compression', default=None)
+    log_buffer_size = cfg2.IntOption('log_buffer_size', default=-1)
     manager = cfg2.Option('manager', default='openstack')
+    journal_file = cfg2.Option('journal_file', default='')
+    journal_sync_interval = cfg2.Option('journal_sync_interval',
+                                        default=1.0)
 
     openstack = OpenstackConf()
     ecs_test = ECSTestConf()
+    capacity = CapacityConf()
+    results = ResultsConf()
+    workload = WorkloadConf()
+    notifications = NotificationsConf()
+    quarantine = QuarantineConf()
 
 
 def load_configs(conf_file=None):
@@ -116,4 +200,41 @@ def load_configs(conf_file=None):
             files=[str(f) for f in conf_files])
 
 
+def dump_options(secret_options=('auth_password',)) -> dict:
+    """Dump all option values, secret options are masked"""
+    options = {}
+    for group_name, group in vars(type(CONF)).items():
+        if isinstance(group, cfg2.Option):
+            options[group_name] = getattr(CONF, group_name)
+            continue
+        if not isinstance(group, cfg2.OptionGroup):
+            continue
+        options[group_name] = {}
+        for name, option in vars(type(group)).items():
+            if not isinstance(option, cfg2.Option):
+                continue
+            value = getattr(getattr(CONF, group_name), name)
+            if name in secret_options and value:
+                value = '******'
+            options[group_name][name] = value
+    return options
+
+
+def get_option(group, name):
+    try:
+        return getattr(getattr(CONF, group), name)
+    except AttributeError:
+        raise exceptions.InvalidConfig(reason=f'option {group}.{name} '
+                                              'not found')
+
+
+def set_option(group, name, value):
+    try:
+        option = object.__getattribute__(getattr(CONF, group), name)
+    except AttributeError:
+        raise exceptions.InvalidConfig(reason=f'option {group}.{name} '
+                                              'not found')
+    option.set(value)
+
+
 CONF: AppConf = AppConf()
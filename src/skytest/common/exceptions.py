@@ -97,6 +97,10 @@ class VolumeNotFound(base_exc.BaseException):
     _msg = 'Volume {} not found.'
 
 
+class PortNotFound(base_exc.BaseException):
+    _msg = 'Port {} not found.'
+
+
 class EcsCloudAPIError(base_exc.BaseException):
     _msg = 'cloud api error: {}.'
 
@@ -109,5 +113,17 @@ class EcsMatchErrorConsoleLog(base_exc.BaseException):
     _msg = '{} matched error error console log'
 
 
+class EcsQgaNotConnected(base_exc.BaseException):
+    _msg = 'ecs {} qga is not connected, {}'
+
+
 class EcsGuestIsExists(base_exc.BaseException):
     _msg = 'ecs {} guest is still exists'
+
+
+class WaitCancelled(base_exc.BaseException):
+    _msg = 'wait {} is cancelled'
+
+
+class NoHealthyEcs(base_exc.BaseException):
+    _msg = 'no healthy ecs in the pool in {} seconds'
@@ -0,0 +1,135 @@
+"""
+Append-only journal of the resources created by skytest
+
+Every line is a JSON object like:
+    {"time": 1700000000.0, "op": "create", "kind": "ecs", "id": "..."}
+
+The lines are written with one write() of a file opened with O_APPEND, so
+the records of all workers are not interleaved, and a record survives a
+crash of the worker once write() returns. fsync is batched, it only
+protects the records from a crash of the host.
+"""
+import json
+import os
+import threading
+import time
+
+from skytest.common import log
+
+LOG = log.getLogger()
+
+CREATE = 'create'
+DELETE = 'delete'
+
+JOURNAL = None
+
+
+class Journal(object):
+
+    def __init__(self, path, sync_interval=1.0, sync_batch=100) -> None:
+        self.path = path
+        self.sync_interval = sync_interval
+        self.sync_batch = sync_batch
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+                           0o644)
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+
+    def _reopen_after_fork(self):
+        # the lock may be held by a thread which does not exist in the
+        # forked process
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._lock = threading.Lock()
+            self._unsynced = 0
+
+    def record(self, op, kind, resource_id):
+        self.append({'time': time.time(), 'op': op, 'kind': kind,
+                     'id': resource_id})
+
+    def append(self, entry: dict):
+        self._reopen_after_fork()
+        line = json.dumps(entry) + '\n'
+        with self._lock:
+            os.write(self._fd, line.encode())
+            self._unsynced += 1
+            if self._unsynced >= self.sync_batch or \
+               time.monotonic() - self._synced_at >= self.sync_interval:
+                self._sync()
+
+    def _sync(self):
+        os.fsync(self._fd)
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+
+    def close(self):
+        self._reopen_after_fork()
+        with self._lock:
+            if self._unsynced:
+                self._sync()
+            os.close(self._fd)
+
+
+def replay(path) -> dict[str, list[str]]:
+    """Return the ids of the resources which are created but not deleted
+
+    e.g. {'ecs': ['...'], 'volume': ['...']}
+    """
+    live = {}
+    with open(path) as f:
+        for num, line in enumerate(f, start=1):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # the last line may be truncated by a crash of the host
+                LOG.warning('skip invalid line {} of journal {}', num, path)
+                continue
+            resources = live.setdefault(entry['kind'], {})
+            if entry['op'] == CREATE:
+                resources[entry['id']] = True
+            else:
+                resources.pop(entry['id'], None)
+    return {kind: list(ids) for kind, ids in live.items() if ids}
+
+
+def compact(path, live: dict[str, list[str]]):
+    """Rewrite the journal with the create records of live resources"""
+    tmp_file = f'{path}.tmp'
+    with open(tmp_file, 'w') as f:
+        for kind, ids in live.items():
+            for resource_id in ids:
+                f.write(json.dumps({'time': time.time(), 'op': CREATE,
+                                    'kind': kind, 'id': resource_id}) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+
+def init(path, sync_interval=1.0):
+    global JOURNAL
+
+    if not path:
+        return
+    JOURNAL = Journal(path, sync_interval=sync_interval)
+    LOG.info('created resources are recorded to journal {}', path)
+
+
+def record_created(kind, resource_id):
+    if JOURNAL:
+        JOURNAL.record(CREATE, kind, resource_id)
+
+
+def record_deleted(kind, resource_id):
+    """Record the resource is gone, i.e. the delete is confirmed"""
+    if JOURNAL:
+        JOURNAL.record(DELETE, kind, resource_id)
+
+
+def close():
+    global JOURNAL
+
+    if JOURNAL:
+        JOURNAL.close()
+        JOURNAL = None
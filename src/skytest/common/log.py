@@ -1,6 +1,8 @@
+import json
 import logging
 import os
 import sys
+import traceback
 
 from loguru import logger
 from easy2use.globals import log as root_loger
@@ -17,15 +19,45 @@ FILE_LOG_FORMAT = f'{{time:{TIME_FORMAT_DEFAULT}}} ' \
 LOG = logger.bind(ecs='-')
 
 
-def basic_config(verbose_count=0, log_file=None):
+def _json_format(record):
+    exception = record['exception']
+    record['extra']['_json'] = json.dumps({
+        'time': record['time'].isoformat(),
+        'process': record['process'].id,
+        'level': record['level'].name,
+        'ecs': record['extra'].get('ecs', '-'),
+        'action': record['extra'].get('action', '-'),
+        'message': record['message'],
+        # only the type and the value are kept if the record is enqueued
+        'exception': exception and ''.join(traceback.format_exception(
+            exception.type, exception.value, exception.traceback)),
+    }, ensure_ascii=False)
+    return '{extra[_json]}\n'
+
+
+def basic_config(verbose_count=0, log_file=None, enqueue=False,
+                 json_lines=False, rotation=None, compression=None,
+                 buffering=-1):
+    """Configure the loguru sink
+
+    With enqueue, records of all processes are sent to a queue, and only
+    the writer thread of the main process writes to the sink.
+    """
     global LOG
 
-    logger.configure(handlers=[{
+    handler = {
         "sink": log_file or sys.stdout,
         'format': log_file and FILE_LOG_FORMAT or DEFAULT_LOG_FOAMAT,
         "colorize": True,
         "level": "DEBUG" if verbose_count >= 1 else "INFO",
-    }])
+        "enqueue": enqueue,
+    }
+    if json_lines:
+        handler.update(format=_json_format, colorize=False)
+    if log_file:
+        handler.update(rotation=rotation, compression=compression,
+                       buffering=buffering)
+    logger.configure(handlers=[handler])
     if verbose_count and verbose_count >= 2:
         root_loger.basic_config(
             level=logging.DEBUG,
@@ -34,3 +66,14 @@ def basic_config(verbose_count=0, log_file=None):
 
 def getLogger():
     return LOG
+
+
+def contextualize(**kwargs):
+    """Bind extra fields to the records logged in this context"""
+    return logger.contextualize(**kwargs)
+
+
+def shutdown():
+    """Wait for all enqueued records to be written"""
+    logger.complete()
+    logger.remove()
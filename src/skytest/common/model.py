@@ -1,7 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
-@dataclass
+@dataclass(slots=True)
 class ECS:
     id: str
     name: str = ''
@@ -32,12 +32,13 @@ class ECS:
         return not not self.task_state
 
 
-@dataclass
+@dataclass(slots=True)
 class Volume:
     id: str
     size: int
     name: str = ''
     status: str = ''
+    attached_servers: list[str] = field(default_factory=list)
 
     def is_error(self):
         return self.status.upper() == 'ERROR'
@@ -65,6 +66,43 @@ class Port:
     name: int
     status: str = ''
     host: str = ''
+    network_id: str = ''
 
     def is_error(self):
         return self.status.upper() == 'ERROR'
+
+
+@dataclass
+class ServerEvent:
+    action: str
+    request_id: str
+    event: str
+    request_time: str = ''
+    start_time: str = ''
+    finish_time: str = ''
+    host: str = ''
+    result: str = ''
+
+
+@dataclass
+class ActionResult:
+    action: str
+    ecs: str = ''
+    started_at: float = 0
+    elapsed: float = 0
+    ok: bool = True
+    skipped: bool = False
+    host: str = ''
+    polls: int = 0
+    waited: float = 0
+
+
+@dataclass
+class ScenarioResult:
+    ecs: str = ''
+    ok: bool = True
+    error: str = ''
+    started_at: float = 0
+    elapsed: float = 0
+    actions: list[ActionResult] = field(default_factory=list)
+    events: list[ServerEvent] = field(default_factory=list)
@@ -0,0 +1,255 @@
+"""
+Listen the notifications of nova and cinder to wake the waits
+
+The notifications are read from a dump file (file:///path/to/file, one
+notification per line) or an AMQP broker (amqp://..., kombu is required).
+A notification of an instance or volume wakes the waits of it, then the
+wait checks the status immediately. The status is still polled with
+[notifications] fallback_interval, in case a notification is lost.
+
+The listener is started by the first subscription of each process, since
+the thread of it does not exist in the forked workers. The AMQP queues
+are consumed only by the relay of the main process, which appends the
+notifications to a temporary dump file, and the workers listen to the
+dump file.
+"""
+import importlib.util
+import json
+import os
+import socket
+import tempfile
+import threading
+
+from skytest.common import conf
+from skytest.common import exceptions
+from skytest.common import log
+
+CONF = conf.CONF
+LOG = log.getLogger()
+
+# the payload keys of unversioned notifications which are resource ids
+ID_KEYS = ['instance_id', 'instance_uuid', 'volume_id']
+
+_LOCK = threading.Lock()
+_SUBSCRIBERS: dict[str, set[threading.Event]] = {}
+_LISTENER = None
+# (listener, fd) of the relay of the main process, and the dump file of
+# it which is read by the workers, see start_relay
+_RELAY = None
+_RELAY_PATH = None
+
+
+def parse(message: dict) -> tuple[str, list[str]]:
+    """Return the event type and resource ids of a notification
+
+    The message may be an oslo.messaging envelope, a versioned
+    notification or an unversioned notification.
+    """
+    if 'oslo.message' in message:
+        message = json.loads(message['oslo.message'])
+    payload = message.get('payload') or {}
+    ids = []
+    if 'nova_object.data' in payload:
+        data = payload['nova_object.data']
+        if data.get('uuid'):
+            ids.append(data['uuid'])
+        # e.g. volume.attach.end
+        volume_id = data.get('volume_id') or \
+            (data.get('volume') or {}).get('nova_object.data', {}).get('uuid')
+        if volume_id:
+            ids.append(volume_id)
+    else:
+        ids.extend(payload[key] for key in ID_KEYS if payload.get(key))
+    return message.get('event_type', ''), ids
+
+
+def notify(message: dict):
+    try:
+        event_type, ids = parse(message)
+    except (ValueError, TypeError, AttributeError) as e:
+        LOG.warning('invalid notification: {}', e)
+        return
+    with _LOCK:
+        events = [event for resource_id in ids
+                  for event in _SUBSCRIBERS.get(resource_id, [])]
+    if events:
+        LOG.debug('notification {} of {}', event_type, ', '.join(ids))
+    for event in events:
+        event.set()
+
+
+class FileListener(threading.Thread):
+    """Read the notifications appended to a dump file"""
+
+    def __init__(self, path, interval=0.2) -> None:
+        super().__init__(name='notification-listener', daemon=True)
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+        # only the notifications after the listener is created are useful
+        self.offset = os.path.getsize(path)
+
+    def run(self):
+        with open(self.path) as f:
+            f.seek(self.offset)
+            buffer = ''
+            while not self.stopped.is_set():
+                buffer += f.readline()
+                if not buffer.endswith('\n'):
+                    self.stopped.wait(self.interval)
+                    continue
+                line, buffer = buffer.strip(), ''
+                if not line:
+                    continue
+                try:
+                    notify(json.loads(line))
+                except ValueError:
+                    LOG.warning('invalid notification line: {}', line)
+
+
+class AMQPListener(threading.Thread):
+    """Consume the notifications with the queues of this process
+
+    callback is called with each notification, it's notify by default.
+    """
+
+    def __init__(self, url, exchanges, topics, callback=None) -> None:
+        super().__init__(name='notification-listener', daemon=True)
+        self.url = url
+        self.exchanges = exchanges
+        self.topics = topics
+        self.callback = callback or notify
+        self.stopped = threading.Event()
+
+    def _on_message(self, body, message):
+        try:
+            self.callback(body if isinstance(body, dict)
+                          else json.loads(body))
+        except ValueError:
+            LOG.warning('invalid notification: {}', body)
+        message.ack()
+
+    def run(self):
+        import kombu
+
+        queues = [
+            kombu.Queue(f'skytest-{socket.gethostname()}-{os.getpid()}-'
+                        f'{exchange}-{topic}',
+                        exchange=kombu.Exchange(exchange, type='topic',
+                                                durable=False),
+                        routing_key=topic, exclusive=True, auto_delete=True)
+            for exchange in self.exchanges for topic in self.topics
+        ]
+        while not self.stopped.is_set():
+            try:
+                with kombu.Connection(self.url) as connection, \
+                        connection.Consumer(queues,
+                                            callbacks=[self._on_message]):
+                    while not self.stopped.is_set():
+                        try:
+                            connection.drain_events(timeout=1)
+                        except socket.timeout:
+                            pass
+            except Exception as e:
+                LOG.warning('consume notifications failed: {}', e)
+                self.stopped.wait(5)
+
+
+def _check_kombu(url):
+    if not importlib.util.find_spec('kombu'):
+        raise exceptions.InvalidConfig(
+            reason=f'kombu is required by notifications url {url}')
+
+
+def _create_listener():
+    url = CONF.notifications.url
+    if _RELAY_PATH:
+        return FileListener(_RELAY_PATH)
+    if url.startswith('file://'):
+        return FileListener(url[len('file://'):])
+    _check_kombu(url)
+    return AMQPListener(url, CONF.notifications.exchanges,
+                        CONF.notifications.topics)
+
+
+def enabled() -> bool:
+    return bool(CONF.notifications.url)
+
+
+def start_relay():
+    """Consume the AMQP notifications in the main process
+
+    It's called before the workers are forked, then all workers share
+    the queues of the relay rather than declaring their own.
+    """
+    global _RELAY, _RELAY_PATH
+
+    url = CONF.notifications.url
+    if not url or url.startswith('file://') or _RELAY:
+        return
+    _check_kombu(url)
+    fd, path = tempfile.mkstemp(prefix='skytest-notifications-',
+                                suffix='.jsonl')
+
+    def _append(message: dict):
+        os.write(fd, (json.dumps(message) + '\n').encode())
+
+    listener = AMQPListener(url, CONF.notifications.exchanges,
+                            CONF.notifications.topics, callback=_append)
+    listener.start()
+    _RELAY, _RELAY_PATH = (listener, fd), path
+    LOG.info('relay notifications from {} to {}', url, path)
+
+
+def _ensure_started():
+    global _LISTENER
+
+    if _LISTENER:
+        return
+    _LISTENER = _create_listener()
+    _LISTENER.start()
+    LOG.info('listening notifications from {}', CONF.notifications.url)
+
+
+def _reset_after_fork():
+    global _LOCK, _LISTENER, _RELAY
+
+    # the lock may be held by the listener thread of the parent, which
+    # does not exist in the forked process
+    _LOCK = threading.Lock()
+    _SUBSCRIBERS.clear()
+    _LISTENER = None
+    # the dump file of the relay is still read, but it's owned by the parent
+    _RELAY = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def subscribe(resource_id, event: threading.Event):
+    """Set the event when a notification of the resource is received"""
+    with _LOCK:
+        _ensure_started()
+        _SUBSCRIBERS.setdefault(resource_id, set()).add(event)
+
+
+def unsubscribe(resource_id, event: threading.Event):
+    with _LOCK:
+        events = _SUBSCRIBERS.get(resource_id, set())
+        events.discard(event)
+        if not events:
+            _SUBSCRIBERS.pop(resource_id, None)
+
+
+def stop():
+    global _LISTENER, _RELAY, _RELAY_PATH
+
+    if _LISTENER:
+        _LISTENER.stopped.set()
+        _LISTENER = None
+    if _RELAY:
+        listener, fd = _RELAY
+        listener.stopped.set()
+        os.close(fd)
+        os.remove(_RELAY_PATH)
+        _RELAY, _RELAY_PATH = None, None
@@ -0,0 +1,172 @@
+"""
+Profile every worker and merge the profiles
+
+The profiles of the scenarios are accumulated in each worker, and dumped
+once when the worker exits, into two files of the profile dir:
+    <pid>.prof       cProfile stats of the thread which runs the test
+    <pid>.collapsed  sampled stacks of all threads, for flamegraphs
+"""
+import collections
+import contextlib
+import cProfile
+import multiprocessing.util
+import os
+import pathlib
+import pstats
+import sys
+import threading
+
+from skytest.common import log
+
+LOG = log.getLogger()
+
+PROFILE_DIR = None
+SAMPLE_INTERVAL = 0.01
+
+# the profile and the sampled stacks of this process, see _dump
+_PROFILE: cProfile.Profile = None
+_STACKS = collections.Counter()
+
+
+def enable(profile_dir, sample_interval=0.01):
+    """Enable profiling, must be called before the workers are forked"""
+    global PROFILE_DIR, SAMPLE_INTERVAL
+
+    PROFILE_DIR = pathlib.Path(profile_dir).absolute()
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    for file in PROFILE_DIR.glob('*'):
+        if file.suffix in ['.prof', '.collapsed']:
+            file.unlink()
+    SAMPLE_INTERVAL = sample_interval
+    LOG.info('profiles will be saved to {}', PROFILE_DIR)
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:' \
+           f'{code.co_firstlineno})'
+
+
+class StackSampler(object):
+
+    def __init__(self, interval=0.01) -> None:
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                names = []
+                while frame:
+                    names.append(_frame_name(frame))
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def _write_collapsed(file, stacks: collections.Counter):
+    with open(file, 'w') as f:
+        for stack, count in stacks.most_common():
+            f.write(f'{stack} {count}\n')
+
+
+def _reset_after_fork():
+    global _PROFILE
+
+    # the profile of the parent is dumped by the parent
+    _PROFILE = None
+    _STACKS.clear()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _dump():
+    """Dump the profile of this process, it's called once at exit"""
+    global _PROFILE
+
+    if not _PROFILE:
+        return
+    file_prefix = PROFILE_DIR.joinpath(str(os.getpid()))
+    _PROFILE.dump_stats(f'{file_prefix}.prof')
+    _write_collapsed(f'{file_prefix}.collapsed', _STACKS)
+    _PROFILE = None
+    _STACKS.clear()
+
+
+@contextlib.contextmanager
+def profile():
+    """Profile the code in this context if profiling is enabled"""
+    global _PROFILE
+
+    if not PROFILE_DIR:
+        yield
+        return
+
+    if not _PROFILE:
+        _PROFILE = cProfile.Profile()
+        # the workers exit without running atexit, but the finalizers of
+        # multiprocessing are run
+        multiprocessing.util.Finalize(None, _dump, exitpriority=0)
+    sampler = StackSampler(interval=SAMPLE_INTERVAL)
+    sampler.start()
+    _PROFILE.enable()
+    try:
+        yield
+    finally:
+        _PROFILE.disable()
+        sampler.stop()
+        _STACKS.update(sampler.stacks)
+
+
+def merge(top=30):
+    """Merge profiles of all workers and report the top functions"""
+    import prettytable
+
+    if not PROFILE_DIR:
+        return
+    # the scenarios run by this process, e.g. worker is 1
+    _dump()
+    prof_files = [str(f) for f in PROFILE_DIR.glob('*.prof')
+                  if f.name != 'merged.prof']
+    if not prof_files:
+        LOG.warning('no profile found in {}', PROFILE_DIR)
+        return
+
+    stats = pstats.Stats(*prof_files)
+    stats.dump_stats(PROFILE_DIR.joinpath('merged.prof'))
+    pt = prettytable.PrettyTable(['Function', 'Calls', 'Self Time(s)',
+                                  'Cumulative Time(s)'])
+    pt.align['Function'] = 'l'
+    functions = sorted(stats.stats.items(), key=lambda x: x[1][2],
+                       reverse=True)
+    for (filename, line, name), (_, calls, tottime, cumtime, _) in \
+            functions[:top]:
+        pt.add_row([f'{name} ({os.path.basename(filename)}:{line})',
+                    calls, f'{tottime:.3f}', f'{cumtime:.3f}'])
+    LOG.info('top {} functions by self time of {} profile(s):\n{}',
+             top, len(prof_files), pt)
+
+    stacks = collections.Counter()
+    for file in PROFILE_DIR.glob('*.collapsed'):
+        if file.name == 'merged.collapsed':
+            continue
+        with open(file) as f:
+            for line in f:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+                stacks[stack] += int(count)
+    _write_collapsed(PROFILE_DIR.joinpath('merged.collapsed'), stacks)
+    LOG.info('merged profiles: {}, collapsed stacks for flamegraph: {}',
+             PROFILE_DIR.joinpath('merged.prof'),
+             PROFILE_DIR.joinpath('merged.collapsed'))
@@ -0,0 +1,151 @@
+import math
+from dataclasses import dataclass
+
+from skytest.common import model
+
+
+def percentile(values: list, percent) -> float:
+    if not values:
+        return 0
+    values = sorted(values)
+    k = (len(values) - 1) * percent / 100
+    low, high = math.floor(k), math.ceil(k)
+    if low == high:
+        return values[int(k)]
+    return values[low] * (high - k) + values[high] * (k - low)
+
+
+@dataclass
+class ActionStats:
+    action: str
+    total: int = 0
+    failed: int = 0
+    p50: float = 0
+    p95: float = 0
+    p99: float = 0
+    max: float = 0
+
+    @property
+    def failure_rate(self) -> float:
+        return self.total and self.failed / self.total or 0
+
+
+def summarize_actions(results: list[model.ScenarioResult]) -> dict:
+    """Group action results by action name
+
+    Skipped actions are not counted, elapsed of failed actions are not
+    used to calculate percentiles.
+    """
+    elapsed, failed = {}, {}
+    for result in results:
+        for action in result.actions:
+            if action.skipped:
+                continue
+            elapsed.setdefault(action.action, [])
+            failed.setdefault(action.action, 0)
+            if action.ok:
+                elapsed[action.action].append(action.elapsed)
+            else:
+                failed[action.action] += 1
+
+    summary = {}
+    for name, values in elapsed.items():
+        summary[name] = ActionStats(
+            name, total=len(values) + failed[name], failed=failed[name],
+            p50=percentile(values, 50), p95=percentile(values, 95),
+            p99=percentile(values, 99), max=values and max(values) or 0)
+    return summary
+
+
+def throughput(results: list[model.ScenarioResult], duration,
+               until=None) -> float:
+    """Completed (not skipped) actions per minute
+
+    If until is set, the actions completed after it are not counted, e.g.
+    the drain of a run for a fixed duration.
+    """
+    if not duration:
+        return 0
+    actions = sum(len([a for a in r.actions if a.ok and not a.skipped and
+                       (until is None or a.started_at + a.elapsed <= until)])
+                  for r in results)
+    return actions * 60 / duration
+
+
+def format_actions_table(summary: dict):
+    import prettytable
+
+    pt = prettytable.PrettyTable(['Action', 'Total', 'Failed', 'P50(s)',
+                                  'P95(s)', 'P99(s)', 'Max(s)'])
+    pt.align['Action'] = 'l'
+    for name, stats in sorted(summary.items()):
+        pt.add_row([name, stats.total, stats.failed,
+                    f'{stats.p50:.2f}', f'{stats.p95:.2f}',
+                    f'{stats.p99:.2f}', f'{stats.max:.2f}'])
+    return pt
+
+
+def find_knee(points: list[tuple]) -> tuple:
+    """Find the knee of a increasing curve
+
+    The knee is the point with the max distance to the line which joins
+    the first point and the last point, after both axes are normalized.
+    """
+    if len(points) < 3:
+        return points and points[-1] or None
+    x0, y0 = points[0]
+    x1, y1 = points[-1]
+    if x1 == x0 or y1 == y0:
+        return points[-1]
+    distances = [
+        (y - y0) / (y1 - y0) - (x - x0) / (x1 - x0) for x, y in points
+    ]
+    return points[distances.index(max(distances))]
+
+
+def _normal_sf(z) -> float:
+    """Two-sided p value of standard normal distribution"""
+    return math.erfc(abs(z) / math.sqrt(2))
+
+
+def mann_whitney_u(values_a: list, values_b: list) -> float:
+    """Return the two-sided p value of Mann-Whitney U test
+
+    Normal approximation with tie correction is used, it's good enough
+    when both samples have more than 8 values.
+    """
+    n1, n2 = len(values_a), len(values_b)
+    if not n1 or not n2:
+        return 1.0
+    merged = sorted([(v, 0) for v in values_a] + [(v, 1) for v in values_b])
+    ranks = [0.0] * len(merged)
+    ties = 0
+    i = 0
+    while i < len(merged):
+        j = i
+        while j + 1 < len(merged) and merged[j + 1][0] == merged[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        count = j - i + 1
+        ties += count ** 3 - count
+        i = j + 1
+    rank_sum_a = sum(rank for rank, (_, group) in zip(ranks, merged)
+                     if group == 0)
+    u = rank_sum_a - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1))))
+    if not sigma:
+        return 1.0
+    return _normal_sf((u - n1 * n2 / 2) / sigma)
+
+
+def two_proportion_z(failed_a, total_a, failed_b, total_b) -> float:
+    """Return the two-sided p value of two proportion z test"""
+    if not total_a or not total_b:
+        return 1.0
+    pooled = (failed_a + failed_b) / (total_a + total_b)
+    sigma = math.sqrt(pooled * (1 - pooled) * (1 / total_a + 1 / total_b))
+    if not sigma:
+        return 1.0
+    return _normal_sf((failed_a / total_a - failed_b / total_b) / sigma)
@@ -0,0 +1,231 @@
+"""
+Persist test results into a local sqlite database
+"""
+from concurrent import futures
+import json
+import queue
+import sqlite3
+import threading
+import time
+
+from skytest.common import conf
+from skytest.common import log
+from skytest.common import model
+
+CONF = conf.CONF
+LOG = log.getLogger()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT, mode TEXT, started_at REAL, finished_at REAL, config TEXT
+);
+CREATE TABLE IF NOT EXISTS scenarios (
+    run_id INTEGER, seq INTEGER, ecs TEXT, ok INTEGER, error TEXT,
+    started_at REAL, elapsed REAL
+);
+CREATE TABLE IF NOT EXISTS actions (
+    run_id INTEGER, seq INTEGER, ecs TEXT, action TEXT, ok INTEGER,
+    skipped INTEGER, started_at REAL, elapsed REAL, host TEXT
+);
+CREATE TABLE IF NOT EXISTS events (
+    run_id INTEGER, seq INTEGER, ecs TEXT, action TEXT, request_id TEXT,
+    request_time TEXT, event TEXT, start_time TEXT, finish_time TEXT,
+    host TEXT, result TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_actions_run ON actions (run_id, action);
+"""
+
+STORE = None
+
+
+class ResultStore(object):
+    """Write results in a background thread with batches
+
+    All of the writes are executed by the writer thread, so the sqlite
+    connection is never shared between threads.
+    """
+
+    def __init__(self, db_file, batch_size=100, flush_interval=5) -> None:
+        self.db_file = db_file
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.run_id = None
+        self._seq = 0
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.db_file)
+        connection.executescript(SCHEMA)
+        return connection
+
+    def _call(self, func, *args):
+        """Run func in writer thread and wait for the result"""
+        future = futures.Future()
+        self._queue.put(('call', (future, func, args)))
+        return future.result()
+
+    def _write_loop(self):
+        connection = self._connect()
+        while True:
+            items = [self._queue.get()]
+            deadline = time.time() + self.flush_interval
+            while items[-1][0] == 'rows' and len(items) < self.batch_size:
+                try:
+                    items.append(self._queue.get(
+                        timeout=max(deadline - time.time(), 0)))
+                except queue.Empty:
+                    break
+            rows = [item[1] for item in items if item[0] == 'rows']
+            try:
+                self._write_rows(connection, rows)
+            except sqlite3.Error as e:
+                LOG.error('save {} result(s) failed: {}', len(rows), e)
+            if items[-1][0] != 'call':
+                continue
+            future, func, args = items[-1][1]
+            try:
+                future.set_result(func(connection, *args))
+            except Exception as e:
+                future.set_exception(e)
+            if func is _close:
+                return
+
+    def _write_rows(self, connection, rows):
+        if not rows:
+            return
+        with connection:
+            for table in ['scenarios', 'actions', 'events']:
+                values = [value for row in rows for value in row[table]]
+                if not values:
+                    continue
+                connection.executemany(
+                    f'INSERT INTO {table} VALUES '
+                    f'({",".join(["?"] * len(values[0]))})', values)
+        LOG.debug('saved {} result(s)', len(rows))
+
+    def start_run(self, name='', mode='default') -> int:
+        self.run_id = self._call(_insert_run, name, mode,
+                                 json.dumps(conf.dump_options()))
+        self._seq = 0
+        LOG.info('results will be saved to {} with run id {}',
+                 self.db_file, self.run_id)
+        return self.run_id
+
+    def finish_run(self):
+        if not self.run_id:
+            return
+        self._call(_finish_run, self.run_id)
+        self.run_id = None
+
+    def add_result(self, result: model.ScenarioResult):
+        if not self.run_id:
+            return
+        self._seq += 1
+        run_id, seq = self.run_id, self._seq
+        self._queue.put(('rows', {
+            'scenarios': [(run_id, seq, result.ecs, result.ok, result.error,
+                           result.started_at, result.elapsed)],
+            'actions': [(run_id, seq, a.ecs, a.action, a.ok, a.skipped,
+                         a.started_at, a.elapsed, a.host)
+                        for a in result.actions],
+            'events': [(run_id, seq, result.ecs, e.action, e.request_id,
+                        e.request_time, e.event, e.start_time, e.finish_time,
+                        e.host, e.result)
+                       for e in result.events],
+        }))
+
+    def close(self):
+        self.finish_run()
+        self._call(_close)
+        self._writer.join()
+
+    def get_run(self, run_id) -> dict:
+        return self._call(_select_run, run_id)
+
+    def get_actions(self, run_id) -> list[model.ActionResult]:
+        return self._call(_select_actions, run_id)
+
+    def get_events(self, run_id) -> list[tuple]:
+        """Return [(ecs, model.ServerEvent), ...]"""
+        return self._call(_select_events, run_id)
+
+
+def _insert_run(connection, name, mode, config):
+    with connection:
+        cursor = connection.execute(
+            'INSERT INTO runs (name, mode, started_at, config) '
+            'VALUES (?, ?, ?, ?)', (name, mode, time.time(), config))
+    return cursor.lastrowid
+
+
+def _finish_run(connection, run_id):
+    with connection:
+        connection.execute('UPDATE runs SET finished_at = ? WHERE id = ?',
+                           (time.time(), run_id))
+
+
+def _close(connection):
+    connection.close()
+
+
+def _select_run(connection, run_id):
+    row = connection.execute(
+        'SELECT id, name, mode, started_at, finished_at, config FROM runs '
+        'WHERE id = ?', (run_id,)).fetchone()
+    if not row:
+        return None
+    return {'id': row[0], 'name': row[1], 'mode': row[2],
+            'started_at': row[3], 'finished_at': row[4],
+            'config': json.loads(row[5] or '{}')}
+
+
+def _select_actions(connection, run_id):
+    return [
+        model.ActionResult(row[0], ecs=row[1], ok=bool(row[2]),
+                           skipped=bool(row[3]), started_at=row[4],
+                           elapsed=row[5], host=row[6])
+        for row in connection.execute(
+            'SELECT action, ecs, ok, skipped, started_at, elapsed, host '
+            'FROM actions WHERE run_id = ?', (run_id,))
+    ]
+
+
+def _select_events(connection, run_id):
+    return [
+        (row[0], model.ServerEvent(*row[1:]))
+        for row in connection.execute(
+            'SELECT ecs, action, request_id, event, request_time, '
+            'start_time, finish_time, host, result '
+            'FROM events WHERE run_id = ?', (run_id,))
+    ]
+
+
+def init():
+    global STORE
+
+    if not CONF.results.db:
+        return None
+    STORE = ResultStore(CONF.results.db, batch_size=CONF.results.batch_size,
+                        flush_interval=CONF.results.flush_interval)
+    return STORE
+
+
+def start_run(name='', mode='default'):
+    if STORE:
+        STORE.start_run(name=name, mode=mode)
+
+
+def save(result: model.ScenarioResult):
+    if STORE:
+        STORE.add_result(result)
+
+
+def close():
+    global STORE
+
+    if STORE:
+        STORE.close()
+        STORE = None
@@ -0,0 +1,96 @@
+"""
+Timeline of the scenarios executed by action-test, used to replay them
+
+The records are appended to the timeline file as JSON lines:
+    {"type": "run", "seed": 123, "worker": 10, "total": 100,
+     "started_at": 1700000000.0}
+    {"type": "scenario", "index": 3, "offset": 1.5,
+     "actions": ["create", "reboot"], "sleeps": [0, 5]}
+
+offset is the seconds from the start of the run to the start of the
+scenario, sleeps[i] is the seconds slept before actions[i].
+"""
+from dataclasses import dataclass, field
+import json
+import time
+
+from skytest.common import journal
+from skytest.common import log
+
+LOG = log.getLogger()
+
+TIMELINE: journal.Journal = None
+# the start time of the run, the scenarios of a replay are started at
+# the same offsets from it
+STARTED_AT = None
+
+
+@dataclass
+class ScenarioRecord:
+    index: int
+    offset: float = 0
+    actions: list[str] = field(default_factory=list)
+    sleeps: list[float] = field(default_factory=list)
+
+
+@dataclass
+class Timeline:
+    seed: int = 0
+    worker: int = 1
+    total: int = 0
+    scenarios: list[ScenarioRecord] = field(default_factory=list)
+
+
+def load(path) -> Timeline:
+    timeline = Timeline()
+    with open(path) as f:
+        for num, line in enumerate(f, start=1):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                LOG.warning('skip invalid line {} of timeline {}', num, path)
+                continue
+            if entry.pop('type') == 'run':
+                timeline.seed = entry['seed']
+                timeline.worker = entry['worker']
+                timeline.total = entry['total']
+            else:
+                timeline.scenarios.append(ScenarioRecord(**entry))
+    timeline.scenarios.sort(key=lambda s: s.offset)
+    return timeline
+
+
+def start(path=None, seed=0, worker=1, total=0):
+    """Start the clock of the run, and record the run if path is set"""
+    global TIMELINE, STARTED_AT
+
+    STARTED_AT = time.time()
+    if not path:
+        return
+    open(path, 'w').close()
+    TIMELINE = journal.Journal(path)
+    TIMELINE.append({'type': 'run', 'seed': seed, 'worker': worker,
+                     'total': total, 'started_at': STARTED_AT})
+    LOG.info('timeline is recorded to {}', path)
+
+
+def record(index, started_at, actions: list[str], sleeps: list[float]):
+    if TIMELINE:
+        TIMELINE.append({'type': 'scenario', 'index': index,
+                         'offset': round(started_at - STARTED_AT, 3),
+                         'actions': actions, 'sleeps': sleeps})
+
+
+def wait_offset(offset):
+    """Sleep until the offset from the start of the run"""
+    delay = STARTED_AT + offset - time.time()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def close():
+    global TIMELINE
+
+    if TIMELINE:
+        TIMELINE.close()
+        TIMELINE = None
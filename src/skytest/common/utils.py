@@ -1,10 +1,12 @@
 from concurrent import futures
+import contextvars
 import functools
 import json
 import os
 import time
 import pathlib
 import re
+import threading
 
 from easy2use import date
 from skytest.common import exceptions
@@ -71,16 +73,50 @@ def do_times(options=None):
 
 
 # TODO: move this to easy2use
-def run_processes(func, maps=None, max_workers=1, nums=None):
-    with futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+def run_processes(func, maps=None, max_workers=1, nums=None,
+                  initializer=None, initargs=()):
+    with futures.ProcessPoolExecutor(max_workers=max_workers,
+                                     initializer=initializer,
+                                     initargs=initargs) as executor:
+        tasks = []
         if maps:
-            tasks = executor.map(func, maps)
+            tasks = [executor.submit(func, item) for item in maps]
         elif nums:
             tasks = [executor.submit(func) for _ in range(nums)]
-        for future in futures.as_completed(tasks):
+        try:
+            for future in futures.as_completed(tasks):
+                yield future.result()
+        finally:
+            # the caller stopped early, don't start the pending tasks
+            executor.shutdown(cancel_futures=True)
+
+
+def run_threads(func, items, max_workers=1):
+    """Like ThreadPoolExecutor.map, but each task runs in a copy of the
+    caller's context, so the context variables (e.g. the action that the
+    waits are counted in) are visible in the threads
+    """
+    with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        tasks = [executor.submit(contextvars.copy_context().run, func, item)
+                 for item in items]
+        for future in tasks:
             yield future.result()
 
 
+def run_processes_for(func, duration, max_workers=1):
+    """Keep max_workers tasks running until duration seconds elapsed"""
+    deadline = time.time() + duration
+    with futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        tasks = {executor.submit(func) for _ in range(max_workers)}
+        while tasks:
+            done, tasks = futures.wait(tasks,
+                                       return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                if time.time() < deadline:
+                    tasks.add(executor.submit(func))
+                yield future.result()
+
+
 def generate_name(resource):
     return 'skytest-{}-{}'.format(resource,
                                   date.now_str(date_fmt='%m%d-%H:%M:%S'))
@@ -118,6 +154,25 @@ def is_uint(value: str):
     return re.match(r'[0-9]+', value) is not None
 
 
+class RateLimiter(object):
+    """Allow at most rate calls per second, shared by threads"""
+
+    def __init__(self, rate) -> None:
+        self.interval = 1.0 / rate if rate and rate > 0 else 0
+        self._lock = threading.Lock()
+        self._next_time = 0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait_until = max(self._next_time, now)
+            self._next_time = wait_until + self.interval
+        if wait_until > now:
+            time.sleep(wait_until - now)
+
+
 class CircularQueue(object):
 
     def __init__(self, items: list, current=None) -> None:
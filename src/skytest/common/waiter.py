@@ -0,0 +1,345 @@
+"""
+Deadline based wait engine
+
+A wait calls the check function until it returns without raising one of
+the retry exceptions, the deadline is reached or the wait is cancelled.
+The policy of a wait is resolved from the config when the wait is called,
+not when the module is imported, so the configured timeouts take effect.
+
+If adaptive_wait is enabled, the durations of the waits are learned per
+action, once there are enough samples, a wait sleeps until the fastest ones
+are expected to complete, then polls with the minimum interval until the
+slowest ones, and backs off after that. The durations are learned by each
+worker process and not shared, so every worker needs its own samples. The
+priors of latency_prior_run are loaded before the workers are forked, so
+they are the same in all workers.
+
+If the notifications are enabled, a wait of a resource is woken by the
+notifications of it and polls with [notifications] fallback_interval, which
+is capped at the longest interval of the policy.
+"""
+import collections
+import contextlib
+import contextvars
+from dataclasses import dataclass
+import functools
+import random
+import threading
+import time
+
+from skytest.common import conf
+from skytest.common import exceptions
+from skytest.common import log
+from skytest.common import model
+from skytest.common import notifications
+from skytest.common import stats
+
+CONF = conf.CONF
+LOG = log.getLogger()
+
+# set by cancel_all() to cancel all waits of this process
+CANCEL = threading.Event()
+_SLEEPERS: set[threading.Event] = set()
+_SLEEPERS_LOCK = threading.Lock()
+
+
+@dataclass
+class WaitPolicy:
+    timeout: float
+    interval: float = 1
+    backoff: float = 1
+    max_interval: float = 10
+    jitter: float = 0
+
+
+@dataclass
+class WaitStats:
+    polls: int = 0
+    waited: float = 0
+    timeouts: int = 0
+
+    def add(self, polls, waited, timeout=False):
+        self.polls += polls
+        self.waited += waited
+        self.timeouts += timeout and 1 or 0
+
+
+class LatencyModel(object):
+    """The durations of a wait, the latest max_samples are kept"""
+
+    def __init__(self, max_samples=200, early_factor=1.0) -> None:
+        self.early_factor = early_factor
+        self._samples = collections.deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._samples)
+
+    def add(self, elapsed):
+        with self._lock:
+            self._samples.append(elapsed)
+
+    def window(self) -> tuple[float, float]:
+        """Return the time range in which most of the waits complete"""
+        with self._lock:
+            samples = list(self._samples)
+        return (stats.percentile(samples, 10) * self.early_factor,
+                stats.percentile(samples, 90))
+
+    def next_sleep(self, elapsed, interval):
+        """Return the sleep time, or None if it's after the window"""
+        low, high = self.window()
+        if elapsed < low:
+            return low - elapsed
+        if elapsed <= high:
+            return interval
+        return None
+
+
+# {"<action>/<wait name>": LatencyModel}, learned in this process only,
+# the models of the other workers are not shared
+MODELS = {}
+# {"<action>": LatencyModel}, loaded from the results of a previous run
+PRIORS = {}
+# the waits which complete the action, the action elapsed of a previous
+# run is a good prior of them
+COMPLETION_WAITS = ['ecs_created', 'ecs_deleted', 'ecs_task_finished',
+                    'ecs_migrated']
+# the action elapsed includes the request and the checks after the wait,
+# so the wait may complete earlier than it
+PRIOR_EARLY_FACTOR = 0.5
+
+
+def load_priors(results: list[model.ActionResult]):
+    """Load the elapsed of the succeed actions of a previous run"""
+    for result in results:
+        if not result.ok or result.skipped:
+            continue
+        if result.action not in PRIORS:
+            PRIORS[result.action] = LatencyModel(
+                early_factor=PRIOR_EARLY_FACTOR)
+        PRIORS[result.action].add(result.elapsed)
+    LOG.info('loaded latency of {} action(s): {}', len(PRIORS),
+             ', '.join(f'{name}({len(m)})' for name, m in PRIORS.items()))
+
+
+def _get_model(action_name, name) -> LatencyModel:
+    """Return the learned model, or the prior if it's not ready"""
+    if not CONF.ecs_test.adaptive_wait:
+        return None
+    min_samples = CONF.ecs_test.adaptive_wait_min_samples
+    learned = MODELS.get(f'{action_name}/{name}')
+    if learned and len(learned) >= min_samples:
+        return learned
+    prior = PRIORS.get(action_name)
+    if name in COMPLETION_WAITS and prior and len(prior) >= min_samples:
+        return prior
+    return None
+
+
+def _learn(action_name, name, elapsed):
+    if not CONF.ecs_test.adaptive_wait:
+        return
+    key = f'{action_name}/{name}'
+    if key not in MODELS:
+        MODELS.setdefault(key, LatencyModel())
+    MODELS[key].add(elapsed)
+
+
+# the action which is running and the stats of its waits
+_ACTION = contextvars.ContextVar('action', default=None)
+_ACTION_STATS = contextvars.ContextVar('action_stats', default=None)
+
+
+@contextlib.contextmanager
+def action(name):
+    """Count the waits of the action, and use the poll interval of it"""
+    stats = WaitStats()
+    action_token = _ACTION.set(name)
+    stats_token = _ACTION_STATS.set(stats)
+    try:
+        yield stats
+    finally:
+        _ACTION.reset(action_token)
+        _ACTION_STATS.reset(stats_token)
+
+
+def _action_interval(action_name):
+    for item in CONF.ecs_test.action_wait_intervals or []:
+        name, _, interval = item.partition(':')
+        if name == action_name and interval:
+            return float(interval)
+    return None
+
+
+def _policy(timeout=None, interval=None, backoff=None, max_interval=None):
+    return WaitPolicy(
+        timeout or CONF.ecs_test.wait_timeout,
+        interval=interval or CONF.ecs_test.wait_interval,
+        backoff=backoff or float(CONF.ecs_test.wait_backoff),
+        max_interval=max_interval or CONF.ecs_test.wait_max_interval,
+        jitter=float(CONF.ecs_test.wait_jitter))
+
+
+def _retry_policy(tries, delay, backoff=1, max_delay=None):
+    """The policy with the same bounds as the former retry decorator"""
+    max_delay = max_delay or delay
+    timeout, interval = 0, delay
+    for _ in range(tries - 1):
+        timeout += interval
+        interval = min(interval * backoff, max_delay)
+    return WaitPolicy(timeout, interval=delay, backoff=backoff,
+                      max_interval=max_delay)
+
+
+POLICIES = {
+    'ecs_created': lambda: _policy(
+        timeout=CONF.ecs_test.boot_timeout,
+        interval=CONF.ecs_test.boot_wait_interval, max_interval=5),
+    'ecs_deleted': lambda: _policy(
+        timeout=CONF.ecs_test.delete_wait_timeout,
+        interval=CONF.ecs_test.delete_wait_interval),
+    'ecs_task_finished': lambda: _policy(max_interval=5),
+    'ecs_migrated': lambda: _policy(
+        timeout=CONF.ecs_test.migrate_wait_timeout,
+        interval=CONF.ecs_test.migrate_wait_interval, backoff=1),
+    'interface_detached': lambda: _policy(
+        timeout=CONF.ecs_test.detach_interface_wait_timeout,
+        interval=CONF.ecs_test.detach_interface_wait_interval, backoff=1),
+    'console_log': lambda: _policy(
+        timeout=CONF.ecs_test.console_log_timeout, max_interval=5),
+    'qga_connected': lambda: _policy(
+        timeout=CONF.ecs_test.boot_timeout, interval=5, backoff=1),
+    'volume_created': lambda: _retry_policy(60, 1, backoff=2, max_delay=10),
+    'volume_deleted': lambda: _retry_policy(60, 1, backoff=2, max_delay=10),
+    'volume_available': lambda: _retry_policy(60, 1, backoff=2,
+                                              max_delay=10),
+    'volume_inuse': lambda: _retry_policy(60, 1, backoff=2, max_delay=10),
+    'guest_ipaddress': lambda: _retry_policy(6, 1, backoff=2, max_delay=10),
+    'guest_block': lambda: _retry_policy(60, 1, backoff=2, max_delay=10),
+    'guest_block_size': lambda: _retry_policy(12, 1, backoff=2, max_delay=5),
+    'guest_hostname': lambda: _retry_policy(10, 1, max_delay=6),
+    'guest_active': lambda: _retry_policy(12, 5),
+    'guest_not_exists': lambda: _retry_policy(60, 5),
+    # the polls of the manager, the timeout is passed by the caller
+    'ecs_status': lambda: _policy(interval=5, backoff=1),
+    'volume_not_found': lambda: _policy(interval=5, backoff=1),
+    'action_events': lambda: _policy(timeout=5, backoff=1),
+}
+
+
+def get_policy(name, timeout=None, interval=None) -> WaitPolicy:
+    """Return the policy of the wait, timeout and interval override it"""
+    policy = POLICIES.get(name, _policy)()
+    interval = interval or _action_interval(_ACTION.get())
+    if interval:
+        policy.interval = interval
+    if timeout:
+        policy.timeout = timeout
+    return policy
+
+
+def _sleep_time(interval, jitter):
+    if not jitter:
+        return interval
+    return interval * random.uniform(1 - jitter, 1 + jitter)
+
+
+def cancel_all():
+    CANCEL.set()
+    with _SLEEPERS_LOCK:
+        for wake in _SLEEPERS:
+            wake.set()
+
+
+def wait(check, name, retry_on=(AssertionError,), policy: WaitPolicy = None,
+         resource_id=None):
+    """Call check until it does not raise retry_on, return its result
+
+    The last error of check is raised if the deadline is reached, and
+    WaitCancelled is raised if the wait is cancelled. The notifications
+    of resource_id wake the wait to check it immediately.
+    """
+    policy = policy or get_policy(name)
+    wake = threading.Event()
+    with _SLEEPERS_LOCK:
+        _SLEEPERS.add(wake)
+    if resource_id and notifications.enabled():
+        notifications.subscribe(resource_id, wake)
+        # never poll slower than the policy does without notifications
+        longest = policy.interval if policy.backoff <= 1 else \
+            max(policy.interval, policy.max_interval)
+        fallback_interval = min(CONF.notifications.fallback_interval,
+                                longest)
+    else:
+        resource_id, fallback_interval = None, 0
+    try:
+        return _wait(check, name, retry_on, policy, wake, fallback_interval)
+    finally:
+        with _SLEEPERS_LOCK:
+            _SLEEPERS.discard(wake)
+        if resource_id:
+            notifications.unsubscribe(resource_id, wake)
+
+
+def _wait(check, name, retry_on, policy: WaitPolicy, wake: threading.Event,
+          fallback_interval):
+    action_name = _ACTION.get()
+    latency = _get_model(action_name, name)
+    started_at = time.monotonic()
+    deadline = started_at + policy.timeout
+    interval = policy.interval
+    polls = 0
+
+    def _done(timeout=False):
+        waited = time.monotonic() - started_at
+        action_stats = _ACTION_STATS.get()
+        if action_stats:
+            action_stats.add(polls, waited, timeout=timeout)
+        LOG.debug('wait {}: {} poll(s), {:.2f} seconds{}', name, polls,
+                  waited, timeout and ', timeout' or '')
+
+    while True:
+        polls += 1
+        try:
+            result = check()
+        except retry_on:
+            now = time.monotonic()
+            if now >= deadline:
+                _done(timeout=True)
+                raise
+        else:
+            _done()
+            _learn(action_name, name, time.monotonic() - started_at)
+            return result
+
+        if fallback_interval:
+            sleep = fallback_interval
+        else:
+            sleep = latency and latency.next_sleep(now - started_at,
+                                                   policy.interval)
+        if sleep is None:
+            sleep = _sleep_time(interval, policy.jitter)
+            interval = min(interval * policy.backoff, policy.max_interval)
+        wake.wait(min(sleep, deadline - now))
+        wake.clear()
+        if CANCEL.is_set():
+            _done()
+            raise exceptions.WaitCancelled(name)
+
+
+def waits(name, retry_on=(AssertionError,), resource=None):
+    """Decorator of wait, the policy is resolved when it's called
+
+    resource(*args, **kwargs) returns the resource id of the wait.
+    """
+
+    def decorator(func):
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return wait(functools.partial(func, *args, **kwargs), name,
+                        retry_on=retry_on,
+                        resource_id=resource and resource(*args, **kwargs))
+        return wrapper
+    return decorator
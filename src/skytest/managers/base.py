@@ -1,12 +1,13 @@
 import abc
+import typing
 
 from skytest.common import exceptions
 from skytest.common import conf
-from skytest.common import libvirt_guest
 from skytest.common import log
 from skytest.common import model
 
-from .openstack.manager import OpenstackManager
+if typing.TYPE_CHECKING:
+    from skytest.common import libvirt_guest
 
 CONF = conf.CONF
 LOG = log.getLogger()
@@ -15,8 +16,17 @@ LOG = log.getLogger()
 class BaseManager(metaclass=abc.ABCMeta):
 
     @abc.abstractmethod
-    def create_ecs(self, name=None, timeout=1800, networks=None,
-                   wait=False) -> model.ECS:
+    def create_ecs(self, flavor, name=None, networks=None,
+                   availability_zone=None) -> model.ECS:
+        pass
+
+    @abc.abstractmethod
+    def create_ecs_multi(self, flavor, count, name=None,
+                         networks=None) -> str:
+        pass
+
+    @abc.abstractmethod
+    def find_ecs_by_reservation(self, reservation_id) -> list[model.ECS]:
         pass
 
     @abc.abstractmethod
@@ -72,7 +82,11 @@ class BaseManager(metaclass=abc.ABCMeta):
         pass
 
     @abc.abstractmethod
-    def report_ecs_actions(self, ecs: model.ECS):
+    def get_ecs_events(self, ecs: model.ECS) -> list[model.ServerEvent]:
+        pass
+
+    @abc.abstractmethod
+    def report_ecs_actions(self, ecs: model.ECS, events=None):
         pass
 
     @abc.abstractmethod
@@ -97,7 +111,8 @@ class BaseManager(metaclass=abc.ABCMeta):
         pass
 
     @abc.abstractmethod
-    def get_libvirt_guest(self, ecs: model.ECS) -> libvirt_guest.LibvirtGuest:
+    def get_libvirt_guest(self, ecs: model.ECS
+                          ) -> 'libvirt_guest.LibvirtGuest':
         pass
 
     @abc.abstractmethod
@@ -122,11 +137,11 @@ class BaseManager(metaclass=abc.ABCMeta):
         pass
 
     @abc.abstractmethod
-    def live_migrate_ecs(self, ecs: model.ECS):
+    def live_migrate_ecs(self, ecs: model.ECS, host=None):
         pass
 
     @abc.abstractmethod
-    def migrate_ecs(self, ecs: model.ECS):
+    def migrate_ecs(self, ecs: model.ECS, host=None):
         pass
 
     @abc.abstractmethod
@@ -180,6 +195,11 @@ class BaseManager(metaclass=abc.ABCMeta):
     def create_port(self, network_id, name) -> model.Port:
         pass
 
+    @abc.abstractmethod
+    def create_ports(self, network_ids: list, chunk_size=None
+                     ) -> list[model.Port]:
+        pass
+
     @abc.abstractmethod
     def get_port(self, port_id) -> model.Port:
         pass
@@ -188,8 +208,26 @@ class BaseManager(metaclass=abc.ABCMeta):
     def delete_port(self, port_id):
         pass
 
+    @abc.abstractmethod
+    def delete_ports(self, port_ids: list, chunk_size=None):
+        pass
+
+    @abc.abstractmethod
+    def iter_ecs(self, name=None, all_tenants=False):
+        pass
+
+    @abc.abstractmethod
+    def iter_volumes(self, name_prefix=None, status=None, all_tenants=False):
+        pass
+
+    @abc.abstractmethod
+    def iter_ports(self, name_prefix=None):
+        pass
+
 
 def get_manager():
+    # the cloud clients are imported only when the manager is used
     if CONF.manager == 'openstack':
+        from .openstack.manager import OpenstackManager
         return OpenstackManager()
     raise exceptions.InvalidManager(CONF.manager)
@@ -4,6 +4,7 @@ openstack client
 import os
 
 from cinderclient import client as cinder_client
+from cinderclient import exceptions as cinder_exc
 import glanceclient
 from keystoneauth1.identity import v3
 from keystoneauth1.session import Session
@@ -13,11 +14,11 @@ from novaclient import client as nova_client
 from novaclient import exceptions as nova_exc
 
 from easy2use.common import exceptions as base_exc
-from easy2use.common import retry
 
 from skytest.common import conf
 from skytest.common import log
 from skytest.common import exceptions
+from skytest.common import waiter
 
 CONF = conf.CONF
 LOG = log.getLogger()
@@ -38,6 +39,7 @@ class OpenstackClient(object):
 
     def __init__(self, *args, **kwargs):
         region_name = kwargs.pop('region_name', None)
+        self.region_name = region_name
         self.auth = v3.Password(*args, **kwargs)
         self.session = Session(auth=self.auth,
                                connect_retries=CONF.openstack.connect_retries)
@@ -51,7 +53,8 @@ class OpenstackClient(object):
                                        region_name=region_name)
         self.glance = glanceclient.Client('2', session=self.session,
                                           region_name=region_name)
-        self.cinder = cinder_client.Client('3', session=self.session,
+        self.cinder = cinder_client.Client(CONF.openstack.cinder_api_version,
+                                           session=self.session,
                                            region_name=region_name)
 
     @classmethod
@@ -132,29 +135,121 @@ class OpenstackClient(object):
                                                       action.request_id)
             events = sorted(vm_action.events,
                             key=lambda x: x.get('start_time'))
-            action_events.append((action.action, action.request_id, events))
+            action_events.append((action.action, action.request_id,
+                                  action.start_time, events))
         return action_events
 
     def get_server_interfaces(self, server_id):
         return self.nova.servers.interface_list(server_id)
 
     def detach_server_interface(self, server_id, port_id, wait=False,
-                                interval=5, timeout=600):
+                                interval=None, timeout=None):
         self.detach_interface(server_id, port_id)
         if not wait:
             return
 
         def _check_interface():
             interfaces = self.get_server_interfaces(server_id)
-            return all(interface.id != port_id for interface in interfaces)
+            assert all(interface.id != port_id for interface in interfaces), \
+                f'interface {port_id} is not detached'
 
         LOG.debug('interface {} detaching', port_id, ecs=server_id)
-        retry.retry_untile_true(_check_interface,
-                                interval=interval, timeout=timeout)
+        waiter.wait(_check_interface, 'interface_detached',
+                    policy=waiter.get_policy('interface_detached',
+                                             timeout=timeout,
+                                             interval=interval),
+                    resource_id=server_id)
         LOG.debug('interface {} detached', port_id, ecs=server_id)
 
-    def list_volumes(self, all_tenants=False):
-        return self.cinder.volumes.list({'all_tenants': all_tenants})
+    def _get_json(self, service_type, url, headers=None):
+        return self.session.get(
+            url, headers=headers, raise_exc=False,
+            endpoint_filter={'service_type': service_type,
+                             'interface': 'public',
+                             'region_name': self.region_name})
+
+    def get_server_json(self, server_id) -> dict:
+        """Get the server with the session, no novaclient resource is built
+        """
+        url = f'/servers/{server_id}'
+        version = CONF.openstack.nova_api_version
+        resp = self._get_json('compute', url, headers={
+            'X-OpenStack-Nova-API-Version': version,
+            'OpenStack-API-Version': f'compute {version}'})
+        body = resp.json() if resp.content else {}
+        if resp.status_code >= 400:
+            raise nova_exc.from_response(resp, body, url, 'GET')
+        return body['server']
+
+    def get_volume_json(self, volume_id) -> dict:
+        """Get the volume with the session, no cinderclient resource is built
+        """
+        resp = self._get_json('volumev3', f'/volumes/{volume_id}')
+        body = resp.json() if resp.content else {}
+        if resp.status_code >= 400:
+            raise cinder_exc.from_response(resp, body)
+        return body['volume']
+
+    def iter_servers(self, search_opts=None, page_size=None):
+        """List servers page by page with limit and marker
+
+        A short page is not the last one, the API may cap the limit with
+        its max_limit, so it stops at an empty page.
+        """
+        page_size = page_size or CONF.openstack.list_page_size
+        marker = None
+        while True:
+            servers = self.nova.servers.list(search_opts=search_opts,
+                                             limit=page_size, marker=marker)
+            if not servers:
+                return
+            yield from servers
+            marker = servers[-1].id
+
+    def iter_volumes(self, search_opts=None, page_size=None):
+        """List volumes page by page with limit and marker, until an empty
+        page"""
+        page_size = page_size or CONF.openstack.list_page_size
+        marker = None
+        while True:
+            volumes = self.cinder.volumes.list(search_opts=search_opts,
+                                               limit=page_size, marker=marker)
+            if not volumes:
+                return
+            yield from volumes
+            marker = volumes[-1].id
+
+    def iter_ports(self, page_size=None, **filters):
+        """List ports page by page, neutron follows the next links"""
+        page_size = page_size or CONF.openstack.list_page_size
+        for page in self.neutron.list_ports(retrieve_all=False,
+                                            limit=page_size, **filters):
+            yield from page.get('ports', [])
+
+    def list_volumes(self, all_tenants=False, name=None, status=None,
+                     name_like=None):
+        """List volumes page by page, the filters are applied by cinder
+
+        name_like matches the names containing it, it's ignored by cinder
+        if cinder_api_version < 3.34.
+        """
+        search_opts = {}
+        if all_tenants:
+            search_opts['all_tenants'] = 1
+        if name:
+            search_opts['name'] = name
+        if status:
+            search_opts['status'] = status
+        if name_like and self.cinder_supports('3.34'):
+            search_opts['name~'] = name_like
+        yield from self.iter_volumes(search_opts=search_opts)
+
+    @staticmethod
+    def cinder_supports(version) -> bool:
+        def _parse(value):
+            return tuple(int(num) for num in value.split('.'))
+
+        return _parse(CONF.openstack.cinder_api_version) >= _parse(version)
 
     def get_flavor(self, id_or_name):
         try:
@@ -2,21 +2,23 @@ from concurrent import futures
 import functools
 import random
 import subprocess
-import time
 
 import prettytable
 
+from novaclient import api_versions
 from novaclient import exceptions as nova_exc
 from cinderclient import exceptions as cinder_exc
+from neutronclient.common import exceptions as neutron_exc
 
-from easy2use.common import retry as easy_retry
 from easy2use.component import pbr
 
 from skytest.common import exceptions
 from skytest.common import conf
+from skytest.common import journal
 from skytest.common import utils
 from skytest.common import log
 from skytest.common import model
+from skytest.common import waiter
 from . import client
 
 CONF = conf.CONF
@@ -60,22 +62,33 @@ class OpenstackManager:
 
     def find_servers(self, name=None, status=None, host=None,
                      all_tenants=False):
-        LOG.debug('find servers with name={}, status={}, host={}'
+        """Find servers page by page, yield them as the pages arrive
+
+        The filters are done by nova, name is a regex and status is the
+        vm_state. nova ignores vm_state and host if the user is not admin,
+        so status and host are checked again.
+        """
+        LOG.debug('find servers with name={}, status={}, host={}, '
                   'all_tenants={}', name, status, host, all_tenants)
-        vms = []
         search_opts = {}
+        if name:
+            search_opts['name'] = name
+        if status:
+            search_opts['vm_state'] = status
+        if host:
+            search_opts['host'] = host
         if all_tenants:
             search_opts['all_tenants'] = 1
-        for vm in self.client.nova.servers.list(search_opts=search_opts):
-            vm_state = self.get_vm_state(vm)
-            LOG.debug('name={}, vm_state={}',
-                      vm.id, vm.name, vm_state)
-            if name and (name not in vm.name) or \
-               status and vm_state != status or\
+        for vm in self.client.iter_servers(search_opts=search_opts):
+            if status and self.get_vm_state(vm) != status or \
                host and getattr(vm, 'OS-EXT-SRV-ATTR:host') != host:
                 continue
-            vms.append(vm)
-        return vms
+            yield vm
+
+    def iter_ecs(self, name=None, all_tenants=False):
+        """Find ECS page by page, name is a regex filtered by nova"""
+        for server in self.find_servers(name=name, all_tenants=all_tenants):
+            yield self._parse_server_to_ecs(server)
 
     def _wait_for_vm(self, ecs: model.ECS, status={'active'}, task_states=None,
                      timeout=None, interval=5):
@@ -91,53 +104,68 @@ class OpenstackManager:
                 raise exceptions.EcsIsError(ecs.id)
             LOG.debug('status={}, stask state={}',
                       ecs.status, ecs.task_state, ecs=ecs.id)
-            return ecs.status in states \
-                and ecs.task_state in task_states
+            assert ecs.status in states and ecs.task_state in task_states, \
+                f'ecs {ecs.id} status is {ecs.status}'
 
-        easy_retry.retry_untile_true(check_vm_status, args=(ecs,),
-                                     interval=interval, timeout=timeout)
+        waiter.wait(lambda: check_vm_status(ecs), 'ecs_status',
+                    policy=waiter.get_policy('ecs_status', timeout=timeout,
+                                             interval=interval),
+                    resource_id=ecs.id)
 
         return ecs
 
     def clean_vms(self, ecs_list):
         for ecs in ecs_list:
-            self.delete_ecs(ecs)
+            try:
+                self.delete_ecs(ecs)
+            except exceptions.ECSNotFound:
+                pass
 
     def delete_ecs(self, ecs: model.ECS, force=False):
         if force and not hasattr(ecs, 'force_delete'):
             raise ValueError('force delete is not support')
 
-        if force:
-            self.client.nova.servers.force_delete(ecs.id)
-        else:
-            self.client.nova.servers.delete(ecs.id)
+        try:
+            if force:
+                self.client.nova.servers.force_delete(ecs.id)
+            else:
+                self.client.nova.servers.delete(ecs.id)
+        except nova_exc.NotFound:
+            journal.record_deleted('ecs', ecs.id)
+            raise exceptions.ECSNotFound(ecs.id)
 
     def _wait_for_volume_deleted(self, vol, timeout=None, interval=5):
 
-        def is_volume_not_found():
+        def volume_must_be_not_found():
             try:
                 self.client.cinder.volumes.get(vol.id)
             except Exception as e:
                 LOG.debug(e)
-                return True
+                return
+            raise exceptions.VolumeIsNotDeleted(vol.id)
 
-        easy_retry.retry_untile_true(is_volume_not_found,
-                                     interval=interval, timeout=timeout)
+        waiter.wait(volume_must_be_not_found, 'volume_not_found',
+                    retry_on=exceptions.VolumeIsNotDeleted,
+                    policy=waiter.get_policy('volume_not_found',
+                                             timeout=timeout,
+                                             interval=interval),
+                    resource_id=vol.id)
+        journal.record_deleted('volume', vol.id)
 
     def delete_vms(self, name=None, host=None, status=None, all_tenants=False,
                    workers=None, force=False):
         workers = workers or 1
         servers = self.find_servers(name=name, status=status, host=host,
                                     all_tenants=all_tenants)
-        LOG.info('found {} deletable server(s)', len(servers))
-        if not servers:
-            return
-
         with futures.ThreadPoolExecutor(max_workers=workers) as executor:
-            tasks = [executor.submit(self.delete_vm, vm, force=force)
+            # the servers are deleting while the next pages are listing
+            tasks = [executor.submit(self.delete_ecs, vm, force=force)
                      for vm in servers]
+            LOG.info('found {} deletable server(s)', len(tasks))
+            if not tasks:
+                return
 
-            with pbr.progressbar(len(servers), description='delete vm') as bar:
+            with pbr.progressbar(len(tasks), description='delete vm') as bar:
                 for _ in futures.as_completed(tasks):
                     bar.update(1)
         bar.close()
@@ -187,14 +215,20 @@ class OpenstackManager:
 
     def _wait_action_first_events(self, ecs: model.ECS, request_id: str,
                                   retries=5):
-        for i in range(retries + 1):
+
+        def first_event_must_be_started():
             action = self.client.nova.instance_action.get(ecs.id, request_id)
             start_time = action.events and action.events[0].get('start_time')
-            LOG.debug('start_time of first event is {}, retry {}',
-                      start_time, i, ecs=ecs.id)
-            if start_time:
-                break
-            time.sleep(1)
+            LOG.debug('start_time of first event is {}', start_time,
+                      ecs=ecs.id)
+            assert start_time, f'action {request_id} has no event'
+
+        try:
+            waiter.wait(first_event_must_be_started, 'action_events',
+                        policy=waiter.get_policy('action_events',
+                                                 timeout=retries))
+        except AssertionError:
+            pass
 
     @wrap_exceptions
     def detach_interface(self, ecs: model.ECS, vif: str):
@@ -237,8 +271,9 @@ class OpenstackManager:
             raise RuntimeError(f'Run rbd rm failed, {output}')
 
     def cleanup_rbd(self, pool, workers=1):
-        volumes = [
-            'volume-{}'.format(vol.id) for vol in self.client.list_volumes()]
+        # only the ids are kept, not the volume resources
+        volumes = {
+            'volume-{}'.format(vol.id) for vol in self.client.list_volumes()}
         lines = self.rbd_ls(pool)
         delete_images = [
             line for line in lines
@@ -297,19 +332,19 @@ class OpenstackManager:
             host=getattr(server, 'OS-EXT-SRV-ATTR:host') or '',
             progress=getattr(server, 'progress', None),)
 
-    @wrap_exceptions
-    def create_ecs(self, flavor, name=None, networks=None) -> model.ECS:
-        if not name:
-            name = utils.generate_name(
-                CONF.openstack.boot_from_volume and 'vol-vm' or 'img-vm')
+    def _parse_server_json(self, server: dict) -> model.ECS:
+        return model.ECS(
+            id=server['id'], name=server.get('name') or '',
+            status=server.get('OS-EXT-STS:vm_state') or '',
+            task_state=server.get('OS-EXT-STS:task_state') or '',
+            host=server.get('OS-EXT-SRV-ATTR:host') or '',
+            progress=server.get('progress'))
 
+    def _get_boot_args(self, networks=None, availability_zone=None):
         image_id = CONF.openstack.image_id
         nics = [
             {'net-id': net_id} for net_id in networks
         ] if networks else 'none'
-        if not name:
-            name = utils.generate_name(
-                CONF.openstack.boot_from_volume and 'vol-vm' or 'img-vm')
         image, bdm_v2 = None, None
         if CONF.openstack.boot_from_volume:
             bdm_v2 = [{
@@ -322,18 +357,56 @@ class OpenstackManager:
                 bdm_v2[0]['volume_type'] = CONF.openstack.volume_type
         else:
             image = image_id
-        server = self.client.nova.servers.create(
-            name, image, flavor, nics=nics,
-            block_device_mapping_v2=bdm_v2,
-            availability_zone=CONF.openstack.boot_az)
-        LOG.info('booting with {}', 'bdm' if bdm_v2 else 'image',
+        return image, {'nics': nics, 'block_device_mapping_v2': bdm_v2,
+                       'availability_zone':
+                       availability_zone or CONF.openstack.boot_az}
+
+    @wrap_exceptions
+    def create_ecs(self, flavor, name=None, networks=None,
+                   availability_zone=None) -> model.ECS:
+        if not name:
+            name = utils.generate_name(
+                CONF.openstack.boot_from_volume and 'vol-vm' or 'img-vm')
+        image, kwargs = self._get_boot_args(
+            networks=networks, availability_zone=availability_zone)
+        server = self.client.nova.servers.create(name, image, flavor,
+                                                 **kwargs)
+        journal.record_created('ecs', server.id)
+        LOG.info('booting with {}',
+                 'bdm' if kwargs['block_device_mapping_v2'] else 'image',
                  ecs=server.id)
 
         return self.get_ecs(server.id)
 
+    @wrap_exceptions
+    def create_ecs_multi(self, flavor, count, name=None,
+                         networks=None) -> str:
+        """Create count ECS with one request, return the reservation id"""
+        if not name:
+            name = utils.generate_name(
+                CONF.openstack.boot_from_volume and 'vol-vm' or 'img-vm')
+        image, kwargs = self._get_boot_args(networks=networks)
+        reservation = self.client.nova.servers.create(
+            name, image, flavor, min_count=count, max_count=count,
+            reservation_id=True, **kwargs)
+        if isinstance(reservation, dict):
+            reservation = reservation.get('reservation_id')
+        journal.record_created('reservation', reservation)
+        LOG.info('booting {} ECS, reservation id: {}', count, reservation)
+        return reservation
+
+    @wrap_exceptions
+    def find_ecs_by_reservation(self, reservation_id) -> list[model.ECS]:
+        servers = self.client.nova.servers.list(
+            search_opts={'reservation_id': reservation_id})
+        return [self._parse_server_to_ecs(server) for server in servers]
+
     @wrap_exceptions
     def get_ecs(self, ecs_id):
         try:
+            if CONF.openstack.fast_get:
+                return self._parse_server_json(
+                    self.client.get_server_json(ecs_id))
             server = self.client.nova.servers.get(ecs_id)
         except nova_exc.NotFound:
             raise exceptions.ECSNotFound(ecs_id)
@@ -356,35 +429,61 @@ class OpenstackManager:
         self.client.nova.servers.reboot(ecs.id, reboot_type='HARD')
 
     @wrap_exceptions
-    def live_migrate_ecs(self, ecs):
-        self.client.nova.servers.live_migrate(ecs.id, host=None,
+    def live_migrate_ecs(self, ecs, host=None):
+        self.client.nova.servers.live_migrate(ecs.id, host=host,
                                               block_migration=True)
 
     @wrap_exceptions
-    def migrate_ecs(self, ecs: model.ECS):
-        self.client.nova.servers.migrate(ecs.id)
+    def migrate_ecs(self, ecs: model.ECS, host=None):
+        if host and self.client.nova.api_version < \
+           api_versions.APIVersion('2.56'):
+            LOG.warning('nova api version {} < 2.56, migrate without the '
+                        'target host {}',
+                        self.client.nova.api_version.get_string(), host,
+                        ecs=ecs.id)
+            host = None
+        if host:
+            self.client.nova.servers.migrate(ecs.id, host=host)
+        else:
+            self.client.nova.servers.migrate(ecs.id)
 
     @wrap_exceptions
     def get_ecs_console_log(self, ecs: model.ECS, length=None):
         return self.client.nova.servers.get_console_output(ecs.id,
                                                            length=length)
 
-    def report_ecs_actions(self, ecs: model.ECS):
+    @wrap_exceptions
+    def get_ecs_events(self, ecs: model.ECS) -> list[model.ServerEvent]:
+        ecs_events = []
+        for action_name, req_id, request_time, events in \
+                self.client.get_server_events(ecs.id):
+            for event in events or []:
+                ecs_events.append(model.ServerEvent(
+                    action_name, req_id, event['event'],
+                    request_time=request_time or '',
+                    start_time=event.get('start_time') or '',
+                    finish_time=event.get('finish_time') or '',
+                    host=event.get('host') or '',
+                    result=event.get('result') or ''))
+        return ecs_events
+
+    def report_ecs_actions(self, ecs: model.ECS, events=None):
         pt = prettytable.PrettyTable(['Action', 'Request Id', 'Event',
                                       'StartTime', 'EndTime', 'Host',
                                       'Result'])
         pt.align['Action'] = 'l'
         pt.align['Event'] = 'l'
-        vm_actions = self.client.get_server_events(ecs.id)
-
-        # vm_actions = sorted(vm_actions, key=lambda x: x[1][0]['start_time'])
-        for action_name, req_id, events in vm_actions:
-            for i, event in enumerate(events or []):
-                pt.add_row([action_name if i == 0 else "",
-                            req_id if i == 0 else "",
-                            event['event'], event['start_time'],
-                            event['finish_time'], event.get('host'),
-                            event['result']])
+        if events is None:
+            events = self.get_ecs_events(ecs)
+
+        last_req_id = None
+        for event in events:
+            first = event.request_id != last_req_id
+            last_req_id = event.request_id
+            pt.add_row([event.action if first else "",
+                        event.request_id if first else "",
+                        event.event, event.start_time, event.finish_time,
+                        event.host, event.result])
         LOG.info('actions:\n{}', pt, ecs=ecs.id)
 
     def get_server_host(self, server):
@@ -395,14 +494,17 @@ class OpenstackManager:
 
     @wrap_exceptions
     def wait_for_vm_task_finished(self, vm, timeout=None, interval=5):
-        def check_vm_status():
+        def vm_must_have_no_task():
             vm.get()
             task_state = self.get_task_state(vm)
-            LOG.debug('stask_state={}', vm.id, task_state)
-            return not task_state
-
-        easy_retry.retry_untile_true(check_vm_status,
-                                     interval=interval, timeout=timeout)
+            LOG.debug('stask_state={}', task_state, ecs=vm.id)
+            assert not task_state, f'ecs {vm.id} still has task'
+
+        waiter.wait(vm_must_have_no_task, 'ecs_task_finished',
+                    policy=waiter.get_policy('ecs_task_finished',
+                                             timeout=timeout,
+                                             interval=interval),
+                    resource_id=vm.id)
         return vm
 
     @wrap_exceptions
@@ -426,11 +528,41 @@ class OpenstackManager:
 
     def _parse_volume(self, vol) -> model.Volume:
         return model.Volume(vol.id, vol.size, name=vol.name or '',
-                            status=vol.status or '')
+                            status=vol.status or '',
+                            attached_servers=[
+                                attachment.get('server_id') for attachment in
+                                getattr(vol, 'attachments', None) or []
+                            ])
+
+    def _parse_volume_json(self, vol: dict) -> model.Volume:
+        return model.Volume(vol['id'], vol.get('size'),
+                            name=vol.get('name') or '',
+                            status=vol.get('status') or '',
+                            attached_servers=[
+                                attachment.get('server_id') for attachment in
+                                vol.get('attachments') or []
+                            ])
+
+    def iter_volumes(self, name_prefix=None, status=None, all_tenants=False):
+        """Find volumes page by page
+
+        The status and the name are filtered by cinder. Cinder matches the
+        names containing the prefix (or ignores it if cinder_api_version <
+        3.34), so the prefix is checked again here.
+        """
+        for vol in self.client.list_volumes(all_tenants=all_tenants,
+                                            status=status,
+                                            name_like=name_prefix):
+            if name_prefix and not (vol.name or '').startswith(name_prefix):
+                continue
+            yield self._parse_volume(vol)
 
     @wrap_exceptions
     def get_volume(self, volume_id) -> model.Volume:
         try:
+            if CONF.openstack.fast_get:
+                return self._parse_volume_json(
+                    self.client.get_volume_json(volume_id))
             volume = self.client.cinder.volumes.get(volume_id)
             return self._parse_volume(volume)
         except cinder_exc.NotFound:
@@ -446,11 +578,16 @@ class OpenstackManager:
         vol = self.client.create_volume(name, size_gb=size_gb,
                                         image_ref=image, snapshot=snapshot,
                                         volume_type=volume_type)
+        journal.record_created('volume', vol.id)
         return self._parse_volume(vol)
 
     @wrap_exceptions
     def delete_volume(self, volume: model.Volume):
-        self.client.delete_volume(volume.id)
+        try:
+            self.client.delete_volume(volume.id)
+        except cinder_exc.NotFound:
+            journal.record_deleted('volume', volume.id)
+            raise exceptions.VolumeNotFound(volume.id)
 
     @wrap_exceptions
     def attach_volume(self, ecs: model.ECS, volume_id: str):
@@ -525,19 +662,66 @@ class OpenstackManager:
     def _parse_port(self, port: dict) -> model.Volume:
         return model.Port(port.get('id'), port.get('name'),
                           status=port.get('status'),
-                          host=port.get('binding:host_id'))
+                          host=port.get('binding:host_id'),
+                          network_id=port.get('network_id'))
 
     @wrap_exceptions
     def create_port(self, network_id) -> model.Port:
         data = {'network_id': network_id, 'name': utils.generate_name('port')}
         port = self.client.neutron.create_port(body={'port': data})
+        journal.record_created('port', port['port']['id'])
         return self._parse_port(port.get('port'))
 
+    @wrap_exceptions
+    def create_ports(self, network_ids: list, chunk_size=None
+                     ) -> list[model.Port]:
+        """Create ports with neutron bulk create, one request per chunk"""
+        chunk_size = chunk_size or CONF.openstack.port_bulk_size
+        ports = []
+        for i in range(0, len(network_ids), chunk_size):
+            body = {'ports': [
+                {'network_id': network_id,
+                 'name': utils.generate_name('port')}
+                for network_id in network_ids[i:i + chunk_size]
+            ]}
+            result = self.client.neutron.create_port(body=body)
+            for port in result.get('ports', []):
+                journal.record_created('port', port['id'])
+                ports.append(self._parse_port(port))
+        LOG.debug('created {} port(s)', len(ports))
+        return ports
+
     @wrap_exceptions
     def get_port(self, port_id) -> model.Port:
         port = self.client.neutron.show_port(port_id)
         return self._parse_port(port.get('port'))
 
+    def iter_ports(self, name_prefix=None):
+        """Find ports page by page, only the used fields are returned"""
+        fields = ['id', 'name', 'status', 'binding:host_id', 'network_id']
+        for port in self.client.iter_ports(fields=fields):
+            if name_prefix and not (port.get('name') or '').startswith(
+                    name_prefix):
+                continue
+            yield self._parse_port(port)
+
     @wrap_exceptions
     def delete_port(self, port_id) -> model.Port:
-        return self.client.neutron.delete_port(port_id)
+        try:
+            self.client.neutron.delete_port(port_id)
+        except neutron_exc.NotFound:
+            raise exceptions.PortNotFound(port_id)
+        journal.record_deleted('port', port_id)
+
+    def delete_ports(self, port_ids: list, chunk_size=None):
+        """Delete ports chunk by chunk
+
+        Neutron has no bulk delete API, the ports of a chunk are deleted
+        concurrently.
+        """
+        chunk_size = chunk_size or CONF.openstack.port_bulk_size
+        with futures.ThreadPoolExecutor(max_workers=chunk_size) as executor:
+            for i in range(0, len(port_ids), chunk_size):
+                list(executor.map(self.delete_port,
+                                  port_ids[i:i + chunk_size]))
+        LOG.debug('deleted {} port(s)', len(port_ids))
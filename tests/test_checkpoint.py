@@ -0,0 +1,138 @@
+import json
+import os
+import tempfile
+import unittest
+
+from skytest.cases import scenario
+from skytest.common import checkpoint
+from skytest.common import conf
+from skytest.common import exceptions
+from skytest.common import model
+
+
+class CheckpointTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'checkpoint.jsonl')
+
+    def tearDown(self):
+        checkpoint.close()
+
+    def test_disabled_without_path(self):
+        checkpoint.start('', 10)
+        self.assertFalse(checkpoint.enabled())
+        checkpoint.save_progress(checkpoint.Progress(0))
+
+    def test_load_deltas(self):
+        checkpoint.start(self.path, 3, seed=42)
+        checkpoint.save_progress(checkpoint.Progress(
+            0, ecs='vm1', actions=['create', 'reboot'], next_action=1,
+            results=[model.ActionResult('create')]))
+        checkpoint.save_progress(checkpoint.Progress(
+            1, ecs='vm2', actions=['create'], next_action=1,
+            results=[model.ActionResult('create')]))
+        checkpoint.save_progress(checkpoint.Progress(
+            0, ecs='vm1', actions=['stop'], next_action=2,
+            results=[model.ActionResult('reboot', ok=False)], generated=1))
+        checkpoint.save_done(1, model.ScenarioResult(ecs='vm2'))
+        checkpoint.close()
+
+        state = checkpoint.load(self.path)
+        self.assertEqual((state.total, state.seed), (3, 42))
+        self.assertEqual(list(state.done), [1])
+        self.assertEqual(state.done[1].ecs, 'vm2')
+        self.assertEqual(list(state.progress), [0])
+        progress = state.progress[0]
+        self.assertEqual(progress.actions, ['create', 'reboot', 'stop'])
+        self.assertEqual(progress.next_action, 2)
+        self.assertEqual(progress.generated, 1)
+        self.assertEqual([(r.action, r.ok) for r in progress.results],
+                         [('create', True), ('reboot', False)])
+        self.assertEqual(state.pending(), [0, 2])
+
+    def test_skip_invalid_line(self):
+        checkpoint.start(self.path, 1)
+        checkpoint.close()
+        with open(self.path, 'a') as f:
+            f.write('{"type": "progr')
+        self.assertEqual(checkpoint.load(self.path).total, 1)
+
+
+class ScenarioProgressTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'checkpoint.jsonl')
+        self.addCleanup(conf.set_option, 'ecs_test', 'checkpoint_interval',
+                        conf.CONF.ecs_test.checkpoint_interval)
+        checkpoint.start(self.path, 1)
+        self.addCleanup(checkpoint.close)
+
+    def _run(self, test, count):
+        for index in range(len(test.result.actions),
+                           len(test.result.actions) + count):
+            test.result.actions.append(
+                model.ActionResult(test.actions[index]))
+            test._save_progress(index + 1)
+
+    def _records(self):
+        with open(self.path) as f:
+            return [entry for entry in map(json.loads, f)
+                    if entry['type'] == 'progress']
+
+    def test_saved_when_ecs_changes_or_interval(self):
+        conf.set_option('ecs_test', 'checkpoint_interval', 3600)
+        test = scenario.ECSScenarioTest(['create', 'reboot', 'stop'],
+                                        index=0)
+        test.ecs = model.ECS('vm1')
+        self._run(test, 3)
+        # only the ECS change is saved before the interval
+        records = self._records()
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]['next_action'], 1)
+
+        conf.set_option('ecs_test', 'checkpoint_interval', 0)
+        test = scenario.ECSScenarioTest(['create', 'reboot', 'stop'],
+                                        index=1)
+        test.ecs = model.ECS('vm2')
+        self._run(test, 3)
+        records = [r for r in self._records() if r['index'] == 1]
+        self.assertEqual([len(r['results']) for r in records], [1, 1, 1])
+        self.assertEqual([r['actions'] for r in records],
+                         [['create', 'reboot', 'stop'], [], []])
+
+    def test_resume_appends_delta(self):
+        conf.set_option('ecs_test', 'checkpoint_interval', 0)
+        test = scenario.ECSScenarioTest(['create', 'reboot', 'stop'],
+                                        index=0)
+        test.ecs = model.ECS('vm1')
+        self._run(test, 2)
+        checkpoint.close()
+
+        progress = checkpoint.resume(self.path).progress[0]
+        test = scenario.ECSScenarioTest(progress.actions, index=0,
+                                        progress=progress)
+        test.ecs = model.ECS('vm1')
+        test.result.actions.extend(progress.results)
+        self._run(test, 1)
+        checkpoint.close()
+
+        progress = checkpoint.load(self.path).progress[0]
+        self.assertEqual(progress.actions, ['create', 'reboot', 'stop'])
+        self.assertEqual([r.action for r in progress.results],
+                         ['create', 'reboot', 'stop'])
+        self.assertEqual(progress.next_action, 3)
+
+
+class ResumeBarrierTest(unittest.TestCase):
+
+    def setUp(self):
+        for name, value in [('barrier_action', 'reboot'), ('worker', 2)]:
+            self.addCleanup(conf.set_option, 'ecs_test', name,
+                            getattr(conf.CONF.ecs_test, name))
+            conf.set_option('ecs_test', name, value)
+
+    def test_pending_count(self):
+        self.assertEqual(scenario.create_barrier(4, resumed=True).parties, 2)
+        self.assertIsNone(scenario.create_barrier(3, resumed=True))
+        self.assertRaises(exceptions.InvalidConfig,
+                          scenario.create_barrier, 3)
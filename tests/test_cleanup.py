@@ -0,0 +1,45 @@
+import unittest
+
+from skytest.cases import cleanup
+from skytest.common import model
+
+
+class FakeManager(object):
+
+    def __init__(self) -> None:
+        self.volumes = {
+            'vol1': model.Volume('vol1', 10, status='available'),
+            # deleted by an interrupted run, it's gone after 2 polls
+            'vol2': model.Volume('vol2', 10, status='deleting'),
+        }
+        self.deleted = []
+        self.polls = 0
+
+    def iter_volumes(self, name_prefix=None, all_tenants=False):
+        self.polls += 1
+        if self.polls > 2:
+            self.volumes.pop('vol2', None)
+        return list(self.volumes.values())
+
+    def delete_volume(self, volume: model.Volume):
+        self.deleted.append(volume.id)
+        self.volumes.pop(volume.id)
+
+
+class CleanupVolumesTest(unittest.TestCase):
+
+    def test_wait_deleting_volumes(self):
+        manager = FakeManager()
+        reaper = cleanup.Reaper(manager, interval=0)
+        reaper.cleanup_volumes()
+        self.assertEqual(manager.deleted, ['vol1'])
+        self.assertEqual(manager.volumes, {})
+        self.assertEqual(reaper.failed, 0)
+
+    def test_deleting_volumes_timeout(self):
+        manager = FakeManager()
+        manager.polls = -100
+        reaper = cleanup.Reaper(manager, timeout=0, interval=0)
+        reaper.cleanup_volumes()
+        self.assertEqual(list(manager.volumes), ['vol2'])
+        self.assertEqual(reaper.failed, 1)
@@ -0,0 +1,84 @@
+import unittest
+
+from skytest.common import compare
+from skytest.common import exceptions
+from skytest.common import model
+from skytest.common import stats
+
+
+class MannWhitneyUTest(unittest.TestCase):
+
+    def test_same_samples(self):
+        values = [float(i) for i in range(10)]
+        self.assertAlmostEqual(stats.mann_whitney_u(values, values), 1.0)
+
+    def test_separated_samples(self):
+        p_value = stats.mann_whitney_u(list(range(1, 11)),
+                                       list(range(11, 21)))
+        self.assertAlmostEqual(p_value, 0.000157, places=5)
+
+    def test_symmetric(self):
+        a, b = [1, 3, 5, 7, 9, 11], [2, 4, 4, 8, 12, 14, 16]
+        self.assertAlmostEqual(stats.mann_whitney_u(a, b),
+                               stats.mann_whitney_u(b, a))
+
+    def test_empty_or_all_ties(self):
+        self.assertEqual(stats.mann_whitney_u([], [1, 2]), 1.0)
+        self.assertEqual(stats.mann_whitney_u([1, 1], [1, 1, 1]), 1.0)
+
+
+class TwoProportionZTest(unittest.TestCase):
+
+    def test_different_rates(self):
+        self.assertLess(stats.two_proportion_z(0, 100, 20, 100), 0.001)
+
+    def test_same_rates(self):
+        self.assertAlmostEqual(stats.two_proportion_z(5, 100, 10, 200), 1.0)
+
+    def test_no_failure_or_no_total(self):
+        self.assertEqual(stats.two_proportion_z(0, 100, 0, 100), 1.0)
+        self.assertEqual(stats.two_proportion_z(0, 0, 1, 10), 1.0)
+
+
+class FakeStore(object):
+
+    def __init__(self, runs: dict) -> None:
+        self.runs = runs
+
+    def get_run(self, run_id):
+        return run_id in self.runs and {'id': run_id} or None
+
+    def get_actions(self, run_id):
+        return self.runs[run_id]
+
+
+class CompareRunsTest(unittest.TestCase):
+
+    def test_regressions(self):
+        base = [model.ActionResult('create', elapsed=10 + i % 10)
+                for i in range(50)] + \
+            [model.ActionResult('reboot', elapsed=5) for _ in range(50)]
+        target = [model.ActionResult('create', elapsed=20 + i % 10)
+                  for i in range(50)] + \
+            [model.ActionResult('reboot', elapsed=5, ok=i >= 20)
+             for i in range(50)]
+        diffs = {diff.action: diff for diff in compare.compare_runs(
+            FakeStore({1: base, 2: target}), 1, 2)}
+        self.assertTrue(diffs['create'].latency_regressed)
+        self.assertFalse(diffs['create'].failure_regressed)
+        self.assertAlmostEqual(diffs['create'].p50_change, 10 / 14.5)
+        self.assertFalse(diffs['reboot'].latency_regressed)
+        self.assertTrue(diffs['reboot'].failure_regressed)
+
+    def test_improvement_is_not_regression(self):
+        base = [model.ActionResult('create', elapsed=20 + i % 10)
+                for i in range(50)]
+        target = [model.ActionResult('create', elapsed=10 + i % 10)
+                  for i in range(50)]
+        diff, = compare.compare_runs(FakeStore({1: base, 2: target}), 1, 2)
+        self.assertLess(diff.latency_p_value, diff.alpha)
+        self.assertFalse(diff.regressed)
+
+    def test_run_not_found(self):
+        self.assertRaises(exceptions.NotFound, compare.compare_runs,
+                          FakeStore({1: []}), 1, 2)
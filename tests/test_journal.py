@@ -0,0 +1,159 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from skytest.cases import base
+from skytest.cases import resource_pool
+from skytest.common import exceptions
+from skytest.common import journal
+from skytest.common import model
+from skytest.common import waiter
+
+
+class JournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'journal.jsonl')
+
+    def tearDown(self):
+        journal.close()
+
+    def test_replay_live_resources(self):
+        journal.init(self.path)
+        journal.record_created('ecs', 'vm1')
+        journal.record_created('ecs', 'vm2')
+        journal.record_created('volume', 'vol1')
+        journal.record_deleted('ecs', 'vm1')
+        journal.record_deleted('volume', 'vol1')
+        journal.close()
+        self.assertEqual(journal.replay(self.path), {'ecs': ['vm2']})
+
+    def test_replay_skips_truncated_line(self):
+        journal.init(self.path)
+        journal.record_created('ecs', 'vm1')
+        journal.close()
+        with open(self.path, 'a') as f:
+            f.write('{"time": 1, "op": "cre')
+        self.assertEqual(journal.replay(self.path), {'ecs': ['vm1']})
+
+    def test_compact(self):
+        journal.init(self.path)
+        for index in range(10):
+            journal.record_created('ecs', f'vm{index}')
+            if index:
+                journal.record_deleted('ecs', f'vm{index}')
+        journal.close()
+        live = journal.replay(self.path)
+        journal.compact(self.path, live)
+        with open(self.path) as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual([(line['op'], line['id']) for line in lines],
+                         [(journal.CREATE, 'vm0')])
+
+    def test_forked_writers(self):
+        journal.init(self.path, sync_interval=60)
+        pids = []
+        for worker in range(4):
+            pid = os.fork()
+            if not pid:
+                for index in range(200):
+                    journal.record_created('ecs', f'vm-{worker}-{index}')
+                journal.close()
+                os._exit(0)
+            pids.append(pid)
+        for pid in pids:
+            os.waitpid(pid, 0)
+        journal.close()
+        with open(self.path) as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(len(lines), 800)
+        self.assertEqual(len(journal.replay(self.path)['ecs']), 800)
+
+
+class FakeManager(object):
+
+    def __init__(self, polls_before_deleted) -> None:
+        self.polls = polls_before_deleted
+
+    def get_ecs(self, ecs_id):
+        if self.polls <= 0:
+            raise exceptions.ECSNotFound(ecs_id)
+        self.polls -= 1
+        return model.ECS(ecs_id, status='DELETING')
+
+
+class RecordDeletedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'journal.jsonl')
+        journal.init(self.path)
+        journal.record_created('ecs', 'vm1')
+
+    def tearDown(self):
+        journal.close()
+
+    def test_deleted_after_confirmed(self):
+        job = base.EcsActionTestBase(model.ECS('vm1'), FakeManager(1))
+        check = base.EcsActionTestBase.wait_for_ecs_deleted.__wrapped__
+        # the DELETE is accepted, but the ECS is still there
+        self.assertRaises(exceptions.EcsIsNotDeleted, check, job)
+        self.assertEqual(journal.replay(self.path), {'ecs': ['vm1']})
+        check(job)
+        self.assertEqual(journal.replay(self.path), {})
+
+
+class FakeVolumeManager(object):
+
+    def __init__(self) -> None:
+        self.volumes = {}
+
+    def create_volume(self):
+        volume = model.Volume(f'vol{len(self.volumes) + 1}', 10,
+                              status='available')
+        self.volumes[volume.id] = volume
+        journal.record_created('volume', volume.id)
+        return volume
+
+    def delete_volume(self, volume):
+        # cinder accepts the request, the volume is deleted later
+        self.volumes[volume.id].status = 'deleting'
+
+    def get_volume(self, volume_id):
+        volume = self.volumes[volume_id]
+        if volume.status == 'deleting':
+            volume.status = 'deleted'
+            return volume
+        if volume.status == 'deleted':
+            raise exceptions.VolumeNotFound(volume_id)
+        return volume
+
+
+class DrainTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'journal.jsonl')
+        journal.init(self.path)
+
+    def tearDown(self):
+        journal.close()
+
+    def test_deleted_after_drained(self):
+        manager = FakeVolumeManager()
+        pool = resource_pool.ResourcePool(
+            'volume', 2, manager.create_volume, manager.delete_volume,
+            lambda volume: True,
+            wait_deleted=lambda volume: resource_pool._wait_volume_deleted(
+                manager, volume))
+        while len(manager.volumes) < 2:
+            time.sleep(0.01)
+        self.assertEqual(len(journal.replay(self.path)['volume']), 2)
+        policy = waiter.WaitPolicy(5, interval=0.01)
+        with mock.patch.dict(waiter.POLICIES,
+                             {'volume_deleted': lambda: policy}):
+            pool.drain()
+        self.assertEqual({volume.status for volume in
+                          manager.volumes.values()}, {'deleted'})
+        self.assertEqual(journal.replay(self.path), {})
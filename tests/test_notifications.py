@@ -0,0 +1,86 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from skytest.common import conf
+from skytest.common import notifications
+from skytest.common import waiter
+
+
+class ParseTest(unittest.TestCase):
+
+    def test_versioned(self):
+        message = {
+            'event_type': 'instance.power_off.end',
+            'payload': {'nova_object.data': {'uuid': 'vm1'}},
+        }
+        self.assertEqual(notifications.parse(message),
+                         ('instance.power_off.end', ['vm1']))
+
+    def test_oslo_envelope(self):
+        message = {'oslo.message': json.dumps({
+            'event_type': 'volume.attach.end',
+            'payload': {'volume_id': 'vol1', 'instance_uuid': 'vm1'},
+        })}
+        event_type, ids = notifications.parse(message)
+        self.assertEqual(event_type, 'volume.attach.end')
+        self.assertEqual(sorted(ids), ['vm1', 'vol1'])
+
+
+class FileListenerWaitTest(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+        conf.set_option('notifications', 'url', f'file://{self.path}')
+        conf.set_option('notifications', 'fallback_interval', 30)
+        self.addCleanup(conf.set_option, 'notifications', 'url', '')
+        self.addCleanup(notifications.stop)
+
+    def _notify_later(self, resource_id, ready: threading.Event):
+        def _append():
+            time.sleep(0.5)
+            ready.set()
+            with open(self.path, 'a') as f:
+                f.write(json.dumps({
+                    'event_type': 'instance.update',
+                    'payload': {'nova_object.data': {'uuid': resource_id}},
+                }) + '\n')
+
+        thread = threading.Thread(target=_append, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+
+    def test_wait_wakes_on_notification(self):
+        ready = threading.Event()
+
+        def check():
+            assert ready.is_set()
+            return 'ok'
+
+        self._notify_later('vm1', ready)
+        started_at = time.monotonic()
+        result = waiter.wait(check, 'test_notified',
+                             policy=waiter.WaitPolicy(timeout=20, interval=10),
+                             resource_id='vm1')
+        self.assertEqual(result, 'ok')
+        # woken by the notification rather than the poll after 10 seconds
+        self.assertLess(time.monotonic() - started_at, 5)
+
+    def test_fallback_is_capped_by_policy(self):
+        polls = []
+
+        def check():
+            polls.append(time.monotonic())
+            assert False
+
+        with self.assertRaises(AssertionError):
+            waiter.wait(check, 'test_fallback',
+                        policy=waiter.WaitPolicy(timeout=2, interval=0.5),
+                        resource_id='vm2')
+        # polled every 0.5 seconds, not every fallback_interval
+        self.assertGreaterEqual(len(polls), 4)
@@ -0,0 +1,141 @@
+import unittest
+from unittest import mock
+
+from skytest.cases import placement
+from skytest.cases import quarantine
+from skytest.common import conf
+from skytest.common import exceptions
+from skytest.common import model
+
+
+class Service(object):
+
+    def __init__(self, zone, host) -> None:
+        self.zone = zone
+        self.host = host
+
+
+class FakeManager(object):
+
+    def __init__(self, services) -> None:
+        self.services = services
+
+    def get_available_services(self, host=None, zone=None, binary=None):
+        return [service for service in self.services
+                if (not host or service.host == host) and
+                (not zone or service.zone == zone)]
+
+
+def _set_options(test, group, **options):
+    for name, value in options.items():
+        test.addCleanup(conf.set_option, group, name,
+                        getattr(getattr(conf.CONF, group), name))
+        conf.set_option(group, name, value)
+
+
+class PlannerTest(unittest.TestCase):
+
+    def setUp(self):
+        for name, value in [('HOSTS', []), ('FLAGS', None),
+                            ('SPREAD', [])]:
+            patcher = mock.patch.object(quarantine, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_round_robin(self):
+        planner = placement.Planner(['az:h1', 'az:h2', 'az:h3'],
+                                    ['net1', 'net2'], [])
+        plans = [planner.plan(index) for index in range(6)]
+        self.assertEqual([p.az for p in plans],
+                         ['az:h1', 'az:h2', 'az:h3'] * 2)
+        self.assertEqual([p.network for p in plans], ['net1', 'net2'] * 3)
+        self.assertEqual({p.flavor for p in plans}, {None})
+
+    def test_skip_quarantined_hosts(self):
+        _set_options(self, 'quarantine', on_quarantine='continue')
+        quarantine.init(['h1', 'h2', 'h3'])
+        quarantine.FLAGS[1] = 1
+        planner = placement.Planner(['az:h1', 'az:h2', 'az:h3'], [], [])
+        self.assertEqual([planner.plan(index).az for index in range(4)],
+                         ['az:h1', 'az:h3'] * 2)
+
+    def test_all_hosts_quarantined(self):
+        _set_options(self, 'quarantine', on_quarantine='continue')
+        quarantine.init(['h1', 'h2'])
+        quarantine.FLAGS[0] = quarantine.FLAGS[1] = 1
+        target = placement.Planner(['az:h1', 'az:h2'], ['net1'], []).plan(0)
+        self.assertTrue(target.no_host)
+        self.assertIsNone(target.az)
+        self.assertEqual(target.network, 'net1')
+
+
+class InitTest(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(placement, 'PLANNER', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        _set_options(self, 'openstack', boot_az='', networks=['n1', 'n2'],
+                     flavors=['f1'])
+        _set_options(self, 'quarantine', failure_rate=0, action_p95=[])
+        self.manager = FakeManager([Service('az2', 'h3'),
+                                    Service('az1', 'h2'),
+                                    Service('az1', 'h1')])
+
+    def test_spread(self):
+        _set_options(self, 'ecs_test', spread=['host', 'flavor'])
+        placement.init(self.manager)
+        self.assertEqual(placement.PLANNER.hosts,
+                         ['az1:h1', 'az1:h2', 'az2:h3'])
+        self.assertEqual(placement.PLANNER.networks, [])
+        self.assertEqual(placement.plan(1),
+                         placement.Placement('az1:h2', None, 'f1'))
+        self.assertIsNone(placement.plan(None))
+
+    def test_spread_in_boot_az(self):
+        _set_options(self, 'ecs_test', spread=['host'])
+        _set_options(self, 'openstack', boot_az='az1')
+        placement.init(self.manager)
+        self.assertEqual(placement.PLANNER.hosts, ['az1:h1', 'az1:h2'])
+
+    def test_invalid_spread(self):
+        _set_options(self, 'ecs_test', spread=['rack'])
+        self.assertRaises(exceptions.InvalidConfig, placement.init,
+                          self.manager)
+
+    def test_no_host(self):
+        _set_options(self, 'ecs_test', spread=['host'])
+        _set_options(self, 'openstack', boot_az='az3')
+        self.assertRaises(exceptions.NotAvailableServices, placement.init,
+                          self.manager)
+
+
+class ContextTest(unittest.TestCase):
+
+    def test_use(self):
+        self.assertEqual(placement.current(), placement.Placement())
+        plan = placement.Placement('az:h1', 'n1', 'f1')
+        with placement.use(plan):
+            self.assertIs(placement.current(), plan)
+        self.assertEqual(placement.current(), placement.Placement())
+
+
+class HostReportTest(unittest.TestCase):
+
+    def test_add(self):
+        report = placement.HostReport()
+        report.add(model.ScenarioResult(actions=[
+            model.ActionResult('create', host='h1', elapsed=10),
+            model.ActionResult('migrate', host='h2', elapsed=30),
+        ]))
+        report.add(model.ScenarioResult(ok=False, actions=[
+            model.ActionResult('create', host='h1', elapsed=20),
+            model.ActionResult('reboot', host='h1', ok=False),
+            model.ActionResult('stop', skipped=True),
+        ]))
+        report.add(model.ScenarioResult(ok=False))
+        self.assertEqual(report.scenarios,
+                         {'h2': [1, 0], 'h1': [1, 1], '-': [1, 1]})
+        self.assertEqual(report.elapsed[('create', 'h1')], [10, 20])
+        self.assertEqual(report.failed, {('reboot', 'h1'): 1})
+        self.assertNotIn(('stop', '-'), report.elapsed)
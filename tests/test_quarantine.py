@@ -0,0 +1,152 @@
+import os
+import unittest
+from unittest import mock
+
+from skytest.cases import placement
+from skytest.cases import quarantine
+from skytest.common import conf
+from skytest.common import exceptions
+from skytest.common import model
+
+
+def _set_options(test, **options):
+    for name, value in options.items():
+        test.addCleanup(conf.set_option, 'quarantine', name,
+                        getattr(conf.CONF.quarantine, name))
+        conf.set_option('quarantine', name, value)
+
+
+def _scenario(host, ok=True, action='create', elapsed=10):
+    return model.ScenarioResult(ok=ok, actions=[
+        model.ActionResult(action, host=host, elapsed=elapsed, ok=ok)])
+
+
+class MonitorTest(unittest.TestCase):
+
+    def setUp(self):
+        for name, value in [('HOSTS', []), ('FLAGS', None),
+                            ('SPREAD', [])]:
+            patcher = mock.patch.object(quarantine, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        _set_options(self, failure_rate='0.5', action_p95=[], min_samples=3,
+                     on_quarantine='continue')
+        self.report = placement.HostReport()
+
+    def _add(self, *results):
+        for result in results:
+            self.report.add(result)
+
+    def test_disabled(self):
+        _set_options(self, failure_rate='0')
+        self.assertFalse(quarantine.enabled())
+        self._add(*[_scenario('h1', ok=False)] * 5)
+        self.assertFalse(quarantine.Monitor().check(self.report))
+
+    def test_failure_rate(self):
+        quarantine.init(['h1', 'h2', 'h3'])
+        monitor = quarantine.Monitor()
+        self._add(_scenario('h1', ok=False), _scenario('h1', ok=False))
+        # less than min_samples
+        self.assertFalse(monitor.check(self.report))
+        self.assertEqual(quarantine.quarantined(), [])
+
+        self._add(_scenario('h1'), _scenario('h2', ok=False),
+                  _scenario('h2'), _scenario('h2'))
+        self.assertFalse(monitor.check(self.report))
+        self.assertEqual(quarantine.quarantined(), ['h1'])
+        self.assertEqual(quarantine.healthy_hosts(), ['h2', 'h3'])
+        self.assertIn('failure rate', monitor.reasons['h1'][0])
+        self.assertFalse(monitor.stopped)
+
+    def test_action_p95(self):
+        _set_options(self, failure_rate='0', action_p95=['create:60'])
+        quarantine.init(['h1', 'h2'])
+        monitor = quarantine.Monitor()
+        self._add(*[_scenario('h1', elapsed=100)] * 3,
+                  *[_scenario('h2', elapsed=100, action='reboot')] * 3)
+        monitor.check(self.report)
+        self.assertEqual(quarantine.quarantined(), ['h1'])
+        self.assertEqual(monitor.reasons['h1'],
+                         ['create p95 100.00s > 60s'])
+
+    def test_stop(self):
+        _set_options(self, on_quarantine='stop')
+        quarantine.init(['h1', 'h2'])
+        monitor = quarantine.Monitor()
+        self._add(*[_scenario('h1', ok=False)] * 3)
+        self.assertTrue(monitor.check(self.report))
+        self.assertTrue(monitor.stopped)
+
+    def test_stop_without_healthy_host(self):
+        quarantine.init(['h1'])
+        monitor = quarantine.Monitor()
+        self._add(*[_scenario('h1', ok=False)] * 3)
+        self.assertTrue(monitor.check(self.report))
+
+    def test_stop_without_host_to_spread(self):
+        quarantine.init(['h1', 'h2'], spread=['h1'])
+        monitor = quarantine.Monitor()
+        self._add(*[_scenario('h1', ok=False)] * 3)
+        self.assertTrue(monitor.check(self.report))
+        self.assertEqual(quarantine.healthy_hosts(), ['h2'])
+
+    def test_unknown_host_is_ignored(self):
+        quarantine.init(['h1'])
+        self._add(*[_scenario('h9', ok=False)] * 3)
+        self.assertFalse(quarantine.Monitor().check(self.report))
+        self.assertFalse(quarantine.is_quarantined('h9'))
+
+    def test_flags_are_shared_with_forked_workers(self):
+        quarantine.init(['h1', 'h2'])
+        child_read, parent_write = os.pipe()
+        parent_read, child_write = os.pipe()
+        pid = os.fork()
+        if not pid:
+            # the worker is forked before the host is quarantined
+            os.read(child_read, 1)
+            os.write(child_write,
+                     b'1' if quarantine.is_quarantined('h2') else b'0')
+            os._exit(0)
+        quarantine.FLAGS[1] = 1
+        os.write(parent_write, b'x')
+        self.assertEqual(os.read(parent_read, 1), b'1')
+        os.waitpid(pid, 0)
+
+    def test_migration_target(self):
+        quarantine.init(['h1', 'h2', 'h3'])
+        self.assertIsNone(quarantine.migration_target('h1'))
+        quarantine.FLAGS[1] = 1
+        for _ in range(10):
+            self.assertEqual(quarantine.migration_target('h1'), 'h3')
+        quarantine.FLAGS[2] = 1
+        self.assertRaises(exceptions.NotAvailableServices,
+                          quarantine.migration_target, 'h1')
+
+    def test_invalid_options(self):
+        _set_options(self, on_quarantine='pause')
+        self.assertRaises(exceptions.InvalidConfig, quarantine.init, ['h1'])
+        _set_options(self, on_quarantine='stop', action_p95=['create:x'])
+        self.assertRaises(exceptions.InvalidConfig, quarantine.init, ['h1'])
+
+
+class MigrateTargetTest(unittest.TestCase):
+
+    def _migrate(self, version):
+        from novaclient import api_versions
+
+        from skytest.managers.openstack import manager
+
+        ecs_manager = manager.OpenstackManager.__new__(
+            manager.OpenstackManager)
+        ecs_manager.client = mock.Mock()
+        ecs_manager.client.nova.api_version = \
+            api_versions.APIVersion(version)
+        ecs_manager.migrate_ecs(model.ECS('vm1'), host='h2')
+        return ecs_manager.client.nova.servers.migrate
+
+    def test_without_target_before_2_56(self):
+        self._migrate('2.40').assert_called_once_with('vm1')
+
+    def test_with_target(self):
+        self._migrate('2.56').assert_called_once_with('vm1', host='h2')
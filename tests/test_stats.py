@@ -0,0 +1,71 @@
+import unittest
+
+from skytest.common import model
+from skytest.common import stats
+
+
+class PercentileTest(unittest.TestCase):
+
+    def test_empty(self):
+        self.assertEqual(stats.percentile([], 95), 0)
+
+    def test_single(self):
+        self.assertEqual(stats.percentile([3], 95), 3)
+
+    def test_interpolated(self):
+        values = [10, 1, 9, 2, 8, 3, 7, 4, 6, 5]
+        self.assertEqual(stats.percentile(values, 50), 5.5)
+        self.assertEqual(stats.percentile(values, 0), 1)
+        self.assertEqual(stats.percentile(values, 100), 10)
+
+    def test_exact_rank(self):
+        self.assertEqual(stats.percentile(list(range(1, 22)), 95), 20)
+
+
+class FindKneeTest(unittest.TestCase):
+
+    def test_knee(self):
+        points = [(1, 10), (2, 19), (4, 30), (8, 32)]
+        self.assertEqual(stats.find_knee(points), (4, 30))
+
+    def test_too_few_points(self):
+        self.assertIsNone(stats.find_knee([]))
+        self.assertEqual(stats.find_knee([(1, 10), (2, 19)]), (2, 19))
+
+    def test_flat(self):
+        points = [(1, 10), (2, 10), (4, 10)]
+        self.assertEqual(stats.find_knee(points), (4, 10))
+
+
+class SummaryTest(unittest.TestCase):
+
+    def _result(self, *actions):
+        return model.ScenarioResult(actions=list(actions))
+
+    def test_summarize_actions(self):
+        results = [
+            self._result(model.ActionResult('create', elapsed=10),
+                         model.ActionResult('reboot', elapsed=5)),
+            self._result(model.ActionResult('create', elapsed=20),
+                         model.ActionResult('reboot', ok=False),
+                         model.ActionResult('stop', skipped=True)),
+        ]
+        summary = stats.summarize_actions(results)
+        self.assertEqual(sorted(summary), ['create', 'reboot'])
+        self.assertEqual(summary['create'].total, 2)
+        self.assertEqual(summary['create'].p50, 15)
+        self.assertEqual(summary['create'].max, 20)
+        self.assertEqual(summary['reboot'].failed, 1)
+        self.assertEqual(summary['reboot'].failure_rate, 0.5)
+
+    def test_throughput_excludes_drain(self):
+        results = [self._result(
+            model.ActionResult('create', started_at=100, elapsed=10),
+            model.ActionResult('reboot', started_at=110, elapsed=10),
+            model.ActionResult('stop', started_at=120, elapsed=10),
+            model.ActionResult('start', started_at=125, ok=False),
+        )]
+        self.assertEqual(stats.throughput(results, 60), 3)
+        # the stop completed after the deadline is not counted
+        self.assertEqual(stats.throughput(results, 30, until=125), 4)
+        self.assertEqual(stats.throughput(results, 0), 0)
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from skytest.cases import base
+from skytest.cases import ecs_actions
+from skytest.cases import scenario
+from skytest.common import conf
+from skytest.common import model
+from skytest.common import timeline
+
+
+class TimelineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'timeline.jsonl')
+        self.addCleanup(timeline.close)
+
+    def test_record_and_load(self):
+        timeline.start(self.path, seed=42, worker=2, total=2)
+        timeline.record(1, timeline.STARTED_AT + 3, ['create', 'stop'],
+                        [0, 2])
+        timeline.record(0, timeline.STARTED_AT + 1.5, ['create'], [0])
+        timeline.close()
+
+        recorded = timeline.load(self.path)
+        self.assertEqual((recorded.seed, recorded.worker, recorded.total),
+                         (42, 2, 2))
+        self.assertEqual(recorded.scenarios, [
+            timeline.ScenarioRecord(0, 1.5, ['create'], [0]),
+            timeline.ScenarioRecord(1, 3, ['create', 'stop'], [0, 2]),
+        ])
+
+    def test_skip_invalid_line(self):
+        timeline.start(self.path, seed=1)
+        timeline.close()
+        with open(self.path, 'a') as f:
+            f.write('{"type": "scen')
+        recorded = timeline.load(self.path)
+        self.assertEqual((recorded.seed, recorded.scenarios), (1, []))
+
+    def test_not_recorded_without_path(self):
+        timeline.start()
+        timeline.record(0, timeline.STARTED_AT, ['create'], [0])
+        self.assertIsNone(timeline.TIMELINE)
+
+    def test_wait_offset(self):
+        timeline.start()
+        with mock.patch('time.sleep') as sleep:
+            timeline.wait_offset(-1)
+            sleep.assert_not_called()
+            timeline.wait_offset(30)
+        self.assertAlmostEqual(sleep.call_args[0][0], 30, delta=1)
+
+
+class FakeManager(object):
+
+    def get_ecs(self, ecs_id):
+        return model.ECS(ecs_id, status='ACTIVE')
+
+    def get_ecs_events(self, ecs):
+        return []
+
+    def report_ecs_actions(self, ecs, events=None):
+        pass
+
+
+class ReplayScenarioTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'timeline.jsonl')
+        self.addCleanup(timeline.close)
+        self.addCleanup(conf.set_option, 'workload', 'weights',
+                        conf.CONF.workload.weights)
+
+        class FakeAction(base.EcsActionTestBase):
+
+            def start(self):
+                self.ecs = self.ecs or model.ECS('vm1', status='ACTIVE')
+
+        fakes = {name: type(name, (FakeAction,), {})
+                 for name in ['create', 'reboot']}
+        patcher = mock.patch.dict(ecs_actions.VM_TEST_SCENARIOS, fakes)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_replay_sleeps(self):
+        # the workload is not generated again by a replay
+        conf.set_option('workload', 'weights', ['reboot:1'])
+        timeline.start(self.path)
+        record = timeline.ScenarioRecord(
+            0, 0, ['create', 'reboot', 'reboot'], [0, 5, 7])
+        with mock.patch('time.sleep') as sleep:
+            test = scenario.ECSScenarioTest(record.actions, mgr=FakeManager(),
+                                            index=0, sleeps=record.sleeps)
+            test.run(pre_check=False)
+        self.assertEqual([c[0][0] for c in sleep.call_args_list], [5, 7])
+        self.assertEqual(test.actions, ['create', 'reboot', 'reboot'])
+        timeline.close()
+
+        replayed = timeline.load(self.path).scenarios
+        self.assertEqual([(s.actions, s.sleeps) for s in replayed],
+                         [(record.actions, record.sleeps)])
@@ -0,0 +1,171 @@
+import time
+import types
+import unittest
+from unittest import mock
+
+from skytest.common import conf
+from skytest.common import exceptions
+from skytest.common import utils
+from skytest.common import waiter
+
+
+class FakeClock(object):
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def event(self):
+        clock = self
+
+        class Event(object):
+
+            def __init__(self) -> None:
+                self._set = False
+
+            def set(self):
+                self._set = True
+
+            def clear(self):
+                self._set = False
+
+            def is_set(self):
+                return self._set
+
+            def wait(self, timeout):
+                clock.sleeps.append(timeout)
+                clock.now += timeout
+                return self._set
+
+        return Event
+
+
+class PolicyTest(unittest.TestCase):
+
+    def test_retry_policy_bounds(self):
+        policy = waiter._retry_policy(6, 1, backoff=2, max_delay=10)
+        self.assertEqual(policy.timeout, 1 + 2 + 4 + 8 + 10)
+        self.assertEqual((policy.interval, policy.max_interval), (1, 10))
+        self.assertEqual(waiter._retry_policy(10, 1, max_delay=6).timeout, 9)
+        self.assertEqual(waiter._retry_policy(12, 5).timeout, 55)
+
+    def test_every_named_policy_is_bounded(self):
+        for name in waiter.POLICIES:
+            policy = waiter.get_policy(name)
+            self.assertGreater(policy.timeout, 0, name)
+            self.assertGreater(policy.interval, 0, name)
+
+    def test_default_and_overrides(self):
+        default = waiter.get_policy('not_a_wait')
+        self.assertEqual(default.timeout, conf.CONF.ecs_test.wait_timeout)
+        policy = waiter.get_policy('ecs_status', timeout=42, interval=3)
+        self.assertEqual((policy.timeout, policy.interval), (42, 3))
+
+    def test_ecs_deleted(self):
+        for name, value in [('delete_wait_timeout', 120),
+                            ('delete_wait_interval', 3)]:
+            self.addCleanup(conf.set_option, 'ecs_test', name,
+                            getattr(conf.CONF.ecs_test, name))
+            conf.set_option('ecs_test', name, value)
+        policy = waiter.get_policy('ecs_deleted')
+        self.assertEqual((policy.timeout, policy.interval), (120, 3))
+
+    def test_action_interval(self):
+        self.addCleanup(conf.set_option, 'ecs_test', 'action_wait_intervals',
+                        conf.CONF.ecs_test.action_wait_intervals)
+        conf.set_option('ecs_test', 'action_wait_intervals',
+                        ['live_migrate:7'])
+        with waiter.action('live_migrate'):
+            self.assertEqual(waiter.get_policy('ecs_migrated').interval, 7)
+        with waiter.action('reboot'):
+            self.assertNotEqual(waiter.get_policy('ecs_migrated').interval,
+                                7)
+
+    def test_jitter(self):
+        self.assertEqual(waiter._sleep_time(10, 0), 10)
+        for _ in range(100):
+            self.assertTrue(9 <= waiter._sleep_time(10, 0.1) <= 11)
+
+
+class WaitTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patchers = [
+            mock.patch.object(waiter, 'time', types.SimpleNamespace(
+                monotonic=self.clock.monotonic, time=time.time)),
+            mock.patch.object(waiter, 'threading', types.SimpleNamespace(
+                Event=self.clock.event())),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(waiter.CANCEL.clear)
+
+    def test_backoff_until_deadline(self):
+        polls = []
+
+        def check():
+            polls.append(self.clock.now)
+            raise exceptions.EcsIsNotDeleted('vm1')
+
+        policy = waiter.WaitPolicy(30, interval=1, backoff=2, max_interval=5)
+        with waiter.action('delete') as stats, \
+                self.assertRaises(exceptions.EcsIsNotDeleted):
+            waiter.wait(check, 'test_backoff',
+                        retry_on=exceptions.EcsIsNotDeleted, policy=policy)
+        # the last sleep is cut by the deadline
+        self.assertEqual(self.clock.sleeps, [1, 2, 4, 5, 5, 5, 5, 3])
+        self.assertEqual(len(polls), 9)
+        self.assertEqual((stats.polls, stats.timeouts), (9, 1))
+        self.assertEqual(stats.waited, 30)
+
+    def test_return_result(self):
+        results = iter([AssertionError, AssertionError, 'ok'])
+
+        def check():
+            result = next(results)
+            if result is AssertionError:
+                raise AssertionError()
+            return result
+
+        policy = waiter.WaitPolicy(30, interval=2, backoff=1)
+        self.assertEqual(waiter.wait(check, 'test_result', policy=policy),
+                         'ok')
+        self.assertEqual(self.clock.sleeps, [2, 2])
+
+    def test_not_retried_error(self):
+
+        def check():
+            raise exceptions.EcsIsError('vm1')
+
+        self.assertRaises(exceptions.EcsIsError, waiter.wait, check,
+                          'test_error', policy=waiter.WaitPolicy(30))
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_cancel(self):
+
+        def check():
+            waiter.cancel_all()
+            raise AssertionError()
+
+        self.assertRaises(exceptions.WaitCancelled, waiter.wait, check,
+                          'test_cancel', policy=waiter.WaitPolicy(30))
+
+
+class ThreadWaitTest(unittest.TestCase):
+
+    def test_counted_in_pool_threads(self):
+
+        def attach(item):
+            return waiter.wait(lambda: item, 'test_thread',
+                               policy=waiter.WaitPolicy(30))
+
+        with waiter.action('attach_volume_loop') as stats:
+            results = list(utils.run_threads(attach, [1, 2, 3],
+                                             max_workers=3))
+        self.assertEqual(results, [1, 2, 3])
+        self.assertEqual(stats.polls, 3)
@@ -0,0 +1,176 @@
+import collections
+import random
+import unittest
+from unittest import mock
+
+from skytest.cases import base
+from skytest.cases import ecs_actions
+from skytest.cases import scenario
+from skytest.cases import workload
+from skytest.common import checkpoint
+from skytest.common import conf
+from skytest.common import exceptions
+from skytest.common import model
+
+ALL_WEIGHTS = {'stop': 1, 'start': 1, 'pause': 1, 'unpause': 1,
+               'shelve': 1, 'unshelve': 1, 'rename': 1, 'reboot': 1,
+               'migrate': 1}
+
+
+class TransitionTest(unittest.TestCase):
+
+    def test_generated_actions_are_allowed(self):
+        actions = workload.Workload(ALL_WEIGHTS, count=2000,
+                                    rng=random.Random(1)).iter_actions()
+        state = workload.ACTIVE
+        for action in actions:
+            allowed, next_state = workload._transition(action)
+            self.assertIn(state, allowed, action)
+            state = next_state or state
+
+    def test_all_states_are_reached(self):
+        actions = list(workload.Workload(
+            ALL_WEIGHTS, count=2000, rng=random.Random(2)).iter_actions())
+        self.assertEqual(set(actions), set(ALL_WEIGHTS))
+
+    def test_group_transition(self):
+        self.assertEqual(workload._transition('pause+rename'),
+                         ({workload.ACTIVE}, None))
+        self.assertEqual(workload._transition('stop+start'), (set(), None))
+
+    def test_no_allowed_action(self):
+        actions = workload.Workload({'unpause': 1}, count=10).iter_actions(
+            state=workload.STOPPED)
+        self.assertEqual(list(actions), [])
+
+
+class WeightTest(unittest.TestCase):
+
+    def test_weights(self):
+        actions = workload.Workload(
+            {'reboot': 3, 'rename': 1, 'stop': 0}, count=4000,
+            rng=random.Random(3)).iter_actions()
+        counts = collections.Counter(actions)
+        self.assertNotIn('stop', counts)
+        self.assertAlmostEqual(counts['reboot'] / 4000, 0.75, delta=0.03)
+
+    def test_reproducible(self):
+        def _generate(seed):
+            return list(workload.Workload(
+                ALL_WEIGHTS, count=50,
+                rng=random.Random(seed)).iter_actions())
+
+        self.assertEqual(_generate('42:0'), _generate('42:0'))
+        self.assertNotEqual(_generate('42:0'), _generate('42:1'))
+
+    def test_parse_weights(self):
+        self.assertEqual(workload.parse_weights(['reboot:2', 'stop+rename:1']),
+                         {'reboot': 2.0, 'stop+rename': 1.0})
+        self.assertRaises(exceptions.InvalidConfig,
+                          workload.parse_weights, ['reboot:x'])
+        self.assertRaises(exceptions.InvalidConfig,
+                          workload.parse_weights, ['reboot:0'])
+        self.assertRaises(exceptions.InvalidScenario,
+                          workload.parse_weights, ['create:1'])
+        self.assertRaises(exceptions.InvalidScenario,
+                          workload.parse_weights, ['not_an_action:1'])
+
+
+class FromConfTest(unittest.TestCase):
+
+    def setUp(self):
+        for name in ['weights', 'count', 'duration']:
+            self.addCleanup(conf.set_option, 'workload', name,
+                            getattr(conf.CONF.workload, name))
+
+    def test_disabled(self):
+        conf.set_option('workload', 'weights', [])
+        self.assertIsNone(workload.Workload.from_conf())
+
+    def test_limit_is_required(self):
+        conf.set_option('workload', 'weights', ['reboot:1'])
+        conf.set_option('workload', 'count', 0)
+        conf.set_option('workload', 'duration', 0)
+        self.assertRaises(exceptions.InvalidConfig,
+                          workload.Workload.from_conf)
+
+    def test_parsed_once(self):
+        conf.set_option('workload', 'count', 3)
+        conf.set_option('workload', 'weights', ['reboot:1'])
+        with mock.patch.object(workload, 'parse_weights',
+                               wraps=workload.parse_weights) as parse:
+            for _ in range(3):
+                self.assertEqual(workload.Workload.from_conf().weights,
+                                 {'reboot': 1.0})
+            conf.set_option('workload', 'weights', ['rename:1'])
+            self.assertEqual(workload.Workload.from_conf().weights,
+                             {'rename': 1.0})
+        self.assertLessEqual(parse.call_count, 2)
+        self.assertEqual(parse.call_args[0][0], ['rename:1'])
+
+
+class FakeManager(object):
+
+    def get_ecs(self, ecs_id):
+        return model.ECS(ecs_id, status='ACTIVE')
+
+    def get_ecs_events(self, ecs):
+        return []
+
+    def report_ecs_actions(self, ecs, events=None):
+        pass
+
+
+class ScenarioWorkloadTest(unittest.TestCase):
+
+    def setUp(self):
+        for name in ['weights', 'count', 'duration']:
+            self.addCleanup(conf.set_option, 'workload', name,
+                            getattr(conf.CONF.workload, name))
+        self.calls = []
+        calls = self.calls
+
+        class FakeAction(base.EcsActionTestBase):
+
+            def start(self):
+                calls.append(('run', self.name))
+                self.ecs = self.ecs or model.ECS('vm1', status='ACTIVE')
+
+            def tear_down(self):
+                calls.append(('tear_down', self.name))
+
+        fakes = {name: type(name, (FakeAction,), {'name': name})
+                 for name in ['create', 'reboot']}
+        patcher = mock.patch.dict(ecs_actions.VM_TEST_SCENARIOS, fakes)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_generated_jobs_are_torn_down_at_once(self):
+        conf.set_option('workload', 'weights', ['reboot:1'])
+        conf.set_option('workload', 'count', 2)
+        test = scenario.ECSScenarioTest(['create'], mgr=FakeManager())
+        test.run(pre_check=False)
+        self.assertEqual(test.actions, ['create', 'reboot', 'reboot'])
+        self.assertEqual(self.calls, [
+            ('run', 'create'),
+            ('run', 'reboot'), ('tear_down', 'reboot'),
+            ('run', 'reboot'), ('tear_down', 'reboot'),
+            ('tear_down', 'create'),
+        ])
+
+    def test_resume_generates_the_rest(self):
+        conf.set_option('workload', 'weights', ['reboot:1'])
+        conf.set_option('workload', 'count', 3)
+        progress = checkpoint.Progress(
+            0, ecs='vm1', actions=['create', 'reboot', 'reboot'],
+            next_action=2, generated=2)
+        test = scenario.ECSScenarioTest(progress.actions, mgr=FakeManager(),
+                                        index=0, progress=progress)
+        test.run(pre_check=False)
+        self.assertEqual(test.actions, ['create'] + ['reboot'] * 3)
+        self.assertEqual(test.generated, 3)
+        self.assertEqual(self.calls, [
+            ('run', 'reboot'), ('tear_down', 'reboot'),
+            ('run', 'reboot'), ('tear_down', 'reboot'),
+            ('tear_down', 'create'),
+        ])
@@ -0,0 +1,70 @@
+"""
+Benchmark the import time of the skytest-ecs CLI
+
+Usage:
+    python tools/bench_import.py [--runs 5] [--max-ms 300] [--top 15]
+
+The CLI module is imported with "python -X importtime" in new processes.
+It fails if the median import time is more than --max-ms, or any of the
+heavy modules which must be imported lazily is imported.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+CLI_MODULE = 'skytest.cmd.ecs_test'
+LAZY_MODULES = ['novaclient', 'glanceclient', 'cinderclient', 'neutronclient',
+                'keystoneclient', 'keystoneauth1', 'libvirt', 'libvirt_qemu',
+                'prettytable']
+
+
+def import_times(module) -> dict[str, tuple[int, int]]:
+    """Return {module: (self us, cumulative us)} of one import"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                             f'import {module}'],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.exit(f'import {module} failed:\n{result.stderr}')
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-ms', type=float, default=300)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [import_times(CLI_MODULE) for _ in range(args.runs)]
+    totals = [times[CLI_MODULE][1] / 1000 for times in runs]
+    median = statistics.median(totals)
+
+    last = runs[-1]
+    print(f'top {args.top} modules by cumulative import time (ms):')
+    for name, (_, cumulative_us) in sorted(
+            last.items(), key=lambda x: x[1][1], reverse=True)[:args.top]:
+        print(f'{cumulative_us / 1000:10.2f}  {name}')
+    print(f'import {CLI_MODULE}: median {median:.2f} ms of {args.runs} '
+          f'run(s), min {min(totals):.2f} ms, max {max(totals):.2f} ms')
+
+    failed = False
+    imported = sorted({name.split('.')[0] for name in last} &
+                      set(LAZY_MODULES))
+    if imported:
+        print(f'ERROR: {", ".join(imported)} must be imported lazily')
+        failed = True
+    if median > args.max_ms:
+        print(f'ERROR: import time {median:.2f} ms > {args.max_ms} ms')
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()